@@ -7,19 +7,37 @@
 - 분석 리포트 자동 생성 및 Git 저장
 """
 
-import pyupbit
 import pandas as pd
 import numpy as np
-import requests
 import time
 from datetime import datetime, timedelta
 import pytz
-import ta
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 import warnings
 import os
-import json
+import argparse
+from market_fetcher import (
+    collect_orderbook_summaries,
+    collect_concurrently, fetch_concurrently, get_markets, get_ohlcv, get_candles, format_price,
+    begin_candle_cache, end_candle_cache
+)
+from surge_features import (
+    CLOSE, VOLUME, stack_candles, compute_short_term_features, compute_daily_volume_features, feature_rows
+)
+from signal_rules import score_records, score_snapshot, get_rule_set
+from history_log import HistoryLog
+from daily_archive import archive_reports
+from excel_export import DATABASES, open_database
+from snapshot_records import (
+    MonitorRecord, ShortTermFeatures, DailyVolumeFeatures, IndicatorSummary, MonitorOrderbook,
+    snapshot_to_dicts, scan_from_dict
+)
+from scan_daemon import run_daemon
+from publisher import send_telegram, commit_and_push
+from prefilter import select_markets
+from scan_metrics import METRICS
+from indicator_engine import INDICATOR_ENGINE, compute_indicators
+from shard_pool import map_shards, start_pool
+from scan_coordinator import run_sharded, SCAN_SHARDING
 warnings.filterwarnings('ignore')
 
 KST = pytz.timezone('Asia/Seoul')
@@ -37,13 +55,22 @@ SCAN_INTERVAL = int(os.environ.get('SCAN_INTERVAL', '180'))
 VOLUME_THRESHOLD_WATCH = float(os.environ.get('VOLUME_THRESHOLD_WATCH', '1.3'))
 VOLUME_THRESHOLD_STRONG = float(os.environ.get('VOLUME_THRESHOLD_STRONG', '2.0'))
 
+# 리포트에 올리는 신호 기준 점수 (scoring_rules.json 의 cutoff)
+SIGNAL_SCORE_CUTOFF = get_rule_set('signal_strength').cutoff
+
 # 데이터 저장 경로
 DATA_DIR = 'market_data/realtime_monitor'
 ANALYSIS_DIR = 'analysis_reports/realtime_reports'
-EXCEL_FILE = 'realtime_monitor_database.xlsx'
+EXCEL_FILE = DATABASES['realtime']['excel_file']
+HISTORY_DIR = os.path.join(DATA_DIR, 'realtime_history')
+
+# 스캔 캐시 봉별 최소 조회 개수
+DAILY_CANDLES = 100
+CANDLE_MIN_COUNTS = {'day': DAILY_CANDLES}
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(ANALYSIS_DIR, exist_ok=True)
+# 일봉 거래량/지표 계산 워커 프로세스 수 (1 이면 코인별 분석), ANALYSIS_COMPARE=1 이면 단일 프로세스 대비 속도 출력
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '1'))
+ANALYSIS_COMPARE = os.environ.get('ANALYSIS_COMPARE', '0') == '1'
 
 # ============================================
 # 데이터 수집
@@ -53,305 +80,268 @@ def collect_market_data():
     """시장 데이터 수집"""
     print(f"📊 실시간 모니터링 데이터 수집: {get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    tickers = pyupbit.get_tickers(fiat="KRW")
-    market_snapshot = []
+    with METRICS.stage('prefilter'):
+        screening = select_markets(get_markets())
     
-    for coin in tickers:
+    if SCAN_SHARDING:
+        # 샤드 분산: 워커가 샤드별로 호가창/캔들 수집 + 분석
+        market_snapshot = run_sharded(['realtime'], screening.tickers, CANDLE_MIN_COUNTS)['realtime']
+    else:
+        with METRICS.stage('orderbook'):
+            orderbook_summaries = collect_orderbook_summaries(screening.tickers)
+        
+        # 일봉은 지표 계산용 100개를 한 번에 받아 거래량 분석(30개)에 재사용
+        begin_candle_cache(CANDLE_MIN_COUNTS)
         try:
-            analysis = analyze_coin_comprehensive(coin)
-            if analysis:
-                market_snapshot.append(analysis)
-            time.sleep(0.1)
-        except Exception as e:
-            continue
+            with METRICS.stage('analyze'):
+                market_snapshot = build_realtime_snapshot(screening.tickers, orderbook_summaries)
+        finally:
+            end_candle_cache()
     
+    screening.report(market_snapshot, SIGNAL_SCORE_CUTOFF, "실시간 모니터링")
     return market_snapshot
 
-def analyze_coin_comprehensive(coin):
-    """코인 종합 분석 (단기+일봉+지표)"""
+def build_realtime_snapshot(tickers, orderbook_summaries):
+    """단기/일봉/지표 분석 + 신호 강도 평가 (통합 스캔과 공용)"""
+    short_term = collect_short_term_features(tickers)
+    # ANALYSIS_WORKERS > 1 이면 일봉 거래량/지표를 프로세스 풀에서 미리 계산
+    daily = collect_daily_analysis(tickers) if ANALYSIS_WORKERS > 1 else {}
+    market_snapshot = collect_concurrently(
+        tickers, lambda coin: analyze_coin_data(
+            coin, orderbook_summaries.get(coin), short_term.get(coin), daily.get(coin)
+        )
+    )
+    return score_snapshot(market_snapshot, 'signal_strength', 'signal_type')
+
+def analyze_coin_comprehensive(coin, orderbook_summary=None, short_term_data=None):
+    """코인 종합 분석 (단기+일봉+지표+신호 강도)"""
+    analysis = analyze_coin_data(coin, orderbook_summary, short_term_data)
+    if not analysis:
+        return None
+    return score_snapshot([analysis], 'signal_strength', 'signal_type')[0]
+
+def analyze_coin_data(coin, orderbook_summary=None, short_term_data=None, daily_data=None):
+    """코인 분석 데이터 수집 (단기+일봉+지표, 신호 강도는 스냅샷 단위로 평가)
+    daily_data: 미리 계산한 (일봉 분석, 기술적 지표)"""
     try:
         # 단기 시간봉 분석
-        short_term_data = analyze_short_term_volume(coin)
+        if short_term_data is None:
+            short_term_data = analyze_short_term_volume(coin)
         
-        # 일봉 분석
-        volume_data = analyze_volume(coin)
+        # 일봉 분석 + 기술적 지표
+        if daily_data is None:
+            volume_data = analyze_volume(coin)
+            indicators = calculate_indicators(coin)
+        else:
+            volume_data, indicators = daily_data
         
         # 호가창 분석
-        orderbook_data = analyze_orderbook(coin)
-        
-        # 기술적 지표
-        indicators = calculate_indicators(coin)
-        
-        # 신호 강도 계산
-        score, signals, signal_type = calculate_signal_strength(
-            volume_data, indicators, orderbook_data, short_term_data
-        )
+        orderbook_data = analyze_orderbook(coin, orderbook_summary)
         
         if not short_term_data or not volume_data:
             return None
         
-        return {
-            'timestamp': get_kst_now().isoformat(),
-            'coin': coin,
-            'price': float(short_term_data.get('current_price', volume_data.get('current_price', 0))),
-            'short_term': short_term_data,
-            'volume_data': volume_data,
-            'orderbook': orderbook_data,
-            'indicators': indicators,
-            'score': score,
-            'signals': signals,
-            'signal_type': signal_type
-        }
+        return MonitorRecord(
+            timestamp=get_kst_now().isoformat(),
+            coin=coin,
+            price=float(short_term_data.get('current_price', volume_data.get('current_price', 0))),
+            short_term=short_term_data,
+            volume_data=volume_data,
+            orderbook=orderbook_data,
+            indicators=indicators
+        )
     except Exception as e:
         return None
 
+def fetch_short_term_candles(coin):
+    """5분봉, 15분봉 조회"""
+    candles_5m = get_candles(coin, interval="minute5", count=100)
+    candles_15m = get_candles(coin, interval="minute15", count=100)
+    
+    if candles_5m is None or candles_15m is None or len(candles_5m) < 20 or len(candles_15m) < 20:
+        return None
+    return candles_5m, candles_15m
+
+def compute_short_term_batch(candles):
+    """단기 시간봉 피처 전체 코인 일괄 계산"""
+    if not candles:
+        return {}
+    
+    coins, ohlcv_5m = stack_candles({coin: pair[0] for coin, pair in candles.items()}, 100)
+    _, ohlcv_15m = stack_candles({coin: pair[1] for coin, pair in candles.items()}, 100)
+    return feature_rows(coins, compute_short_term_features(ohlcv_5m, ohlcv_15m), ShortTermFeatures)
+
+def collect_short_term_features(tickers):
+    """전체 코인 5분봉, 15분봉 수집 후 일괄 분석"""
+    return compute_short_term_batch(fetch_concurrently(tickers, fetch_short_term_candles))
+
 def analyze_short_term_volume(coin):
     """5분봉, 15분봉 기반 실시간 급등 감지"""
     try:
-        df_5m = pyupbit.get_ohlcv(coin, interval="minute5", count=100)
-        df_15m = pyupbit.get_ohlcv(coin, interval="minute15", count=100)
-        
-        if df_5m is None or df_15m is None or len(df_5m) < 20 or len(df_15m) < 20:
+        candles = fetch_short_term_candles(coin)
+        if candles is None:
             return None
         
-        # 5분봉 분석
-        current_5m_volume = df_5m['volume'].iloc[-1]
-        volume_5m_ma_10 = df_5m['volume'].rolling(10).mean().iloc[-1]
-        volume_5m_ratio = current_5m_volume / volume_5m_ma_10 if volume_5m_ma_10 > 0 else 0
-        
-        recent_3_volume = df_5m['volume'].iloc[-3:].mean()
-        prev_10_volume = df_5m['volume'].iloc[-13:-3].mean()
-        volume_surge_ratio = recent_3_volume / prev_10_volume if prev_10_volume > 0 else 0
-        
-        price_change_5m = ((df_5m['close'].iloc[-1] - df_5m['close'].iloc[-4]) / df_5m['close'].iloc[-4]) * 100
-        
-        # 15분봉 분석
-        current_15m_volume = df_15m['volume'].iloc[-1]
-        volume_15m_ma_10 = df_15m['volume'].rolling(10).mean().iloc[-1]
-        volume_15m_ratio = current_15m_volume / volume_15m_ma_10 if volume_15m_ma_10 > 0 else 0
-        
-        price_change_15m = ((df_15m['close'].iloc[-1] - df_15m['close'].iloc[-4]) / df_15m['close'].iloc[-4]) * 100
-        
-        # 연속 거래량 증가
-        consecutive_increase = 0
-        for i in range(1, min(5, len(df_5m))):
-            if df_5m['volume'].iloc[-i] > df_5m['volume'].iloc[-i-1]:
-                consecutive_increase += 1
-            else:
-                break
-        
-        # 체결강도 (양봉/음봉 비율)
-        recent_candles = df_5m.iloc[-10:]
-        bullish_count = sum(recent_candles['close'] > recent_candles['open'])
-        bullish_ratio = bullish_count / 10
-        
-        return {
-            'volume_5m_ratio': float(volume_5m_ratio),
-            'volume_15m_ratio': float(volume_15m_ratio),
-            'volume_surge_ratio': float(volume_surge_ratio),
-            'price_change_5m': float(price_change_5m),
-            'price_change_15m': float(price_change_15m),
-            'consecutive_increase': int(consecutive_increase),
-            'bullish_ratio': float(bullish_ratio),
-            'current_price': float(df_5m['close'].iloc[-1])
-        }
+        return compute_short_term_batch({coin: candles})[coin]
     except Exception as e:
         return None
 
 def analyze_volume(coin):
     """거래량 분석 - 일봉 기반"""
     try:
-        df = pyupbit.get_ohlcv(coin, interval="day", count=30)
+        df = get_ohlcv(coin, interval="day", count=30)
         if df is None or len(df) < 20:
             return None
         
-        current_volume = df['volume'].iloc[-1]
-        volume_ma_20 = df['volume'].rolling(20).mean().iloc[-1]
-        volume_ratio = current_volume / volume_ma_20
-        
-        volume_ma_7 = df['volume'].rolling(7).mean().iloc[-1]
-        volume_ma_14 = df['volume'].rolling(14).mean().iloc[-1]
-        accumulation_index = ((volume_ma_7 - volume_ma_14) / volume_ma_14) * 100
-        
-        price_7d_ago = df['close'].iloc[-8]
-        current_price = df['close'].iloc[-1]
-        price_change_7d = abs((current_price - price_7d_ago) / price_7d_ago) * 100
-        
-        price_change_1d = abs((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
-        volume_change_1d = ((current_volume - df['volume'].iloc[-2]) / df['volume'].iloc[-2]) * 100
-        
-        divergence = volume_change_1d / price_change_1d if price_change_1d > 0 else 0
-        
-        return {
-            'volume_ratio': float(volume_ratio),
-            'accumulation_index': float(accumulation_index),
-            'price_change_7d': float(price_change_7d),
-            'divergence': float(divergence),
-            'current_volume': float(current_volume),
-            'current_price': float(current_price)
-        }
+        coins, ohlcv = stack_candles({coin: df}, 30)
+        return feature_rows(coins, compute_daily_volume_features(ohlcv), DailyVolumeFeatures)[coin]
     except Exception as e:
         return None
 
-def analyze_orderbook(coin):
+def analyze_orderbook(coin, orderbook_summary=None):
     """호가창 물량 변화 분석"""
     try:
-        orderbook = pyupbit.get_orderbook(coin)
-        if orderbook is None or not isinstance(orderbook, list) or len(orderbook) == 0:
-            return None
-        
-        orderbook_data = orderbook[0]
-        if 'orderbook_units' not in orderbook_data:
+        if orderbook_summary is None:
+            orderbook_summary = collect_orderbook_summaries([coin]).get(coin)
+        if not orderbook_summary:
             return None
         
-        units = orderbook_data['orderbook_units']
-        total_bid_size = sum([item.get('bid_size', 0) for item in units])
-        total_ask_size = sum([item.get('ask_size', 0) for item in units])
-        bid_ask_ratio = total_bid_size / total_ask_size if total_ask_size > 0 else 0
-        
-        top_bid = units[0].get('bid_size', 0) if len(units) > 0 else 0
-        top_ask = units[0].get('ask_size', 0) if len(units) > 0 else 0
-        
-        return {
-            'total_bid': float(total_bid_size),
-            'total_ask': float(total_ask_size),
-            'bid_ask_ratio': float(bid_ask_ratio),
-            'top_bid': float(top_bid),
-            'top_ask': float(top_ask)
-        }
+        return MonitorOrderbook(
+            total_bid=orderbook_summary['total_bid'],
+            total_ask=orderbook_summary['total_ask'],
+            bid_ask_ratio=orderbook_summary['bid_ask_ratio'],
+            top_bid=orderbook_summary['top_bid'],
+            top_ask=orderbook_summary['top_ask'],
+            imbalance_delta=orderbook_summary.get('imbalance_delta'),
+            bid_wall_persistence=orderbook_summary.get('bid_wall_persistence'),
+            ask_wall_persistence=orderbook_summary.get('ask_wall_persistence'),
+            bid_wall_pulled=orderbook_summary.get('bid_wall_pulled'),
+            ask_wall_pulled=orderbook_summary.get('ask_wall_pulled')
+        )
     except Exception as e:
         return None
 
 def calculate_indicators(coin):
     """기술적 지표 계산"""
     try:
-        df = pyupbit.get_ohlcv(coin, interval="day", count=100)
+        df = get_ohlcv(coin, interval="day", count=100)
         if df is None or len(df) < 50:
             return None
         
-        rsi = ta.momentum.RSIIndicator(df['close'], window=14).rsi().iloc[-1]
-        rsi_signal = "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립"
-        
-        macd = ta.trend.MACD(df['close'])
-        macd_line = macd.macd().iloc[-1]
-        signal_line = macd.macd_signal().iloc[-1]
-        macd_hist = macd.macd_diff().iloc[-1]
-        macd_signal = "골든크로스" if macd_line > signal_line and macd_hist > 0 else "데드크로스" if macd_line < signal_line and macd_hist < 0 else "중립"
-        
-        bollinger = ta.volatility.BollingerBands(df['close'])
-        bb_high = bollinger.bollinger_hband().iloc[-1]
-        bb_low = bollinger.bollinger_lband().iloc[-1]
-        current_price = df['close'].iloc[-1]
-        
-        if current_price >= bb_high:
-            bb_signal = "상단터치"
-        elif current_price <= bb_low:
-            bb_signal = "하단터치"
-        else:
-            bb_signal = "중립"
-        
-        ma5 = df['close'].rolling(5).mean().iloc[-1]
-        ma20 = df['close'].rolling(20).mean().iloc[-1]
-        ma_signal = "상향돌파" if ma5 > ma20 else "하향돌파"
-        
-        volume_avg = df['volume'].rolling(20).mean().iloc[-1]
-        current_volume = df['volume'].iloc[-1]
-        volume_percent = (current_volume / volume_avg) * 100
-        volume_signal = "급증" if volume_percent > 150 else "정상"
-        
-        return {
-            'rsi': float(rsi),
-            'rsi_signal': rsi_signal,
-            'macd_signal': macd_signal,
-            'bb_signal': bb_signal,
-            'ma_signal': ma_signal,
-            'volume_percent': float(volume_percent),
-            'volume_signal': volume_signal,
-            'current_price': float(current_price)
-        }
+        # 신규 확정 캔들만 상태에 반영, 창 시작이 밀리면 재계산 (같은 창의 ta 라이브러리 값과 동일)
+        return summarize_indicators(INDICATOR_ENGINE.update(coin, "day", df))
     except Exception as e:
         return None
 
-# ============================================
-# 신호 강도 판단
-# ============================================
-
-def calculate_signal_strength(volume_data, indicators, orderbook_data, short_term_data):
-    """단기 + 중장기 지표 통합 분석 (최대 14개 지표)"""
-    score = 0
-    signals = []
-    signal_type = "NORMAL"
+def summarize_indicators(values):
+    """지표 값 → RSI / MACD / 볼린저 / MA / 거래량 판정"""
+    rsi = values['rsi']
+    rsi_signal = "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립"
     
-    # 조기 감지 신호 (단기 시간봉)
-    if short_term_data:
-        if short_term_data['volume_5m_ratio'] >= 2.0:
-            score += 2
-            signals.append("🔥 5분봉 거래량 폭발")
-            signal_type = "EARLY"
-        elif short_term_data['volume_5m_ratio'] >= 1.5:
-            score += 1
-            signals.append("⚡ 5분봉 거래량 증가")
-        
-        if short_term_data['consecutive_increase'] >= 3:
-            score += 2
-            signals.append("🔥 연속 거래량 증가")
-            signal_type = "EARLY"
-        
-        if short_term_data['price_change_5m'] > 5:
-            score += 2
-            signals.append("🚀 5분봉 급등 중")
-            signal_type = "EARLY"
-        elif short_term_data['price_change_5m'] > 3:
-            score += 1
-            signals.append("📈 5분봉 상승 중")
-        
-        if short_term_data['volume_15m_ratio'] >= 2.0:
-            score += 1
-            signals.append("✅ 15분봉 거래량 돌파")
-        
-        if short_term_data['bullish_ratio'] >= 0.7:
-            score += 1
-            signals.append("✅ 매수세 강함")
+    macd_line = values['macd']
+    signal_line = values['macd_signal']
+    macd_hist = values['macd_diff']
+    macd_signal = "골든크로스" if macd_line > signal_line and macd_hist > 0 else "데드크로스" if macd_line < signal_line and macd_hist < 0 else "중립"
     
-    # 일봉 거래량
-    if volume_data:
-        if volume_data['volume_ratio'] >= 2.0:
-            score += 1
-            signals.append("✅ 일봉 거래량 MA 돌파")
-        
-        if volume_data['accumulation_index'] > 20 and volume_data['price_change_7d'] < 5:
-            score += 1
-            signals.append("✅ 축적 패턴")
-        
-        if volume_data['divergence'] > 10:
-            score += 1
-            signals.append("✅ 고괴리")
+    bb_high = values['bb_high']
+    bb_low = values['bb_low']
+    current_price = values['close']
     
-    # 호가창
-    if orderbook_data:
-        if orderbook_data['bid_ask_ratio'] > 1.5:
-            score += 1
-            signals.append("✅ 매수벽 우세")
+    if current_price >= bb_high:
+        bb_signal = "상단터치"
+    elif current_price <= bb_low:
+        bb_signal = "하단터치"
+    else:
+        bb_signal = "중립"
     
-    # 기술적 지표
-    if indicators:
-        if indicators['rsi'] < 30:
-            score += 1
-            signals.append("✅ RSI 과매도")
-        
-        if indicators['macd_signal'] == "골든크로스":
-            score += 1
-            signals.append("✅ MACD 골든크로스")
-        
-        if indicators['bb_signal'] == "하단터치":
-            score += 1
-            signals.append("✅ 볼린저 하단")
-        
-        if indicators['ma_signal'] == "상향돌파":
-            score += 1
-            signals.append("✅ MA 상향돌파")
+    ma5 = values['ma_short']
+    ma20 = values['ma_long']
+    ma_signal = "상향돌파" if ma5 > ma20 else "하향돌파"
+    
+    volume_avg = values['volume_ma']
+    current_volume = np.float64(values['volume'])
+    volume_percent = (current_volume / volume_avg) * 100
+    volume_signal = "급증" if volume_percent > 150 else "정상"
     
-    return score, signals, signal_type
+    return IndicatorSummary(
+        rsi=float(rsi),
+        rsi_signal=rsi_signal,
+        macd_signal=macd_signal,
+        bb_signal=bb_signal,
+        ma_signal=ma_signal,
+        volume_percent=float(volume_percent),
+        volume_signal=volume_signal,
+        current_price=float(current_price)
+    )
+
+# ============================================
+# 멀티 프로세스 일봉 분석
+# ============================================
+
+def collect_daily_analysis(tickers, workers=None):
+    """전체 코인 일봉 수집 후 거래량 / 지표를 프로세스 풀에서 일괄 계산 → {코인: (volume_data, indicators)}"""
+    workers = workers or ANALYSIS_WORKERS
+    try:
+        frames = fetch_concurrently(tickers, lambda coin: get_ohlcv(coin, interval="day", count=DAILY_CANDLES))
+        coins = [coin for coin in tickers if coin in frames and len(frames[coin])]
+        if not coins:
+            return {}
+        
+        _, ohlcv = stack_candles({coin: frames[coin] for coin in coins}, DAILY_CANDLES)
+        arrays = {'ohlcv': ohlcv, 'length': np.array([min(len(frames[coin]), DAILY_CANDLES) for coin in coins])}
+        
+        # 워커 시작(첫 스캔만)은 분석 시간과 따로 표시
+        startup = start_pool(workers)
+        started = time.perf_counter()
+        with METRICS.stage('daily'):
+            results = map_shards(analyze_daily_shard, arrays, len(coins), workers)
+        elapsed = time.perf_counter() - started
+        
+        message = f"🧮 일봉 분석 {len(coins)}개 코인: {elapsed:.2f}초 (워커 {workers}개"
+        message += f", 시작 {startup:.1f}초)" if startup else ")"
+        if ANALYSIS_COMPARE:
+            started = time.perf_counter()
+            single = analyze_daily_shard(arrays, 0, len(coins))
+            single_elapsed = time.perf_counter() - started
+            message += f" / 단일 프로세스 {single_elapsed:.2f}초 → ×{single_elapsed / elapsed:.2f}"
+            if single != results:
+                message += " ⚠️ 결과 불일치"
+        print(message)
+        return dict(zip(coins, results))
+    except Exception as e:
+        print(f"⚠️ 멀티 프로세스 일봉 분석 실패, 코인별 분석으로 대체: {e}")
+        return {}
+
+def analyze_daily_shard(arrays, start, stop):
+    """[start, stop) 코인의 (volume_data, indicators) - 워커 프로세스에서 실행
+    analyze_volume / calculate_indicators(첫 스캔) 와 같은 값"""
+    ohlcv = arrays['ohlcv'][start:stop]
+    lengths = arrays['length'][start:stop]
+    volume_rows = feature_rows(range(len(ohlcv)), compute_daily_volume_features(ohlcv[:, -30:]), DailyVolumeFeatures)
+    
+    results = []
+    for row, length in enumerate(lengths):
+        volume_data = volume_rows[row] if length >= 20 else None
+        indicators = None
+        if length >= 50:
+            candles = ohlcv[row, -length:]
+            indicators = summarize_indicators(compute_indicators(candles[:, CLOSE], candles[:, VOLUME]))
+        results.append((volume_data, indicators))
+    return results
+
+# ============================================
+# 신호 강도 판단
+# ============================================
+
+def calculate_signal_strength(volume_data, indicators, orderbook_data, short_term_data):
+    """단기 + 중장기 지표 통합 분석 (15개 지표, 규칙은 scoring_rules.json)"""
+    record = MonitorRecord(
+        short_term=short_term_data,
+        volume_data=volume_data,
+        orderbook=orderbook_data,
+        indicators=indicators
+    )
+    return score_records([record], 'signal_strength')[0]
 
 # ============================================
 # 데이터 저장
@@ -359,63 +349,44 @@ def calculate_signal_strength(volume_data, indicators, orderbook_data, short_ter
 
 def save_to_json_history(market_snapshot):
     """JSON 저장"""
-    history_file = os.path.join(DATA_DIR, 'realtime_history.json')
+    history = HistoryLog(HISTORY_DIR)
     
     try:
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        else:
-            history = []
+        history.import_legacy(os.path.join(DATA_DIR, 'realtime_history.json'))
         
         history.append({
             'scan_time': get_kst_now().isoformat(),
-            'data': market_snapshot
+            'data': snapshot_to_dicts(market_snapshot)
         })
         
-        if len(history) > 100:
-            history = history[-100:]
-        
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-        
         print(f"✅ JSON 저장: {len(market_snapshot)}개")
         return True
     except Exception as e:
         print(f"❌ JSON 저장 실패: {e}")
         return False
 
+def load_recent_history(n=10):
+    """최근 n회 스캔 히스토리 (오래된 순, data 는 MonitorRecord 리스트)"""
+    return [scan_from_dict(scan, MonitorRecord) for scan in HistoryLog(HISTORY_DIR).read_latest(n)]
+
 def save_to_excel_database(market_snapshot):
-    """Excel 저장"""
+    """Excel 저장 (최근 1000행)"""
     try:
-        try:
-            wb = load_workbook(EXCEL_FILE)
-            ws = wb.active
-        except:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "실시간모니터링"
-            
-            headers = ['수집시간', '코인', '신호타입', '점수', '현재가', '5분봉거래량', 
-                      '가격변화5분', '연속증가', '일봉거래량', 'RSI', '판단']
-            ws.append(headers)
-            
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
+        writer = open_database('realtime')
         
         scan_time = get_kst_now().strftime('%Y-%m-%d %H:%M')
+        max_score = get_rule_set('signal_strength').max_score
+        rows = []
         for item in market_snapshot:
             short_term = item.get('short_term', {}) or {}
             volume_data = item.get('volume_data', {}) or {}
             indicators = item.get('indicators', {}) or {}
             
-            row = [
+            rows.append([
                 scan_time,
                 item['coin'].replace('KRW-', ''),
                 item['signal_type'],
-                f"{item['score']}/14",
+                f"{item['score']}/{max_score}",
                 item['price'],
                 f"{short_term.get('volume_5m_ratio', 0):.2f}",
                 f"{short_term.get('price_change_5m', 0):+.2f}%",
@@ -423,13 +394,9 @@ def save_to_excel_database(market_snapshot):
                 f"{volume_data.get('volume_ratio', 0):.2f}",
                 f"{indicators.get('rsi', 0):.1f}",
                 "🔥조기감지" if item['signal_type'] == "EARLY" else "강력매수" if item['score'] >= 7 else "매수준비"
-            ]
-            ws.append(row)
-        
-        if ws.max_row > 1001:
-            ws.delete_rows(2, ws.max_row - 1001)
+            ])
         
-        wb.save(EXCEL_FILE)
+        writer.append_rows(rows)
         print(f"✅ Excel 저장 완료")
         return True
     except Exception as e:
@@ -440,8 +407,9 @@ def generate_realtime_report(market_snapshot):
     """실시간 모니터링 리포트"""
     report_date = get_kst_now().strftime('%Y%m%d_%H%M')
     report_path = os.path.join(ANALYSIS_DIR, f'realtime_report_{report_date}.md')
+    max_score = get_rule_set('signal_strength').max_score
     
-    signals = [(item, item['score'], item['signal_type']) for item in market_snapshot if item['score'] >= 4]
+    signals = [(item, item['score'], item['signal_type']) for item in market_snapshot if item['score'] >= SIGNAL_SCORE_CUTOFF]
     signals.sort(key=lambda x: x[1], reverse=True)
     
     report = f"""# 실시간 모니터링 분석 리포트
@@ -462,9 +430,9 @@ def generate_realtime_report(market_snapshot):
         coin_name = item['coin'].replace('KRW-', '')
         short_term = item.get('short_term', {}) or {}
         
-        report += f"""### {coin_name} (신호강도: {score}/14, {signal_type})
+        report += f"""### {coin_name} (신호강도: {score}/{max_score}, {signal_type})
 
-- 현재가: {item['price']:,.0f}원
+- 현재가: {format_price(item['coin'], item['price'])}
 - 5분봉 거래량: {short_term.get('volume_5m_ratio', 0):.2f}배
 - 5분 가격변화: {short_term.get('price_change_5m', 0):+.2f}%
 - 연속 증가: {short_term.get('consecutive_increase', 0)}회
@@ -482,6 +450,7 @@ def generate_realtime_report(market_snapshot):
 """
     
     try:
+        os.makedirs(ANALYSIS_DIR, exist_ok=True)
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write(report)
         print(f"✅ 리포트 생성: {report_path}")
@@ -490,17 +459,21 @@ def generate_realtime_report(market_snapshot):
         print(f"❌ 리포트 생성 실패: {e}")
         return None, 0
 
+def archive_old_reports():
+    """지난 날짜 리포트를 일별 압축 번들로 이동 (당일 리포트만 개별 파일 유지)"""
+    try:
+        return archive_reports(ANALYSIS_DIR, get_kst_now().strftime('%Y%m%d'))
+    except Exception as e:
+        print(f"⚠️ 리포트 보관 실패: {e}")
+        return 0
+
 # ============================================
 # Telegram & Git
 # ============================================
 
 def send_summary_notification(signals_count, early_count, report_path):
     """요약 알림"""
-    if not BOT_TOKEN or not CHAT_ID:
-        return
-    
-    try:
-        message = f"""📊 실시간 모니터링 분석 완료
+    message = f"""📊 실시간 모니터링 분석 완료
 
 ⏰ {get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}
 🎯 신호 감지: {signals_count}개
@@ -509,43 +482,85 @@ def send_summary_notification(signals_count, early_count, report_path):
 
 데이터는 Repository에 저장되었습니다."""
 
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-        data = {"chat_id": CHAT_ID, "text": message}
-        requests.post(url, data=data, timeout=10)
-    except Exception as e:
-        print(f"알림 전송 실패: {e}")
+    send_telegram(message, BOT_TOKEN, CHAT_ID)
+
+# 커밋 대상 경로 (통합 스캔에서도 사용)
+PUBLISH_PATHS = [DATA_DIR, ANALYSIS_DIR, EXCEL_FILE]
 
 def commit_and_push_data():
     """Git 커밋"""
-    try:
-        import subprocess
-        
-        subprocess.run(['git', 'config', '--global', 'user.email', 'github-actions[bot]@users.noreply.github.com'], check=True)
-        subprocess.run(['git', 'config', '--global', 'user.name', 'GitHub Actions Bot'], check=True)
-        
-        subprocess.run(['git', 'add', DATA_DIR, ANALYSIS_DIR, EXCEL_FILE], check=True)
-        
-        commit_msg = f"Update realtime monitor - {get_kst_now().strftime('%Y-%m-%d %H:%M')}"
-        result = subprocess.run(['git', 'commit', '-m', commit_msg], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            subprocess.run(['git', 'push'], check=True)
-            print("✅ Git 커밋 및 푸시 완료")
-            return True
-        else:
-            print("ℹ️ 변경사항 없음")
-            return False
-            
-    except Exception as e:
-        print(f"⚠️ Git 작업 실패: {e}")
-        return False
+    return commit_and_push(PUBLISH_PATHS, f"Update realtime monitor - {get_kst_now().strftime('%Y-%m-%d %H:%M')}")
 
 # ============================================
 # 메인
 # ============================================
 
-def main():
+def run_scan():
+    """1회 스캔: 수집 → 저장 → 리포트 (Git 커밋/알림 제외)"""
+    METRICS.begin_scan('realtime')
+    
+    with METRICS.stage('collect'):
+        market_snapshot = collect_market_data()
+    
+    if not market_snapshot:
+        print("❌ 수집된 데이터 없음")
+        METRICS.write(DATA_DIR)
+        return None
+    
+    result = save_scan_outputs(market_snapshot)
+    METRICS.write(DATA_DIR)
+    return result
+
+def save_scan_outputs(market_snapshot):
+    """스캔 결과 저장: JSON 히스토리 → Excel → 리포트 (통합 스캔과 공용)"""
+    with METRICS.stage('json'):
+        save_to_json_history(market_snapshot)
+    with METRICS.stage('excel'):
+        save_to_excel_database(market_snapshot)
+    
+    with METRICS.stage('report'):
+        report_path, signals_count = generate_realtime_report(market_snapshot)
+    
+    with METRICS.stage('archive'):
+        archive_old_reports()
+    
+    early_count = sum([1 for item in market_snapshot if item['signal_type'] == 'EARLY'])
+    
+    print(f"\n✅ 분석 완료: {len(market_snapshot)}개 코인, {signals_count}개 신호")
+    return report_path, signals_count, early_count
+
+def run_daemon_mode():
+    """상주 실행: SCAN_INTERVAL 마다 스캔, COMMIT_INTERVAL 마다 커밋/알림"""
+    latest = {}
+    
+    def scan():
+        result = run_scan()
+        if result:
+            latest['result'] = result
+    
+    def persist():
+        commit_and_push_data()
+        if 'result' in latest:
+            report_path, signals_count, early_count = latest.pop('result')
+            send_summary_notification(signals_count, early_count, report_path)
+        METRICS.write(DATA_DIR)
+    
+    run_daemon(scan, SCAN_INTERVAL, persist)
+
+def main(argv=None):
     """메인"""
+    parser = argparse.ArgumentParser(description="실시간 모니터링 분석 시스템")
+    parser.add_argument('--daemon', action='store_true',
+                        help="SCAN_INTERVAL(초) 주기로 상주 실행 (커밋/알림은 COMMIT_INTERVAL 주기)")
+    parser.add_argument('--workers', type=int, help="일봉 분석 워커 프로세스 수 (ANALYSIS_WORKERS)")
+    parser.add_argument('--compare', action='store_true', help="멀티 프로세스 분석 시 단일 프로세스 대비 속도 출력")
+    args = parser.parse_args(argv)
+    
+    global ANALYSIS_WORKERS, ANALYSIS_COMPARE
+    if args.workers:
+        ANALYSIS_WORKERS = args.workers
+    ANALYSIS_COMPARE = ANALYSIS_COMPARE or args.compare
+    
     print("""
     ╔══════════════════════════════════════╗
     ║   실시간 모니터링 분석 시스템       ║
@@ -554,24 +569,21 @@ def main():
     """)
     
     try:
-        market_snapshot = collect_market_data()
-        
-        if not market_snapshot:
-            print("❌ 수집된 데이터 없음")
+        if args.daemon:
+            run_daemon_mode()
             return
         
-        save_to_json_history(market_snapshot)
-        save_to_excel_database(market_snapshot)
-        
-        report_path, signals_count = generate_realtime_report(market_snapshot)
-        
-        early_count = sum([1 for item in market_snapshot if item['signal_type'] == 'EARLY'])
+        result = run_scan()
+        if not result:
+            return
+        report_path, signals_count, early_count = result
         
         commit_and_push_data()
         
         send_summary_notification(signals_count, early_count, report_path)
         
-        print(f"\n✅ 분석 완료: {len(market_snapshot)}개 코인, {signals_count}개 신호")
+        # Git/알림 소요 시간까지 반영 (다음 커밋에 포함)
+        METRICS.write(DATA_DIR)
         
     except KeyboardInterrupt:
         print("\n🛑 프로그램 종료")
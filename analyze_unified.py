@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+통합 스캔 (급등 신호 + 실시간 모니터링)
+- 마켓 목록, 호가창, (코인, 봉) 캔들을 한 번씩만 수집
+- 같은 데이터로 급등 신호(9개 지표)와 종합 분석(15개 지표)을 모두 계산
+- 두 시스템의 히스토리 / Excel / 리포트를 각각 저장하고 한 번에 커밋
+"""
+
+from datetime import datetime
+import pytz
+import os
+import argparse
+from market_fetcher import (
+    collect_orderbook_summaries, get_markets, begin_candle_cache, end_candle_cache
+)
+from publisher import commit_and_push
+from prefilter import select_markets
+from scan_metrics import METRICS
+from scan_daemon import run_daemon
+from scan_coordinator import run_sharded, SCAN_SHARDING
+import analyze_buy_signals as buy_scan
+import analyze_realtime_monitor as realtime_scan
+
+KST = pytz.timezone('Asia/Seoul')
+
+def get_kst_now():
+    return datetime.now(KST)
+
+# ============================================
+# 환경변수 설정
+# ============================================
+SCAN_INTERVAL = int(os.environ.get('SCAN_INTERVAL', '120'))
+
+# 통합 스캔 계측 파일 위치 (두 시스템 히스토리 상위 폴더)
+METRICS_DIR = 'market_data'
+
+# 급등 신호(5분봉 50개)는 실시간 모니터링용 5분봉 100개를 잘라서 사용
+CANDLE_MIN_COUNTS = {**realtime_scan.CANDLE_MIN_COUNTS, 'minute5': 100}
+
+# ============================================
+# 데이터 수집
+# ============================================
+
+def collect_market_data():
+    """공용 데이터 1회 수집 → (급등 신호 스냅샷, 실시간 모니터링 스냅샷)"""
+    print(f"📊 통합 스캔 데이터 수집: {get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    with METRICS.stage('prefilter'):
+        screening = select_markets(get_markets())
+
+    if SCAN_SHARDING:
+        # 샤드 분산: 워커가 샤드별로 호가창/캔들 수집 + 두 시스템 분석
+        snapshots = run_sharded(['buy', 'realtime'], screening.tickers, CANDLE_MIN_COUNTS)
+        buy_snapshot, realtime_snapshot = snapshots['buy'], snapshots['realtime']
+    else:
+        with METRICS.stage('orderbook'):
+            orderbook_summaries = collect_orderbook_summaries(screening.tickers)
+
+        begin_candle_cache(CANDLE_MIN_COUNTS)
+        try:
+            with METRICS.stage('analyze'):
+                buy_snapshot = buy_scan.build_buy_snapshot(screening.tickers, orderbook_summaries)
+                realtime_snapshot = realtime_scan.build_realtime_snapshot(screening.tickers, orderbook_summaries)
+        finally:
+            end_candle_cache()
+
+    screening.report(buy_snapshot, buy_scan.SIGNAL_SCORE_CUTOFF, "급등 신호")
+    screening.report(realtime_snapshot, realtime_scan.SIGNAL_SCORE_CUTOFF, "실시간 모니터링")
+    return buy_snapshot, realtime_snapshot
+
+# ============================================
+# 메인
+# ============================================
+
+def run_scan():
+    """1회 통합 스캔: 수집 → 두 시스템 결과 저장 (Git 커밋/알림 제외)"""
+    METRICS.begin_scan('unified')
+    with METRICS.stage('collect'):
+        buy_snapshot, realtime_snapshot = collect_market_data()
+
+    results = {}
+    if buy_snapshot:
+        results['buy'] = buy_scan.save_scan_outputs(buy_snapshot)
+    else:
+        print("❌ 급등 신호: 수집된 데이터 없음")
+
+    if realtime_snapshot:
+        results['realtime'] = realtime_scan.save_scan_outputs(realtime_snapshot)
+    else:
+        print("❌ 실시간 모니터링: 수집된 데이터 없음")
+
+    METRICS.write(METRICS_DIR)
+    return results or None
+
+METRICS_PATHS = [os.path.join(METRICS_DIR, 'scan_metrics.json'), os.path.join(METRICS_DIR, 'scan_metrics.prom')]
+
+def commit_and_push_data():
+    """두 시스템 결과를 한 번에 Git 커밋"""
+    return commit_and_push(
+        buy_scan.PUBLISH_PATHS + realtime_scan.PUBLISH_PATHS + METRICS_PATHS,
+        f"Update market scan - {get_kst_now().strftime('%Y-%m-%d %H:%M')}"
+    )
+
+def send_summary_notifications(results):
+    """시스템별 요약 알림"""
+    if 'buy' in results:
+        report_path, signals_count = results['buy']
+        buy_scan.send_summary_notification(signals_count, report_path)
+    if 'realtime' in results:
+        report_path, signals_count, early_count = results['realtime']
+        realtime_scan.send_summary_notification(signals_count, early_count, report_path)
+
+def run_daemon_mode():
+    """상주 실행: SCAN_INTERVAL 마다 통합 스캔, COMMIT_INTERVAL 마다 커밋/알림"""
+    latest = {}
+
+    def scan():
+        results = run_scan()
+        if results:
+            latest.update(results)
+
+    def persist():
+        commit_and_push_data()
+        send_summary_notifications(latest)
+        latest.clear()
+        METRICS.write(METRICS_DIR)
+
+    run_daemon(scan, SCAN_INTERVAL, persist)
+
+def main(argv=None):
+    """메인"""
+    parser = argparse.ArgumentParser(description="통합 스캔 (급등 신호 + 실시간 모니터링)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="SCAN_INTERVAL(초) 주기로 상주 실행 (커밋/알림은 COMMIT_INTERVAL 주기)")
+    args = parser.parse_args(argv)
+
+    print("""
+    ╔══════════════════════════════════════╗
+    ║   통합 시장 스캔                    ║
+    ║   Unified Market Scanner            ║
+    ╚══════════════════════════════════════╝
+    """)
+
+    try:
+        if args.daemon:
+            run_daemon_mode()
+            return
+
+        results = run_scan()
+        if not results:
+            return
+
+        commit_and_push_data()
+
+        send_summary_notifications(results)
+
+        # Git/알림 소요 시간까지 반영 (다음 커밋에 포함)
+        METRICS.write(METRICS_DIR)
+
+    except KeyboardInterrupt:
+        print("\n🛑 프로그램 종료")
+    except Exception as e:
+        print(f"❌ 오류 발생: {e}")
+
+if __name__ == "__main__":
+    main()
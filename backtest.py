@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+점수 규칙 백테스트 (벡터화)
+- 전체 KRW 마켓 5분봉 / 일봉 히스토리 내려받기 (로컬 .npz, 이후 증분 갱신)
+- 5분봉 매 봉 시점의 급등 신호(fast_signal) / 종합 분석(signal_strength) 점수를
+  실시간 스캔과 같은 피처 함수 + scoring_rules.json 으로 봉 반복 없이 일괄 계산
+- 신호 이후 보유 기간별 수익률 / 적중률을 점수 · 레벨별로 집계
+"""
+
+from numpy.lib.stride_tricks import sliding_window_view
+from datetime import datetime, timedelta
+import pandas as pd
+import numpy as np
+import argparse
+import warnings
+import pytz
+import time
+import json
+import os
+from surge_features import (
+    OPEN, HIGH, LOW, CLOSE, VOLUME, OHLCV_COLUMNS,
+    compute_surge_features, compute_short_term_features, compute_daily_volume_features
+)
+from indicator_engine import closed_states, peek_arrays
+from signal_rules import get_rule_set, score_columns
+
+KST = pytz.timezone('Asia/Seoul')
+
+# ============================================
+# 환경변수 설정
+# ============================================
+BACKTEST_DATA_DIR = os.environ.get('BACKTEST_DATA_DIR', 'market_data/backtest')
+BACKTEST_DAYS = int(os.environ.get('BACKTEST_DAYS', '90'))
+
+# 지표 계산용 일봉 여유분 (실시간 스캔은 일봉 100개 사용)
+DAILY_WARMUP = 130
+DEFAULT_HORIZONS = [15, 30, 60, 240, 1440]
+
+# 봉 t 에서 피처 계산에 쓰는 최근 캔들 수 (피처 함수가 참조하는 최대 21봉 이상)
+FEATURE_WINDOW = 21
+VOLUME_WINDOW = 30
+
+# 실시간 스캔의 최소 캔들 수 조건
+MIN_INTRADAY_CANDLES = 20
+MIN_DAILY_CANDLES = 20
+MIN_INDICATOR_CANDLES = 50
+
+MINUTE_NS = 60 * 10 ** 9
+DAY_NS = 24 * 60 * MINUTE_NS
+# 업비트 일봉은 KST 09:00 (UTC 0시) 시작
+DAY_OFFSET_NS = 9 * 60 * MINUTE_NS
+
+INTERVALS = {'minute5': timedelta(minutes=5), 'day': timedelta(days=1)}
+
+# ============================================
+# 히스토리 저장소
+# ============================================
+
+def history_path(coin, interval, root=BACKTEST_DATA_DIR):
+    return os.path.join(root, interval, f'{coin}.npz')
+
+def load_history(coin, interval, root=BACKTEST_DATA_DIR):
+    """저장된 캔들 (시각 int64 ns 배열, OHLCV 배열) - 없으면 None"""
+    path = history_path(coin, interval, root)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data['time'].astype('datetime64[ns]').astype(np.int64), data['ohlcv']
+
+def save_history(coin, interval, df, root=BACKTEST_DATA_DIR):
+    path = history_path(coin, interval, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, time=df.index.values.astype('datetime64[ns]'),
+                 ohlcv=df[OHLCV_COLUMNS].to_numpy(dtype=np.float64))
+    os.replace(tmp_path, path)
+
+def update_history(coin, interval, count, root=BACKTEST_DATA_DIR):
+    """최근 count개 이상 보관 (저장분 이후만 추가로 받음) → 저장된 캔들 수"""
+    from market_fetcher import fetch_ohlcv
+
+    stored = load_history(coin, interval, root)
+    if stored is not None and len(stored[0]):
+        times, values = stored
+        old = pd.DataFrame(values, columns=OHLCV_COLUMNS, index=pd.to_datetime(times))
+        last = old.index[-1].to_pydatetime()
+        now = datetime.now(KST).replace(tzinfo=None)
+        missing = int((now - last) / INTERVALS[interval]) + 1
+        if missing < count:
+            fresh = fetch_ohlcv(coin, interval=interval, count=missing)
+            if fresh is None:
+                return len(old)
+            merged = pd.concat([old, fresh[OHLCV_COLUMNS]])
+            merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+            save_history(coin, interval, merged, root)
+            return len(merged)
+
+    fresh = fetch_ohlcv(coin, interval=interval, count=count)
+    if fresh is None:
+        return 0
+    save_history(coin, interval, fresh, root)
+    return len(fresh)
+
+def download_history(markets, days=BACKTEST_DAYS, root=BACKTEST_DATA_DIR):
+    """마켓별 5분봉 days 일 + 일봉 (days + 여유분) 내려받기"""
+    from market_fetcher import fetch_concurrently, end_candle_cache
+
+    counts = {'minute5': days * 288, 'day': days + DAILY_WARMUP}
+    started = time.time()
+    done = []
+
+    def download(coin):
+        stored = {interval: update_history(coin, interval, count, root) for interval, count in counts.items()}
+        done.append(coin)
+        if len(done) % 20 == 0:
+            print(f"  {len(done)}/{len(markets)} 완료 ({time.time() - started:.0f}초)")
+        return stored
+
+    results = fetch_concurrently(markets, download)
+    end_candle_cache()
+    print(f"✅ 히스토리 저장: {len(results)}개 마켓 ({time.time() - started:.0f}초) → {root}")
+    return results
+
+def stored_markets(root=BACKTEST_DATA_DIR):
+    """5분봉 / 일봉이 모두 저장된 마켓"""
+    def names(interval):
+        directory = os.path.join(root, interval)
+        if not os.path.isdir(directory):
+            return set()
+        return {name[:-len('.npz')] for name in os.listdir(directory) if name.endswith('.npz')}
+    return sorted(names('minute5') & names('day'))
+
+# ============================================
+# 봉별 캔들 창 구성
+# ============================================
+
+def _recent_windows(values, length, leading=False):
+    """봉 t 마다 [t - length + 1 .. t] 창 (T × length × 5 뷰, 앞쪽 부족분 NaN)
+    leading=True 이면 맨 앞에 전부 NaN 인 창 1개 추가 (창 i+1 = 봉 i 까지)"""
+    padding = length if leading else length - 1
+    padded = np.concatenate([np.full((padding, values.shape[1]), np.nan), values])
+    return sliding_window_view(padded, length, axis=0).transpose(0, 2, 1)
+
+def _groups(keys):
+    """정렬된 키 → (봉별 그룹 번호, 그룹 시작 위치)"""
+    first = np.concatenate([[True], keys[1:] != keys[:-1]])
+    return np.cumsum(first) - 1, np.flatnonzero(first)
+
+def _aggregate(ohlcv, starts):
+    """그룹별 확정 캔들 (5분봉 → 15분봉 등)"""
+    ends = np.append(starts[1:], len(ohlcv)) - 1
+    candles = np.empty((len(starts), 5))
+    candles[:, OPEN] = ohlcv[starts, OPEN]
+    candles[:, HIGH] = np.maximum.reduceat(ohlcv[:, HIGH], starts)
+    candles[:, LOW] = np.minimum.reduceat(ohlcv[:, LOW], starts)
+    candles[:, CLOSE] = ohlcv[ends, CLOSE]
+    candles[:, VOLUME] = np.add.reduceat(ohlcv[:, VOLUME], starts)
+    return candles
+
+def _forming(ohlcv, group, starts):
+    """봉 t 시점의 진행 중인 상위 봉 (그룹 시작 ~ t 누적)"""
+    by_group = lambda column: pd.Series(ohlcv[:, column]).groupby(group)
+    candles = np.empty((len(ohlcv), 5))
+    candles[:, OPEN] = ohlcv[starts[group], OPEN]
+    candles[:, HIGH] = by_group(HIGH).cummax().to_numpy()
+    candles[:, LOW] = by_group(LOW).cummin().to_numpy()
+    candles[:, CLOSE] = ohlcv[:, CLOSE]
+    candles[:, VOLUME] = by_group(VOLUME).cumsum().to_numpy()
+    return candles
+
+def _history_windows(closed, last, forming, length):
+    """봉 t 마다 [확정 캔들 ~ last[t]] 최근 (length - 1)개 + 진행 중인 캔들 (T × length × 5, 부족분 NaN)"""
+    windows = np.empty((len(last), length, 5))
+    # last = -1 (확정 캔들 없음) → 전부 NaN 인 첫 창
+    windows[:, :-1] = _recent_windows(closed, length - 1, leading=True)[last + 1]
+    windows[:, -1] = forming
+    return windows
+
+# ============================================
+# 코인 단위 백테스트
+# ============================================
+
+def _indicator_labels(values, valid):
+    """calculate_indicators 와 같은 판정 (지표 부족 구간은 결측)"""
+    macd, signal, diff = values['macd'], values['macd_signal'], values['macd_diff']
+    close = values['close']
+    labels = {
+        'rsi': np.where(valid, values['rsi'], np.nan),
+        'macd_signal': np.where((macd > signal) & (diff > 0), "골든크로스",
+                                np.where((macd < signal) & (diff < 0), "데드크로스", "중립")),
+        'bb_signal': np.where(close >= values['bb_high'], "상단터치",
+                              np.where(close <= values['bb_low'], "하단터치", "중립")),
+        'ma_signal': np.where(values['ma_short'] > values['ma_long'], "상향돌파", "하향돌파")
+    }
+    for name in ('macd_signal', 'bb_signal', 'ma_signal'):
+        labels[name] = np.where(valid, labels[name].astype(object), None)
+    return labels
+
+def forward_returns(times, close, horizons):
+    """봉 종가 진입 후 horizon 분 뒤 종가 수익률 (%, 데이터가 끝나면 NaN)"""
+    returns = np.full((len(times), len(horizons)), np.nan)
+    for column, minutes in enumerate(horizons):
+        target = times + minutes * MINUTE_NS
+        exit_index = np.searchsorted(times, target, side='right') - 1
+        valid = target <= times[-1]
+        returns[valid, column] = (close[exit_index[valid]] / close[valid] - 1) * 100
+    return returns
+
+def coin_columns(times_5m, ohlcv_5m, times_day, ohlcv_day):
+    """5분봉 매 봉 시점의 규칙별 필드 배열 → {규칙 이름: (필드별 배열, 평가 가능 여부)}"""
+    count = len(ohlcv_5m)
+    position = np.arange(count)
+    intraday_ok = position >= MIN_INTRADAY_CANDLES - 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        # 급등 신호: 최근 5분봉 창 (호가창은 과거 데이터가 없어 결측)
+        windows_5m = _recent_windows(ohlcv_5m, FEATURE_WINDOW)
+        surge = compute_surge_features(windows_5m)
+
+        # 15분봉: 확정 15분봉 + 5분봉으로 누적한 진행 중인 15분봉
+        group_15m, starts_15m = _groups(times_5m // (15 * MINUTE_NS))
+        windows_15m = _history_windows(_aggregate(ohlcv_5m, starts_15m), group_15m - 1,
+                                       _forming(ohlcv_5m, group_15m, starts_15m), FEATURE_WINDOW)
+        short_term = compute_short_term_features(windows_5m, windows_15m)
+        short_ok = intraday_ok & (group_15m >= MIN_INTRADAY_CANDLES - 1)
+
+        # 일봉: 확정 일봉 + 5분봉으로 누적한 진행 중인 일봉 (첫날은 누적이 불완전해 제외)
+        day_group, day_starts = _groups((times_5m - DAY_OFFSET_NS) // DAY_NS)
+        day_keys = (times_day - DAY_OFFSET_NS) // DAY_NS
+        previous_day = np.searchsorted(day_keys, (times_5m - DAY_OFFSET_NS) // DAY_NS, side='left') - 1
+        forming_day = _forming(ohlcv_5m, day_group, day_starts)
+        daily_count = previous_day + 2
+
+        volume_data = compute_daily_volume_features(
+            _history_windows(ohlcv_day, previous_day, forming_day, VOLUME_WINDOW)
+        )
+        volume_ok = (day_group > 0) & (daily_count >= MIN_DAILY_CANDLES)
+
+        values = peek_arrays(closed_states(ohlcv_day[:, CLOSE], ohlcv_day[:, VOLUME]),
+                             previous_day, forming_day[:, CLOSE], forming_day[:, VOLUME])
+        indicators = _indicator_labels(values, (day_group > 0) & (daily_count >= MIN_INDICATOR_CANDLES))
+
+        columns = {}
+        for prefix, features in (('short_term', short_term), ('volume_data', volume_data), ('indicators', indicators)):
+            columns.update({f'{prefix}.{name}': column for name, column in features.items()})
+
+    return {
+        'fast_signal': (surge, intraday_ok),
+        'signal_strength': (columns, short_ok & volume_ok)
+    }
+
+def backtest_coin(times_5m, ohlcv_5m, times_day, ohlcv_day, horizons):
+    """5분봉 매 봉 시점의 두 규칙 점수 + 보유 기간별 수익률"""
+    result = {}
+    for name, (columns, valid) in coin_columns(times_5m, ohlcv_5m, times_day, ohlcv_day).items():
+        with np.errstate(invalid='ignore'):
+            scores, ranks = score_columns(columns, name, len(ohlcv_5m))
+        result[name] = (scores, ranks, valid)
+    result['returns'] = forward_returns(times_5m, ohlcv_5m[:, CLOSE], horizons)
+    return result
+
+# ============================================
+# 집계
+# ============================================
+
+class SignalStats:
+    """점수 / 레벨별 수익률 합계 · 적중 수 누적"""
+
+    def __init__(self, name, horizons, hit_threshold=0.0):
+        self.name = name
+        self.rule_set = get_rule_set(name)
+        self.horizons = horizons
+        self.hit_threshold = hit_threshold
+        self.by_score = self._empty(self.rule_set.max_score + 1)
+        self.by_level = self._empty(len(self.rule_set.levels))
+        self.coins = 0
+
+    def _empty(self, size):
+        return {
+            'bars': np.zeros(size, dtype=np.int64),
+            'count': np.zeros((size, len(self.horizons)), dtype=np.int64),
+            'sum': np.zeros((size, len(self.horizons))),
+            'hits': np.zeros((size, len(self.horizons)), dtype=np.int64)
+        }
+
+    def _add(self, table, keys, returns):
+        size = len(table['bars'])
+        table['bars'] += np.bincount(keys, minlength=size)
+        for column in range(len(self.horizons)):
+            finite = np.isfinite(returns[:, column])
+            key, value = keys[finite], returns[finite, column]
+            table['count'][:, column] += np.bincount(key, minlength=size)
+            table['sum'][:, column] += np.bincount(key, weights=value, minlength=size)
+            table['hits'][:, column] += np.bincount(key, weights=value > self.hit_threshold,
+                                                    minlength=size).astype(np.int64)
+
+    def add(self, scores, ranks, valid, returns):
+        if not valid.any():
+            return
+        self.coins += 1
+        self._add(self.by_score, scores[valid], returns[valid])
+        self._add(self.by_level, ranks[valid], returns[valid])
+
+    @staticmethod
+    def _row(label, bars, count, total, hits):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'label': label,
+                'bars': int(bars),
+                'mean_return': np.where(count > 0, total / count, np.nan).tolist(),
+                'hit_rate': np.where(count > 0, hits / count * 100, np.nan).tolist()
+            }
+
+    def rows(self):
+        """전체 / 점수 이상(누적) / 레벨별 행"""
+        table = self.by_score
+        # 높은 점수부터 누적 → '점수 s 이상'
+        cumulative = {key: np.cumsum(values[::-1], axis=0)[::-1] for key, values in table.items()}
+        rows = [self._row("전체", cumulative['bars'][0], cumulative['count'][0],
+                          cumulative['sum'][0], cumulative['hits'][0])]
+        for score in range(1, len(table['bars'])):
+            if cumulative['bars'][score]:
+                rows.append(self._row(f"점수 ≥ {score}", cumulative['bars'][score], cumulative['count'][score],
+                                      cumulative['sum'][score], cumulative['hits'][score]))
+        for rank, level in enumerate(self.rule_set.levels):
+            level_table = self.by_level
+            rows.append(self._row(f"레벨 {level}", level_table['bars'][rank], level_table['count'][rank],
+                                  level_table['sum'][rank], level_table['hits'][rank]))
+        return rows
+
+    def print_table(self):
+        rows = self.rows()
+        print(f"\n📊 {self.name} - 평가 봉 {rows[0]['bars']:,}개, 코인 {self.coins}개 "
+              f"(적중: 수익률 > {self.hit_threshold:+.2f}%)")
+        header = ''.join(f"{_horizon_label(h):>19}" for h in self.horizons)
+        print(f"{'조건':<14}{'봉 수':>12}  {header}")
+        for row in rows:
+            cells = ''.join(
+                f"{_format_pct(mean, True):>9} {_format_pct(hit):>7}  "
+                for mean, hit in zip(row['mean_return'], row['hit_rate'])
+            )
+            print(f"{row['label']:<14}{row['bars']:>12,}  {cells}")
+
+def _horizon_label(minutes):
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}일 평균/적중"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}시간 평균/적중"
+    return f"{minutes}분 평균/적중"
+
+def _format_pct(value, signed=False):
+    if value is None or not np.isfinite(value):
+        return "-"
+    return f"{value:+.2f}%" if signed else f"{value:.1f}%"
+
+# ============================================
+# 실행
+# ============================================
+
+def load_histories(markets, root=BACKTEST_DATA_DIR):
+    """{코인: ((5분봉 시각, OHLCV), (일봉 시각, OHLCV))} - 5분봉/일봉이 모두 있는 마켓만"""
+    histories = {}
+    for coin in markets:
+        minute5, day = load_history(coin, 'minute5', root), load_history(coin, 'day', root)
+        if minute5 is not None and day is not None and len(minute5[0]) >= MIN_INTRADAY_CANDLES:
+            histories[coin] = (minute5, day)
+    return histories
+
+def evaluation_start(markets, days=None, root=BACKTEST_DATA_DIR):
+    """평가 시작 시각: 전체 마켓 마지막 5분봉 기준 최근 days 일 (이전 봉은 피처 계산에만 사용)"""
+    latest = []
+    for coin in markets if days else []:
+        path = history_path(coin, 'minute5', root)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                if len(data['time']):
+                    latest.append(data['time'][-1].astype('datetime64[ns]').astype(np.int64))
+    if not latest:
+        return np.iinfo(np.int64).min
+    return max(latest) - days * DAY_NS
+
+def run_backtest(markets, horizons=DEFAULT_HORIZONS, days=None, hit_threshold=0.0, root=BACKTEST_DATA_DIR):
+    """저장된 히스토리로 두 규칙 백테스트 → {규칙 이름: SignalStats}"""
+    stats = {name: SignalStats(name, horizons, hit_threshold) for name in ('fast_signal', 'signal_strength')}
+    histories = load_histories(markets, root)
+    start = evaluation_start(histories, days, root)
+
+    for coin, ((times_5m, ohlcv_5m), (times_day, ohlcv_day)) in histories.items():
+        result = backtest_coin(times_5m, ohlcv_5m, times_day, ohlcv_day, horizons)
+        in_range = times_5m >= start
+        for name, (scores, ranks, valid) in ((name, result[name]) for name in stats):
+            stats[name].add(scores, ranks, valid & in_range, result['returns'])
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="점수 규칙 백테스트 (벡터화)")
+    parser.add_argument('--data-dir', default=BACKTEST_DATA_DIR, help="히스토리 저장 폴더")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--markets', nargs='+', help="대상 마켓 (기본: 전체 KRW / 저장된 전체)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download_parser = commands.add_parser('download', parents=[common], help="5분봉 / 일봉 히스토리 내려받기 (증분)")
+    download_parser.add_argument('--days', type=int, default=BACKTEST_DAYS, help="5분봉 보관 일수")
+
+    run_parser = commands.add_parser('run', parents=[common], help="저장된 히스토리로 백테스트")
+    run_parser.add_argument('--days', type=int, help="최근 N일만 평가 (기본: 전체)")
+    run_parser.add_argument('--horizons', type=int, nargs='+', default=DEFAULT_HORIZONS, help="보유 기간 (분)")
+    run_parser.add_argument('--hit-threshold', type=float, default=0.0, help="적중 기준 수익률 (%%, 수수료 반영 시 0.1 등)")
+    run_parser.add_argument('--json', help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    if args.command == 'download':
+        from market_fetcher import get_tickers
+        markets = args.markets or get_tickers(fiat="KRW")
+        print(f"📥 히스토리 내려받기: {len(markets)}개 마켓, 5분봉 {args.days}일")
+        download_history(markets, args.days, args.data_dir)
+        return
+
+    markets = args.markets or stored_markets(args.data_dir)
+    if not markets:
+        print(f"❌ 저장된 히스토리 없음: {args.data_dir} (먼저 'python backtest.py download' 실행)")
+        return
+
+    started = time.perf_counter()
+    stats = run_backtest(markets, args.horizons, args.days, args.hit_threshold, args.data_dir)
+    elapsed = time.perf_counter() - started
+
+    for item in stats.values():
+        item.print_table()
+    print(f"\n⏱️ 백테스트 {len(markets)}개 마켓: {elapsed:.1f}초 "
+          f"(봉 단위 집계, 연속 신호 중복 포함, 호가창 규칙은 과거 데이터 없음)")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': datetime.now(KST).isoformat(timespec='seconds'),
+                'markets': len(markets),
+                'days': args.days,
+                'horizons': args.horizons,
+                'hit_threshold': args.hit_threshold,
+                'results': {name: item.rows() for name, item in stats.items()}
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.json}")
+
+if __name__ == "__main__":
+    main()
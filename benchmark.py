@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+오프라인 재생 벤치마크 (스캔 전체 구간 성능 측정)
+- record: 실제 업비트 응답(마켓 목록/현재가/5분·15분·일봉/호가창)을 fixture 로 1회 저장
+- run: fixture 를 가상 네트워크 지연과 함께 재생하며 급등 신호 / 실시간 모니터링 / 통합 스캔 실행
+- 단계별 wall / CPU 시간, 요청 수, 최대 메모리 측정 → 기준값(baseline)과 비교
+- history: 저장된 스캔 히스토리 로딩 메모리 측정 (JSON dict vs 스냅샷 레코드)
+
+파이프라인마다 별도 프로세스 + 빈 임시 폴더(캔들 저장소 없음)에서 실행해 매번 같은 요청을 재현한다.
+"""
+
+from datetime import datetime
+import subprocess
+import statistics
+import importlib
+import functools
+import gc
+import itertools
+import argparse
+import tempfile
+import random
+import time
+import gzip
+import json
+import sys
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_FIXTURE = os.path.join('benchmarks', 'upbit_fixture.json.gz')
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+# 파이프라인 → (스캐너 모듈, 단계 계측 대상 모듈)
+PIPELINES = {
+    'buy': ('analyze_buy_signals', ['analyze_buy_signals']),
+    'realtime': ('analyze_realtime_monitor', ['analyze_realtime_monitor']),
+    'unified': ('analyze_unified', ['analyze_unified', 'analyze_buy_signals', 'analyze_realtime_monitor']),
+}
+
+# 스캐너 모듈 함수명 → 단계 이름 (collect 는 prefilter ~ scoring 을 포함)
+STAGES = {
+    'collect_market_data': 'collect',
+    'select_markets': 'prefilter',
+    'collect_orderbook_summaries': 'orderbook',
+    'build_buy_snapshot': 'analysis',
+    'build_realtime_snapshot': 'analysis',
+    'score_snapshot': 'scoring',
+    'save_to_json_history': 'history',
+    'save_to_excel_database': 'excel',
+    'generate_buy_signal_report': 'report',
+    'generate_realtime_report': 'report',
+    'archive_old_reports': 'archive',
+}
+STAGE_ORDER = ['collect', 'prefilter', 'orderbook', 'analysis', 'scoring',
+               'history', 'excel', 'report', 'archive']
+
+RESULT_PREFIX = 'BENCH_RESULT '
+
+# ============================================
+# 녹화 / 재생 세션 (upbit_client.SESSION 대체)
+# ============================================
+
+def fixture_key(path, params):
+    return json.dumps([path, sorted((params or {}).items())], ensure_ascii=False)
+
+class RecordingSession:
+    """실제 요청을 그대로 보내고 성공 응답 본문 저장"""
+
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url
+        self.responses = {}
+
+    def get(self, url, params=None, timeout=None):
+        response = self.session.get(url, params=params, timeout=timeout)
+        if response.status_code == 200:
+            self.responses[fixture_key(url[len(self.base_url) + 1:], params)] = response.text
+        return response
+
+class ReplayResponse:
+    # 한도에 여유가 있는 것으로 응답 (제한기는 기본 속도 유지)
+    headers = {'Remaining-Req': 'group=replay; min=1800; sec=30'}
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+class ReplaySession:
+    """녹화된 응답 재생 (요청마다 latency + 0~jitter 초 대기)"""
+
+    def __init__(self, responses, base_url, latency=0.0, jitter=0.0, seed=0):
+        self.responses = responses
+        self.base_url = base_url
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = {}
+        self.missing = 0
+
+    def get(self, url, params=None, timeout=None):
+        path = url[len(self.base_url) + 1:]
+        group = path.split('/')[0]
+        self.requests[group] = self.requests.get(group, 0) + 1
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        text = self.responses.get(fixture_key(path, params))
+        if text is None:
+            self.missing += 1
+            return ReplayResponse(404, f'fixture 없음: {path} {params}')
+        return ReplayResponse(200, text)
+
+def load_fixture(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_fixture(path, fixture):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False)
+
+# ============================================
+# 단계 계측
+# ============================================
+
+class StageTimer:
+    """함수 호출 단위 wall / CPU 시간 누적 (메인 스레드 호출 기준, 중첩 허용)"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.stack = []
+
+    def wrap(self, stage, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            self._enter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit(stage)
+        return timed
+
+    def instrument(self, module):
+        for name, stage in STAGES.items():
+            if hasattr(module, name):
+                setattr(module, name, self.wrap(stage, getattr(module, name)))
+
+    def _enter(self):
+        frame = {'wall': time.perf_counter(), 'cpu': time.process_time(), 'peak': 0, 'base': 0}
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            # 상위 단계 최대값을 보존한 뒤 이 단계 기준으로 재설정
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = current
+        self.stack.append(frame)
+
+    def _exit(self, stage):
+        frame = self.stack.pop()
+        stats = self.stages.setdefault(stage, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+        stats['calls'] += 1
+        stats['wall'] += time.perf_counter() - frame['wall']
+        stats['cpu'] += time.process_time() - frame['cpu']
+        if self.trace_memory:
+            import tracemalloc
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            stats['peak_kb'] = max(stats.get('peak_kb', 0), (peak - frame['base']) / 1024)
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+
+# ============================================
+# 작업 프로세스 (파이프라인 1회 실행)
+# ============================================
+
+def _freeze_prefilter(now_ms):
+    """사전 선별을 녹화 시각 기준으로 고정 (표본 순환 위치 포함)"""
+    import prefilter
+    prefilter._rotation = itertools.count(0)
+    prefilter.screen_markets = functools.partial(prefilter.screen_markets, now_ms=now_ms)
+
+def run_worker(args):
+    """임시 폴더에서 파이프라인 1회 실행 → 결과 JSON 한 줄 출력"""
+    sys.path.insert(0, REPO_DIR)
+    import upbit_client
+
+    scanner_name, instrumented = PIPELINES[args.pipeline]
+    base_url = upbit_client.UPBIT_API_URL
+
+    if args.mode == 'record':
+        session = RecordingSession(upbit_client.SESSION, base_url)
+        now_ms = args.now_ms
+    else:
+        fixture = load_fixture(args.fixture)
+        session = ReplaySession(fixture['responses'], base_url, args.latency, args.jitter)
+        now_ms = fixture['recorded_at']
+    upbit_client.SESSION = session
+    _freeze_prefilter(now_ms)
+
+    timer = StageTimer(args.trace_memory)
+    if args.trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    scanner = importlib.import_module(scanner_name)
+    for name in instrumented:
+        timer.instrument(importlib.import_module(name))
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    scanner.run_scan()
+    result = {
+        'wall': time.perf_counter() - wall,
+        'cpu': time.process_time() - cpu,
+        'stages': timer.stages,
+    }
+
+    if args.mode == 'record':
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(session.responses, f, ensure_ascii=False)
+        result['requests'] = len(session.responses)
+    else:
+        result['requests'] = sum(session.requests.values())
+        result['requests_by_group'] = session.requests
+        result['missing'] = session.missing
+    if resource is not None:
+        # Linux: KB 단위
+        result['maxrss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.trace_memory:
+        import tracemalloc
+        result['traced_peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+
+    print(RESULT_PREFIX + json.dumps(result, ensure_ascii=False), flush=True)
+
+def spawn_worker(pipeline, worker_args, verbose=False, env=None):
+    """작업 프로세스 실행 (빈 임시 폴더, 결과 dict 반환)"""
+    with tempfile.TemporaryDirectory(prefix=f'bench_{pipeline}_') as workdir:
+        command = [sys.executable, os.path.join(REPO_DIR, 'benchmark.py'), '_worker',
+                   '--pipeline', pipeline, *worker_args]
+        process = subprocess.run(command, cwd=workdir, capture_output=True, text=True,
+                                 env={**os.environ, 'PYTHONHASHSEED': '0', **(env or {})})
+    if verbose:
+        print(process.stdout)
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{pipeline} 실행 실패:\n{process.stdout[-2000:]}\n{process.stderr[-2000:]}")
+
+# ============================================
+# 녹화
+# ============================================
+
+def record(args):
+    """파이프라인별로 실제 요청을 녹화해 fixture 하나로 병합"""
+    recorded_at = int(time.time() * 1000)
+    responses = {}
+    for pipeline in args.pipelines:
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            part_path = f.name
+        try:
+            result = spawn_worker(pipeline, ['--mode', 'record', '--now-ms', str(recorded_at),
+                                             '--output', part_path], args.verbose)
+            with open(part_path, 'r', encoding='utf-8') as f:
+                responses.update(json.load(f))
+        finally:
+            os.remove(part_path)
+        print(f"🎙️ {pipeline}: 응답 {result['requests']}개 녹화 ({result['wall']:.1f}초)")
+
+    save_fixture(args.fixture, {
+        'recorded_at': recorded_at,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'pipelines': args.pipelines,
+        'responses': responses,
+    })
+    print(f"✅ fixture 저장: {args.fixture} (응답 {len(responses)}개)")
+
+# ============================================
+# 재생 / 기준값 비교
+# ============================================
+
+def _median_result(results):
+    """반복 실행 결과의 중앙값 (단계별 포함)"""
+    merged = {}
+    for key in ('wall', 'cpu', 'requests', 'missing', 'maxrss_kb', 'traced_peak_kb'):
+        values = [r[key] for r in results if key in r]
+        if values:
+            merged[key] = statistics.median(values)
+    merged['requests_by_group'] = results[-1].get('requests_by_group', {})
+
+    stages = {}
+    for stage in STAGE_ORDER:
+        runs = [r['stages'][stage] for r in results if stage in r['stages']]
+        if runs:
+            stages[stage] = {key: statistics.median(run[key] for run in runs)
+                             for key in runs[0]}
+    merged['stages'] = stages
+    return merged
+
+def _metrics(result):
+    """비교 대상 지표 평탄화 (이름 → 값)"""
+    metrics = {name: result[name] for name in ('wall', 'cpu', 'requests', 'maxrss_kb') if name in result}
+    for stage, stats in result['stages'].items():
+        metrics[f'{stage}.wall'] = stats['wall']
+        metrics[f'{stage}.cpu'] = stats['cpu']
+    return metrics
+
+def print_result(pipeline, result):
+    print(f"\n⏱️ {pipeline}: wall {result['wall']:.2f}초 / CPU {result['cpu']:.2f}초 / "
+          f"요청 {result['requests']:.0f}회 {result['requests_by_group']}"
+          + (f" / 최대 RSS {result['maxrss_kb'] / 1024:.0f}MB" if 'maxrss_kb' in result else "")
+          + (f" / Python 할당 최대 {result['traced_peak_kb'] / 1024:.1f}MB" if 'traced_peak_kb' in result else ""))
+    if result.get('missing'):
+        print(f"  ⚠️ fixture 에 없는 요청 {result['missing']:.0f}회 (다시 녹화 필요)")
+    for stage, stats in result['stages'].items():
+        memory = f"  최대 {stats['peak_kb'] / 1024:7.1f}MB" if 'peak_kb' in stats else ""
+        print(f"  {stage:<10} wall {stats['wall']:7.3f}초  CPU {stats['cpu']:7.3f}초  "
+              f"호출 {stats['calls']:.0f}회{memory}")
+
+def compare(results, baseline, tolerance):
+    """기준값 대비 변화 출력 → 악화된 지표 목록"""
+    regressions = []
+    print(f"\n📐 기준값 비교 (허용 {tolerance * 100:.0f}%)")
+    for pipeline, result in results.items():
+        if pipeline not in baseline['results']:
+            print(f"  {pipeline}: 기준값 없음")
+            continue
+        base_metrics = _metrics(baseline['results'][pipeline])
+        for name, value in _metrics(result).items():
+            base = base_metrics.get(name)
+            if base is None:
+                continue
+            change = (value - base) / base if base else 0.0
+            # 요청 수는 재생이라 결정적이므로 조금만 늘어도 악화
+            limit = 0.0 if name == 'requests' else tolerance
+            # 짧은 단계는 측정 잡음이 커서 10ms 미만 차이는 무시
+            worse = change > limit and (name in ('requests', 'maxrss_kb') or value - base >= 0.01)
+            mark = "❌" if worse else "  "
+            print(f"  {mark} {pipeline:<9}{name:<16}{base:12.3f} → {value:12.3f} ({change * 100:+.1f}%)")
+            if worse:
+                regressions.append(f"{pipeline}.{name}")
+    return regressions
+
+def run(args):
+    if not os.path.exists(args.fixture):
+        print(f"❌ fixture 없음: {args.fixture} (먼저 'python benchmark.py record' 실행)")
+        return 2
+
+    fixture = load_fixture(args.fixture)
+    worker_args = ['--mode', 'replay', '--fixture', os.path.abspath(args.fixture),
+                   '--latency', str(args.latency), '--jitter', str(args.jitter)]
+    if args.trace_memory:
+        worker_args.append('--trace-memory')
+
+    # 재생에서도 요청 한도 대기는 그대로 적용되므로 측정 조건에 포함
+    requests_per_sec = args.requests_per_sec or float(os.environ.get('UPBIT_REQUESTS_PER_SEC', '10'))
+    env = {'UPBIT_REQUESTS_PER_SEC': str(requests_per_sec)}
+
+    results = {}
+    for pipeline in args.pipelines:
+        if pipeline not in fixture.get('pipelines', PIPELINES):
+            print(f"⚠️ {pipeline}: fixture 에 녹화되지 않은 파이프라인 (요청 누락 가능)")
+        runs = [spawn_worker(pipeline, worker_args, args.verbose, env) for _ in range(args.repeat)]
+        results[pipeline] = _median_result(runs)
+        print_result(pipeline, results[pipeline])
+
+    settings = {'latency': args.latency, 'jitter': args.jitter, 'repeat': args.repeat,
+                'requests_per_sec': requests_per_sec, 'trace_memory': args.trace_memory}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'created': datetime.now().isoformat(timespec='seconds'),
+                       'settings': settings, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 기준값 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ 기준값 없음: {args.baseline} (--save-baseline 으로 저장)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings:
+        print(f"⚠️ 기준값 측정 조건이 다름: {baseline.get('settings')} ≠ {settings}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ 성능 저하: {', '.join(regressions)}")
+        return 1
+    print("\n✅ 기준값 대비 저하 없음")
+    return 0
+
+# ============================================
+# 히스토리 로딩 메모리
+# ============================================
+
+# 히스토리를 저장하는 파이프라인
+HISTORY_PIPELINES = ['buy', 'realtime']
+
+def _traced(load):
+    """load() 결과와 Python 할당 (유지 KB, 최대 KB)"""
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = load()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current / 1024, peak / 1024
+
+def history_memory(args):
+    """최근 N회 히스토리 로딩 메모리: JSON dict 그대로 vs 스냅샷 레코드 변환 (현재 폴더 기준)"""
+    sys.path.insert(0, REPO_DIR)
+    from history_log import HistoryLog
+
+    for pipeline in args.pipelines:
+        scanner = importlib.import_module(PIPELINES[pipeline][0])
+        log = HistoryLog(scanner.HISTORY_DIR)
+        if not len(log):
+            print(f"ℹ️ {pipeline}: 히스토리 없음 ({scanner.HISTORY_DIR})")
+            continue
+
+        scans, dict_kb, dict_peak_kb = _traced(lambda: list(log.read_latest(args.scans)))
+        count, coins = len(scans), sum(len(scan['data']) for scan in scans)
+        del scans
+        _, record_kb, record_peak_kb = _traced(lambda: scanner.load_recent_history(args.scans))
+
+        print(f"🧠 {pipeline}: 스캔 {count}회 / 코인 {coins}개")
+        print(f"  dict    유지 {dict_kb / 1024:7.1f}MB  최대 {dict_peak_kb / 1024:7.1f}MB")
+        print(f"  레코드  유지 {record_kb / 1024:7.1f}MB  최대 {record_peak_kb / 1024:7.1f}MB  "
+              f"(유지 ×{dict_kb / max(record_kb, 1e-9):.2f}, 최대 ×{dict_peak_kb / max(record_peak_kb, 1e-9):.2f} 감소)")
+    return 0
+
+# ============================================
+# CLI
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 재생 벤치마크")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(command):
+        command.add_argument('--fixture', default=DEFAULT_FIXTURE, help="녹화 파일 (gzip JSON)")
+        command.add_argument('--pipelines', nargs='+', choices=list(PIPELINES), default=list(PIPELINES))
+        command.add_argument('--verbose', action='store_true', help="스캐너 출력 표시")
+
+    record_parser = commands.add_parser('record', help="실제 업비트 응답 녹화")
+    add_common(record_parser)
+
+    run_parser = commands.add_parser('run', help="녹화 재생 측정 + 기준값 비교")
+    add_common(run_parser)
+    run_parser.add_argument('--latency', type=float, default=0.03, help="요청당 가상 지연 (초)")
+    run_parser.add_argument('--jitter', type=float, default=0.0, help="요청당 추가 지연 상한 (초, 균등 분포)")
+    run_parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (중앙값 사용)")
+    run_parser.add_argument('--requests-per-sec', type=float,
+                            help="요청 그룹별 초당 한도 (기본 UPBIT_REQUESTS_PER_SEC 또는 10)")
+    run_parser.add_argument('--trace-memory', action='store_true',
+                            help="tracemalloc 으로 단계별 Python 할당 최대치 측정 (실행이 느려짐)")
+    run_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    run_parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+    run_parser.add_argument('--tolerance', type=float, default=0.2, help="시간/메모리 허용 증가율")
+
+    history_parser = commands.add_parser('history', help="히스토리 로딩 메모리 측정 (dict vs 레코드)")
+    history_parser.add_argument('--pipelines', nargs='+', choices=HISTORY_PIPELINES, default=HISTORY_PIPELINES)
+    history_parser.add_argument('--scans', type=int, default=100, help="최근 N회 (기본 100)")
+
+    worker_parser = commands.add_parser('_worker')
+    worker_parser.add_argument('--pipeline', choices=list(PIPELINES), required=True)
+    worker_parser.add_argument('--mode', choices=['record', 'replay'], required=True)
+    worker_parser.add_argument('--fixture')
+    worker_parser.add_argument('--output')
+    worker_parser.add_argument('--now-ms', type=int)
+    worker_parser.add_argument('--latency', type=float, default=0.0)
+    worker_parser.add_argument('--jitter', type=float, default=0.0)
+    worker_parser.add_argument('--trace-memory', action='store_true')
+
+    args = parser.parse_args(argv)
+    if args.command == '_worker':
+        return run_worker(args)
+    if args.command == 'record':
+        return record(args)
+    if args.command == 'history':
+        return history_memory(args)
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
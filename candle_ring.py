@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+캔들 링 버퍼
+- (코인, 봉) 단위로 고정 크기 float64 배열을 미리 할당
+- 새 캔들 추가 / 진행 중인 캔들 덮어쓰기 O(1)
+- 최근 N봉을 복사 없는 연속 NumPy 뷰로 제공 (피처 계산 입력)
+- 메모리 사용량 = 마켓 수 × 봉 종류 × capacity 로 고정
+"""
+
+import pandas as pd
+import numpy as np
+
+RING_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'value']
+OHLCV_FIELDS = RING_FIELDS[:5]
+
+class CandleRing:
+    """고정 크기 캔들 링 버퍼
+
+    각 행을 slot 과 slot + capacity 두 곳에 기록해 두면 최근 N봉이 항상
+    배열의 연속 구간이 되므로 슬라이스 뷰로 바로 꺼낼 수 있다.
+    반환된 뷰는 다음 갱신 전까지만 유효하다.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity, dtype='datetime64[ns]')
+        self.values = np.zeros((2 * capacity, len(RING_FIELDS)))
+        self.head = 0
+        self.size = 0
+
+    @classmethod
+    def from_frame(cls, df, capacity):
+        """캔들 DataFrame 으로 채운 링 (capacity 초과분은 오래된 것부터 버림)"""
+        ring = cls(capacity)
+        ring.extend(df.index.values, df.reindex(columns=RING_FIELDS).to_numpy(dtype=np.float64))
+        return ring
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def __len__(self):
+        return self.size
+
+    # ---------- 쓰기 ----------
+
+    def _write(self, slot, time, row):
+        self.times[slot] = time
+        self.times[slot + self.capacity] = time
+        self.values[slot] = row
+        self.values[slot + self.capacity] = row
+
+    def _slot(self, offset):
+        """끝에서 offset 번째(0 = 마지막) 캔들 위치"""
+        return (self.head - 1 - offset) % self.capacity
+
+    def append(self, time, row):
+        """새 캔들 추가 (가득 차면 가장 오래된 캔들 덮어씀)"""
+        self._write(self.head, time, row)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def set_row(self, offset, row):
+        """끝에서 offset 번째 캔들 값 교체 (시각 유지)"""
+        slot = self._slot(offset)
+        self._write(slot, self.times[slot], row)
+
+    def push(self, time, row):
+        """캔들 1개 반영 (같은 시각이면 진행 중인 캔들 갱신, 더 이전 시각은 무시)"""
+        time = np.datetime64(time, 'ns')
+        if self.size:
+            last = self.last_time()
+            if time == last:
+                self.set_row(0, row)
+                return True
+            if time < last:
+                return False
+        self.append(time, row)
+        return True
+
+    def extend(self, times, values):
+        """여러 캔들 반영 (오래된 순)"""
+        times = np.asarray(times).astype('datetime64[ns]')
+        for time, row in zip(times, values):
+            self.push(time, row)
+
+    # ---------- 읽기 ----------
+
+    def last_time(self):
+        return self.times[self._slot(0)] if self.size else None
+
+    def first_time(self):
+        return self.times[self._slot(self.size - 1)] if self.size else None
+
+    def find(self, time):
+        """시각이 일치하는 캔들의 끝에서부터 offset (없으면 None)"""
+        matches = np.flatnonzero(self.time_view() == np.datetime64(time, 'ns'))
+        if len(matches) == 0:
+            return None
+        return self.size - 1 - int(matches[-1])
+
+    def row(self, offset=0):
+        return self.values[self._slot(offset)].copy()
+
+    def _window(self, count):
+        count = self.size if count is None else min(count, self.size)
+        end = self.head + self.capacity
+        return end - count, end
+
+    def time_view(self, count=None):
+        """최근 count봉 시각 (복사 없는 뷰)"""
+        start, end = self._window(count)
+        return self.times[start:end]
+
+    def view(self, count=None):
+        """최근 count봉 (open, high, low, close, volume, value) 뷰"""
+        start, end = self._window(count)
+        return self.values[start:end]
+
+    def ohlcv(self, count=None):
+        """최근 count봉 OHLCV 뷰 (surge_features 입력 형식)"""
+        return self.view(count)[:, :len(OHLCV_FIELDS)]
+
+    def frame(self, count=None):
+        """최근 count봉 DataFrame (DataFrame 이 필요한 기존 분석용, 복사본)"""
+        return pd.DataFrame(self.view(count).copy(), columns=RING_FIELDS,
+                            index=pd.DatetimeIndex(self.time_view(count).copy()))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+캔들 로컬 저장소 (증분 갱신)
+- (코인, 봉) 단위 컬럼형 바이너리(.npz) 저장
+- 저장된 마지막 캔들 이후분만 업비트에서 받아 병합
+- 상주 실행 시 최근 캔들을 링 버퍼로 메모리에 유지 (디스크 재읽기, DataFrame 생성 생략)
+"""
+
+import pandas as pd
+import numpy as np
+import pytz
+from datetime import datetime, timedelta
+import os
+from candle_ring import CandleRing, RING_FIELDS, OHLCV_FIELDS
+
+KST = pytz.timezone('Asia/Seoul')
+
+# ============================================
+# 환경변수 설정
+# ============================================
+CANDLE_STORE_DIR = os.environ.get('CANDLE_STORE_DIR', 'market_data/candles')
+CANDLE_STORE_CAPACITY = int(os.environ.get('CANDLE_STORE_CAPACITY', '200'))
+
+COLUMNS = RING_FIELDS
+
+# 업비트 캔들 인덱스는 KST, 요청 파라미터 to 는 UTC 기준
+UTC_OFFSET = timedelta(hours=9)
+
+def interval_delta(interval):
+    """봉 간격 (저장 대상이 아니면 None)"""
+    if interval.startswith('minute'):
+        return timedelta(minutes=int(interval[len('minute'):]))
+    if interval == 'day':
+        return timedelta(days=1)
+    if interval == 'week':
+        return timedelta(weeks=1)
+    return None
+
+def _kst_now():
+    return datetime.now(KST).replace(tzinfo=None)
+
+# ============================================
+# 저장소
+# ============================================
+
+class CandleStore:
+    """(코인, 봉) 단위 증분 캔들 저장소 (메모리는 고정 크기 링 버퍼)"""
+
+    def __init__(self, fetch, root=CANDLE_STORE_DIR, capacity=CANDLE_STORE_CAPACITY):
+        self.fetch = fetch
+        self.root = root
+        self.capacity = capacity
+        self.memory = {}
+
+    def path(self, coin, interval):
+        return os.path.join(self.root, interval, f'{coin}.npz')
+
+    def load(self, coin, interval):
+        """저장된 캔들 읽기 (링 버퍼, 과거 데이터 소진 여부)"""
+        if (coin, interval) in self.memory:
+            return self.memory[(coin, interval)]
+
+        path = self.path(coin, interval)
+        if not os.path.exists(path):
+            return None, False
+        try:
+            with np.load(path) as data:
+                ring = CandleRing(self.capacity)
+                ring.extend(data['time'], np.column_stack([data[col] for col in COLUMNS]))
+                return ring, bool(data['exhausted'])
+        except Exception as e:
+            print(f"⚠️ 캔들 저장소 읽기 실패 ({coin} {interval}): {e}")
+            return None, False
+
+    def save(self, coin, interval, ring, exhausted=False):
+        """캔들 저장 (임시 파일 작성 후 교체)"""
+        path = self.path(coin, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{id(ring)}.tmp'
+
+        values = ring.view()
+        columns = {col: values[:, i] for i, col in enumerate(COLUMNS)}
+        columns['time'] = ring.time_view()
+        columns['exhausted'] = np.array(exhausted)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+
+    def get_ring(self, coin, interval="day", count=200):
+        """최근 count개 이상을 담은 링 버퍼 (저장분 + 신규분 병합)"""
+        step = interval_delta(interval)
+
+        ring, exhausted = self.load(coin, interval)
+
+        if ring is None or len(ring) == 0:
+            fresh = self.fetch(coin, interval=interval, count=count)
+            if fresh is None:
+                return None
+            ring = CandleRing.from_frame(fresh, self.capacity)
+            # 요청보다 적게 오면 상장 이후 전체 캔들을 받은 것
+            exhausted = len(fresh) < count
+        else:
+            # 마지막 저장 캔들은 미완성일 수 있으므로 다시 받는다
+            last = pd.Timestamp(ring.last_time()).to_pydatetime()
+            missing = int((_kst_now() - last) / step) + 1
+            if missing >= count:
+                fresh = self.fetch(coin, interval=interval, count=count)
+                if fresh is None:
+                    return None
+                ring = CandleRing.from_frame(fresh, self.capacity)
+                exhausted = len(fresh) < count
+            else:
+                fresh = self.fetch(coin, interval=interval, count=missing)
+                if fresh is None:
+                    return None
+                ring.extend(fresh.index.values, fresh.reindex(columns=COLUMNS).to_numpy(dtype=np.float64))
+
+        if len(ring) < count and not exhausted:
+            # 저장분이 부족하면 가장 오래된 캔들 이전 구간을 채운다 (링 재구성)
+            needed = count - len(ring)
+            oldest_utc = pd.Timestamp(ring.first_time()).to_pydatetime() - UTC_OFFSET
+            older = self.fetch(coin, interval=interval, count=needed, to=oldest_utc)
+            exhausted = older is None or len(older) < needed
+            if older is not None:
+                ring = CandleRing.from_frame(_merge(older, ring.frame()), self.capacity)
+
+        self.memory[(coin, interval)] = (ring, exhausted)
+        try:
+            self.save(coin, interval, ring, exhausted)
+        except Exception as e:
+            print(f"⚠️ 캔들 저장소 쓰기 실패 ({coin} {interval}): {e}")
+
+        return ring
+
+    def stores(self, interval, count):
+        """저장소 경유 대상 여부 (지원하는 봉, capacity 이내)"""
+        return interval_delta(interval) is not None and count <= self.capacity
+
+    def get(self, coin, interval="day", count=200):
+        """최근 count개 캔들 DataFrame"""
+        if not self.stores(interval, count):
+            return self.fetch(coin, interval=interval, count=count)
+        ring = self.get_ring(coin, interval, count)
+        return None if ring is None else ring.frame(count)
+
+    def get_array(self, coin, interval="day", count=200):
+        """최근 count개 캔들 OHLCV 배열 (링 버퍼 뷰, DataFrame 생성 없음)"""
+        if not self.stores(interval, count):
+            return ohlcv_array(self.fetch(coin, interval=interval, count=count))
+        ring = self.get_ring(coin, interval, count)
+        return None if ring is None else ring.ohlcv(count)
+
+def ohlcv_array(df):
+    """캔들 DataFrame → OHLCV 배열"""
+    if df is None:
+        return None
+    return df[OHLCV_FIELDS].to_numpy(dtype=np.float64)
+
+def _merge(old, new):
+    merged = pd.concat([old[COLUMNS], new[COLUMNS]])
+    merged = merged[~merged.index.duplicated(keep='last')]
+    return merged.sort_index()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+통합 명령행 진입점
+- scan buy / scan realtime / scan unified : 스캐너 실행 (뒤 인자는 스캐너로 전달, 예: --daemon)
+- export excel [buy realtime] : 로컬 버퍼로 Excel 통합문서 다시 작성 (스캔 없음)
+- report buy|realtime [--at / --list] : 리포트 일별 보관 / 조회
+- stream / backtest / sweep / benchmark / shard / orderbook : 각 도구로 인자 전달
+- 하위 명령에 필요한 모듈만 실행 시점에 import → 모듈별 로딩 시간 출력 + 스캔 계측에 기록
+  (cron 실행마다 새 프로세스라 시작 지연이 매번 발생)
+"""
+
+import argparse
+import importlib
+import time
+import sys
+
+from scan_metrics import METRICS
+
+# 하위 명령 → 모듈
+SCANNERS = {
+    'buy': 'analyze_buy_signals',
+    'realtime': 'analyze_realtime_monitor',
+    'unified': 'analyze_unified'
+}
+TOOLS = {
+    'stream': 'stream_ingest',
+    'backtest': 'backtest',
+    'sweep': 'threshold_sweep',
+    'benchmark': 'benchmark',
+    'shard': 'scan_coordinator',
+    'orderbook': 'orderbook_sampler'
+}
+
+# 스캐너별 리포트 폴더 (analyze_*.ANALYSIS_DIR)
+REPORT_DIRS = {
+    'buy': 'analysis_reports/buy_reports',
+    'realtime': 'analysis_reports/realtime_reports'
+}
+
+# ============================================
+# 지연 로딩
+# ============================================
+
+def load(name):
+    """모듈 import + 소요 시간 출력/기록 (이미 로드된 모듈은 즉시 반환)"""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    seconds = time.perf_counter() - started
+    METRICS.observe_import(name, seconds)
+    print(f"⏱️ 모듈 로딩: {name} {seconds:.3f}초")
+    return module
+
+# ============================================
+# 하위 명령
+# ============================================
+
+def run_scan(args):
+    load(SCANNERS[args.target]).main(args.args)
+
+def run_report(args):
+    load('daily_archive').main([REPORT_DIRS[args.target], *args.args])
+
+def run_export(args):
+    excel_export = load('excel_export')
+    load('openpyxl')
+
+    for target in args.targets or list(excel_export.DATABASES):
+        if target not in excel_export.DATABASES:
+            print(f"❌ 알 수 없는 대상: {target} (선택: {', '.join(excel_export.DATABASES)})")
+            continue
+        try:
+            writer = excel_export.open_database(target)
+            rows = writer.rebuild()
+            print(f"✅ Excel 재작성: {writer.excel_file} ({rows}행)")
+        except Exception as e:
+            print(f"❌ Excel 재작성 실패 ({target}): {e}")
+
+# ============================================
+# 메인
+# ============================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="암호화폐 시장 분석 통합 명령")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = commands.add_parser('scan', help="스캐너 실행 (뒤 인자는 스캐너로 전달)")
+    scan_parser.add_argument('target', choices=list(SCANNERS))
+    scan_parser.add_argument('args', nargs=argparse.REMAINDER)
+    scan_parser.set_defaults(handler=run_scan)
+
+    export_parser = commands.add_parser('export', help="저장 데이터 내보내기")
+    export_parser.add_argument('format', choices=['excel'])
+    export_parser.add_argument('targets', nargs='*', metavar='{buy,realtime}',
+                               help="대상 스캐너 (생략 시 전체)")
+    export_parser.set_defaults(handler=run_export)
+
+    report_parser = commands.add_parser('report', help="리포트 보관 / 조회 (--at, --list)")
+    report_parser.add_argument('target', choices=list(REPORT_DIRS))
+    report_parser.add_argument('args', nargs=argparse.REMAINDER)
+    report_parser.set_defaults(handler=run_report)
+
+    # 도구 명령은 main() 에서 인자를 그대로 넘기므로 도움말 표시용
+    for name, module in TOOLS.items():
+        commands.add_parser(name, help=f"{module}.py 실행 (뒤 인자 전달)")
+
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # 도구 옵션(-h, --markets ...)을 여기서 해석하지 않도록 파싱 전에 전달
+    if argv and argv[0] in TOOLS:
+        load(TOOLS[argv[0]]).main(argv[1:])
+        return
+
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+리포트 / 스캔 히스토리 일별 압축 보관
+- 지난 날짜(KST)의 리포트를 날짜별 번들 1개로 묶고 개별 파일 삭제 (당일분만 개별 파일 유지)
+- 번들 = 항목별 gzip 멤버를 이어 붙인 파일, index.json 에 항목별 (offset, length) 기록
+- 리포트 1개 조회 시 번들 전체가 아니라 해당 멤버만 읽어서 압축 해제
+"""
+
+from datetime import datetime
+import argparse
+import bisect
+import pytz
+import gzip
+import json
+import os
+import re
+
+KST = pytz.timezone('Asia/Seoul')
+
+ARCHIVE_DIR_NAME = 'archive'
+INDEX_FILE = 'index.json'
+
+# buy_report_20251202_0333.md / realtime_report_20251202_0333.md
+REPORT_NAME = re.compile(r'_(\d{8}_\d{4})\.md$')
+REPORT_TIME_FORMAT = '%Y%m%d_%H%M'
+
+# ============================================
+# 일별 번들
+# ============================================
+
+class DailyArchive:
+    """날짜별 압축 번들 + 인덱스 (추가 전용)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._index = None
+
+    # ---------- index ----------
+
+    def _load_index(self):
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {'days': {}}
+        return self._index
+
+    def _save_index(self, index):
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def days(self):
+        return sorted(self._load_index()['days'])
+
+    def keys(self, day):
+        day_entry = self._load_index()['days'].get(day)
+        return sorted(day_entry['entries']) if day_entry else []
+
+    def __contains__(self, item):
+        day, key = item
+        return key in self._load_index()['days'].get(day, {}).get('entries', {})
+
+    # ---------- 쓰기 ----------
+
+    def add(self, day, items):
+        """(key, bytes) 목록을 day 번들 끝에 추가 (이미 있는 key 는 건너뜀)"""
+        os.makedirs(self.directory, exist_ok=True)
+        index = self._load_index()
+        day_entry = index['days'].setdefault(day, {'file': f'{day}.gz', 'bytes': 0, 'entries': {}})
+        entries = day_entry['entries']
+
+        added = 0
+        path = os.path.join(self.directory, day_entry['file'])
+        with open(path, 'ab') as f:
+            # 이전에 끊긴 쓰기가 남아 있으면 확정 길이까지 잘라낸다
+            if f.tell() != day_entry['bytes']:
+                f.truncate(day_entry['bytes'])
+                f.seek(day_entry['bytes'])
+            for key, data in items:
+                if key in entries:
+                    continue
+                # mtime 고정 → 같은 내용이면 같은 번들 (Git 에서 불필요한 변경 방지)
+                member = gzip.compress(data, mtime=0)
+                f.write(member)
+                entries[key] = [day_entry['bytes'], len(member)]
+                day_entry['bytes'] += len(member)
+                added += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._save_index(index)
+        return added
+
+    # ---------- 읽기 ----------
+
+    def read(self, day, key):
+        """항목 1개 (해당 gzip 멤버만 읽음, 없으면 None)"""
+        day_entry = self._load_index()['days'].get(day)
+        if not day_entry or key not in day_entry['entries']:
+            return None
+        offset, length = day_entry['entries'][key]
+        with open(os.path.join(self.directory, day_entry['file']), 'rb') as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(length))
+
+    def read_day(self, day):
+        """day 번들 전체를 (key, bytes) 로 순회 (기록 순서)"""
+        day_entry = self._load_index()['days'].get(day)
+        if not day_entry:
+            return
+        with open(os.path.join(self.directory, day_entry['file']), 'rb') as f:
+            data = f.read(day_entry['bytes'])
+        for key, (offset, length) in sorted(day_entry['entries'].items(), key=lambda item: item[1][0]):
+            yield key, gzip.decompress(data[offset:offset + length])
+
+# ============================================
+# 리포트 보관
+# ============================================
+
+def report_archive(report_dir):
+    return DailyArchive(os.path.join(report_dir, ARCHIVE_DIR_NAME))
+
+def report_time(name):
+    """리포트 파일명 → 생성 시각 (KST, 형식이 다르면 None)"""
+    match = REPORT_NAME.search(name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), REPORT_TIME_FORMAT)
+
+def _loose_reports(report_dir):
+    if not os.path.isdir(report_dir):
+        return []
+    return [name for name in os.listdir(report_dir) if report_time(name) is not None]
+
+def archive_reports(report_dir, today=None):
+    """지난 날짜 리포트를 일별 번들로 이동 → 이동한 리포트 수"""
+    today = today or datetime.now(KST).strftime('%Y%m%d')
+
+    by_day = {}
+    for name in _loose_reports(report_dir):
+        day = report_time(name).strftime('%Y%m%d')
+        if day < today:
+            by_day.setdefault(day, []).append(name)
+    if not by_day:
+        return 0
+
+    archive = report_archive(report_dir)
+    moved = 0
+    for day, names in sorted(by_day.items()):
+        items = []
+        for name in sorted(names):
+            with open(os.path.join(report_dir, name), 'rb') as f:
+                items.append((name, f.read()))
+        archive.add(day, items)
+        # 번들/인덱스 확정 후에만 개별 파일 삭제
+        for name in names:
+            os.remove(os.path.join(report_dir, name))
+        moved += len(names)
+
+    print(f"🗄️ 리포트 보관: {moved}개 → {len(by_day)}일 번들 ({report_dir})")
+    return moved
+
+def list_reports(report_dir):
+    """(생성 시각, 파일명, 번들 날짜 또는 None) 목록 (오래된 순)"""
+    reports = [(report_time(name), name, None) for name in _loose_reports(report_dir)]
+    archive = report_archive(report_dir)
+    for day in archive.days():
+        reports.extend((report_time(name), name, day) for name in archive.keys(day))
+    return sorted(reports)
+
+def _parse_time(when):
+    if isinstance(when, datetime):
+        return when.astimezone(KST).replace(tzinfo=None) if when.tzinfo else when
+    try:
+        return datetime.strptime(when, REPORT_TIME_FORMAT)
+    except ValueError:
+        return _parse_time(datetime.fromisoformat(when))
+
+def find_report(report_dir, when):
+    """when(KST) 시점 또는 그 직전의 리포트 (생성 시각, 파일명, 번들 날짜), 없으면 None"""
+    reports = list_reports(report_dir)
+    position = bisect.bisect_right([r[0] for r in reports], _parse_time(when))
+    return reports[position - 1] if position else None
+
+def read_report(report_dir, when):
+    """when(KST) 시점 또는 그 직전의 리포트 → (파일명, 내용), 없으면 None"""
+    found = find_report(report_dir, when)
+    if found is None:
+        return None
+    _, name, day = found
+    if day is None:
+        with open(os.path.join(report_dir, name), 'r', encoding='utf-8') as f:
+            return name, f.read()
+    return name, report_archive(report_dir).read(day, name).decode('utf-8')
+
+# ============================================
+# CLI
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="리포트 일별 보관 / 조회")
+    parser.add_argument('report_dir', help="리포트 폴더 (예: analysis_reports/buy_reports)")
+    parser.add_argument('--at', help="조회 시각 KST (YYYYmmdd_HHMM 또는 ISO 형식), 그 직전 리포트 출력")
+    parser.add_argument('--list', action='store_true', help="리포트 목록 출력")
+    args = parser.parse_args(argv)
+
+    if args.at:
+        found = read_report(args.report_dir, args.at)
+        if found is None:
+            print("ℹ️ 해당 시각 이전 리포트 없음")
+            return
+        print(found[1])
+    elif args.list:
+        for time, name, day in list_reports(args.report_dir):
+            print(f"{time:%Y-%m-%d %H:%M}  {name}  {'번들 ' + day if day else '파일'}")
+    else:
+        archive_reports(args.report_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel 데이터베이스 롤링 저장
+- 최근 N행을 로컬 버퍼(JSONL)에 보관
+- 기존 통합문서를 열지 않고 write-only 모드로 한 번에 새로 작성
+- openpyxl 은 통합문서를 읽고 쓸 때만 import (스캐너 시작 시간 단축)
+"""
+
+from collections import deque
+import json
+import os
+
+EXCEL_MAX_ROWS = int(os.environ.get('EXCEL_MAX_ROWS', '1000'))
+
+# 스캐너별 Excel 데이터베이스 (cli.py export excel 에서도 사용)
+DATABASES = {
+    'buy': {
+        'excel_file': 'buy_signals_database.xlsx',
+        'buffer_file': 'market_data/buy_signals/excel_rows.jsonl',
+        'title': "급등신호",
+        'headers': ['수집시간', '코인', '레벨', '점수', '현재가', '거래량배수',
+                    '5분변화%', '15분변화%', '연속양봉', '매수세%'],
+        'header_color': "FF6B6B"
+    },
+    'realtime': {
+        'excel_file': 'realtime_monitor_database.xlsx',
+        'buffer_file': 'market_data/realtime_monitor/excel_rows.jsonl',
+        'title': "실시간모니터링",
+        'headers': ['수집시간', '코인', '신호타입', '점수', '현재가', '5분봉거래량',
+                    '가격변화5분', '연속증가', '일봉거래량', 'RSI', '판단'],
+        'header_color': "366092"
+    }
+}
+
+def open_database(name):
+    """DATABASES 이름 → RollingExcelWriter"""
+    return RollingExcelWriter(**DATABASES[name])
+
+class RollingExcelWriter:
+    """최근 max_rows 행 롤링 Excel 작성기"""
+
+    def __init__(self, excel_file, buffer_file, title, headers, header_color, max_rows=EXCEL_MAX_ROWS):
+        self.excel_file = excel_file
+        self.buffer_file = buffer_file
+        self.title = title
+        self.headers = headers
+        self.header_color = header_color
+        self.max_rows = max_rows
+
+    def _load_rows(self):
+        """버퍼 행 읽기 (버퍼가 없으면 기존 통합문서에서 한 번 가져옴)"""
+        rows = deque(maxlen=self.max_rows)
+
+        if os.path.exists(self.buffer_file):
+            with open(self.buffer_file, 'r', encoding='utf-8') as f:
+                rows.extend(json.loads(line) for line in f if line.strip())
+        elif os.path.exists(self.excel_file):
+            from openpyxl import load_workbook
+            wb = load_workbook(self.excel_file, read_only=True)
+            try:
+                for row in wb.active.iter_rows(min_row=2, values_only=True):
+                    rows.append(list(row))
+            finally:
+                wb.close()
+
+        return rows
+
+    def _save_buffer(self, rows):
+        os.makedirs(os.path.dirname(self.buffer_file) or '.', exist_ok=True)
+        tmp_path = f'{self.buffer_file}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.buffer_file)
+
+    def _write_workbook(self, rows):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(self.title)
+
+        header = []
+        for name in self.headers:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color=self.header_color, end_color=self.header_color, fill_type="solid")
+            cell.alignment = Alignment(horizontal="center")
+            header.append(cell)
+        ws.append(header)
+
+        for row in rows:
+            ws.append(row)
+
+        tmp_path = f'{self.excel_file}.tmp'
+        wb.save(tmp_path)
+        os.replace(tmp_path, self.excel_file)
+
+    def append_rows(self, new_rows):
+        """새 행 추가 후 최근 max_rows 행으로 버퍼와 통합문서 갱신"""
+        rows = self._load_rows()
+        rows.extend(new_rows)
+        self._save_buffer(rows)
+        self._write_workbook(rows)
+        return len(rows)
+
+    def rebuild(self):
+        """버퍼만으로 통합문서 다시 작성 (스캔 없이 Excel 복구/재생성)"""
+        rows = self._load_rows()
+        self._write_workbook(rows)
+        return len(rows)
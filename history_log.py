@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스캔 히스토리 추가 전용 로그
+- 스캔 1회 = JSON 한 줄, 고정 크기 세그먼트로 회전 (선택적 gzip 압축)
+- 보관 개수는 오래된 세그먼트를 통째로 내보내 유지 (일별 압축 번들로 보관 또는 삭제)
+- manifest 에 세그먼트별 확정 길이를 원자적으로 기록 (중간에 끊긴 쓰기는 무시)
+"""
+
+from daily_archive import DailyArchive, ARCHIVE_DIR_NAME
+import gzip
+import json
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+HISTORY_RETENTION = int(os.environ.get('HISTORY_RETENTION', '100'))
+HISTORY_SEGMENT_SCANS = int(os.environ.get('HISTORY_SEGMENT_SCANS', '10'))
+HISTORY_COMPRESS = os.environ.get('HISTORY_COMPRESS', '1') == '1'
+# 보관 개수를 넘은 스캔을 삭제하지 않고 일별 번들(archive/)로 보관
+HISTORY_ARCHIVE = os.environ.get('HISTORY_ARCHIVE', '1') == '1'
+
+MANIFEST_FILE = 'manifest.json'
+
+# ============================================
+# 히스토리 로그
+# ============================================
+
+class HistoryLog:
+    """스캔 히스토리 세그먼트 로그"""
+
+    def __init__(self, directory, retention=HISTORY_RETENTION,
+                 segment_scans=HISTORY_SEGMENT_SCANS, compress=HISTORY_COMPRESS,
+                 archive=HISTORY_ARCHIVE):
+        self.directory = directory
+        self.retention = retention
+        self.segment_scans = segment_scans
+        self.compress = compress
+        self.archive = DailyArchive(os.path.join(directory, ARCHIVE_DIR_NAME)) if archive else None
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+
+    # ---------- manifest ----------
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'next_segment': 1, 'segments': []}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, segment['file'])
+
+    # ---------- 쓰기 ----------
+
+    def append(self, scan):
+        """스캔 1회 추가 (확정 후 manifest 갱신)"""
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self._load_manifest()
+        segments = manifest['segments']
+
+        if not segments or segments[-1]['scans'] >= self.segment_scans:
+            suffix = '.jsonl.gz' if self.compress else '.jsonl'
+            segments.append({
+                'file': f"segment_{manifest['next_segment']:06d}{suffix}",
+                'scans': 0,
+                'bytes': 0
+            })
+            manifest['next_segment'] += 1
+
+        segment = segments[-1]
+        line = (json.dumps(scan, ensure_ascii=False) + '\n').encode('utf-8')
+        if segment['file'].endswith('.gz'):
+            # gzip 멤버는 이어 붙여도 하나의 스트림으로 읽힌다
+            line = gzip.compress(line)
+
+        path = self._segment_path(segment)
+        with open(path, 'ab') as f:
+            # 이전에 끊긴 쓰기가 남아 있으면 확정 길이까지 잘라낸다
+            if f.tell() != segment['bytes']:
+                f.truncate(segment['bytes'])
+                f.seek(segment['bytes'])
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        segment['scans'] += 1
+        segment['bytes'] += len(line)
+
+        # 최신 retention 개를 유지할 수 있는 한도에서 오래된 세그먼트 삭제
+        dropped = []
+        while len(segments) > 1 and sum(s['scans'] for s in segments[1:]) >= self.retention:
+            dropped.append(segments.pop(0))
+
+        if self.archive is not None:
+            # manifest 갱신 전에 보관해야 중간에 끊겨도 스캔이 사라지지 않는다
+            for old in dropped:
+                self._archive_segment(old)
+
+        self._save_manifest(manifest)
+
+        for old in dropped:
+            try:
+                os.remove(self._segment_path(old))
+            except FileNotFoundError:
+                pass
+
+        return sum(s['scans'] for s in segments)
+
+    def _archive_segment(self, segment):
+        """세그먼트의 스캔을 scan_time 날짜별 번들에 추가 (key = scan_time)"""
+        if not os.path.exists(self._segment_path(segment)):
+            return
+        by_day = {}
+        for scan in self._read_segment(segment):
+            scan_time = scan.get('scan_time', '')
+            line = (json.dumps(scan, ensure_ascii=False) + '\n').encode('utf-8')
+            by_day.setdefault(scan_time[:10].replace('-', '') or 'unknown', []).append((scan_time, line))
+        for day, items in by_day.items():
+            self.archive.add(day, items)
+
+    # ---------- 읽기 ----------
+
+    def _read_segment(self, segment):
+        with open(self._segment_path(segment), 'rb') as f:
+            data = f.read(segment['bytes'])
+        if segment['file'].endswith('.gz'):
+            data = gzip.decompress(data)
+        for line in data.decode('utf-8').splitlines():
+            if line:
+                yield json.loads(line)
+
+    def read_latest(self, n=None):
+        """최근 n회 스캔을 오래된 순서로 순회 (필요한 세그먼트만 읽음)"""
+        segments = self._load_manifest()['segments']
+        if n is None:
+            n = sum(s['scans'] for s in segments)
+
+        needed = []
+        total = 0
+        for segment in reversed(segments):
+            if total >= n:
+                break
+            needed.insert(0, segment)
+            total += segment['scans']
+
+        skip = max(total - n, 0)
+        for segment in needed:
+            for scan in self._read_segment(segment):
+                if skip > 0:
+                    skip -= 1
+                    continue
+                yield scan
+
+    def read_archived(self, day):
+        """보관된 day(YYYYmmdd) 스캔 순회 (기록 순서)"""
+        archive = self.archive or DailyArchive(os.path.join(self.directory, ARCHIVE_DIR_NAME))
+        for _, line in archive.read_day(day):
+            yield json.loads(line)
+
+    def __len__(self):
+        return sum(s['scans'] for s in self._load_manifest()['segments'])
+
+    # ---------- 이전 형식 변환 ----------
+
+    def import_legacy(self, legacy_file):
+        """기존 단일 JSON 히스토리 파일을 로그로 옮긴 뒤 삭제"""
+        if not os.path.exists(legacy_file) or len(self) > 0:
+            return 0
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+        for scan in history[-self.retention:]:
+            self.append(scan)
+        os.remove(legacy_file)
+        print(f"ℹ️ 기존 히스토리 {len(history)}회 변환: {legacy_file}")
+        return len(history)
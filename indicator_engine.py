@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+증분 기술적 지표 엔진
+- 코인별 상태(Wilder 평활 RSI, EMA12/26/9, 이동 합/제곱합)를 유지
+- 확정 캔들 1개당 O(1) 갱신, 진행 중인 캔들은 상태 변경 없이 미리보기
+- 결과는 같은 캔들 창으로 계산한 ta 라이브러리(RSIIndicator, MACD, BollingerBands) 값과 일치
+  (RSI/MACD 는 창 첫 캔들부터의 점화식이라 창 시작이 밀리면 상태를 다시 계산)
+- 같은 점화식의 배열 버전 (봉마다 진행 중인 일봉 기준 지표, 백테스트용)
+"""
+
+from collections import deque
+import pandas as pd
+import numpy as np
+import threading
+import math
+
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_WINDOW, BB_DEV = 20, 2
+MA_SHORT, MA_LONG = 5, 20
+
+# 이동 합 누적 오차 보정 주기 (확정 캔들 수)
+RESYNC_INTERVAL = 1000
+
+# ============================================
+# 기본 연산 단위
+# ============================================
+
+class RollingWindow:
+    """고정 길이 이동 합/제곱합"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.pushes = 0
+
+    def push(self, value):
+        self.total, self.total_sq = self._sums_with(value)
+        self.values.append(value)
+        self.pushes += 1
+        if self.pushes % RESYNC_INTERVAL == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    def _sums_with(self, value):
+        total = self.total + value
+        total_sq = self.total_sq + value * value
+        if len(self.values) == self.size:
+            oldest = self.values[0]
+            total -= oldest
+            total_sq -= oldest * oldest
+        return total, total_sq
+
+    def stats_with(self, value):
+        """value 를 추가했다고 가정한 (평균, 모표준편차) - 창이 덜 찼으면 None"""
+        if len(self.values) + 1 < self.size:
+            return None, None
+        total, total_sq = self._sums_with(value)
+        mean = total / self.size
+        variance = max(total_sq / self.size - mean * mean, 0.0)
+        return mean, math.sqrt(variance)
+
+def _ema(previous, value, alpha):
+    # pandas ewm(adjust=False) 와 같은 형태로 계산해야 값이 일치한다
+    if previous is None:
+        return value
+    return (1 - alpha) * previous + alpha * value
+
+# ============================================
+# 코인별 지표 상태
+# ============================================
+
+class IndicatorState:
+    """코인별 지표 상태 (확정 캔들까지 반영)"""
+
+    def __init__(self, origin=None):
+        # 점화식을 시작한 첫 캔들 시각 (캔들 창 시작과 같아야 ta 값과 일치)
+        self.origin = origin
+        self.last_time = None
+        self.count = 0
+        self.last_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.closes_long = RollingWindow(max(BB_WINDOW, MA_LONG))
+        self.closes_short = RollingWindow(MA_SHORT)
+        self.volumes = RollingWindow(MA_LONG)
+
+    def _step(self, close):
+        """다음 캔들 반영 결과 계산 (상태 변경 없음)"""
+        count = self.count + 1
+        diff = 0.0 if self.last_close is None else close - self.last_close
+
+        alpha = 1 / RSI_WINDOW
+        avg_gain = (1 - alpha) * self.avg_gain + alpha * max(diff, 0.0)
+        avg_loss = (1 - alpha) * self.avg_loss + alpha * max(-diff, 0.0)
+
+        ema_fast = _ema(self.ema_fast, close, 2 / (MACD_FAST + 1))
+        ema_slow = _ema(self.ema_slow, close, 2 / (MACD_SLOW + 1))
+        macd = ema_fast - ema_slow if count >= MACD_SLOW else None
+        macd_signal = _ema(self.macd_signal, macd, 2 / (MACD_SIGNAL + 1)) if macd is not None else None
+
+        return {
+            'count': count,
+            'avg_gain': avg_gain,
+            'avg_loss': avg_loss,
+            'ema_fast': ema_fast,
+            'ema_slow': ema_slow,
+            'macd': macd,
+            'macd_signal': macd_signal
+        }
+
+    def commit(self, time, close, volume):
+        """확정 캔들 반영"""
+        step = self._step(close)
+        self.count = step['count']
+        self.avg_gain = step['avg_gain']
+        self.avg_loss = step['avg_loss']
+        self.ema_fast = step['ema_fast']
+        self.ema_slow = step['ema_slow']
+        self.macd_signal = step['macd_signal']
+        self.last_close = close
+        self.last_time = time
+        self.closes_long.push(close)
+        self.closes_short.push(close)
+        self.volumes.push(volume)
+
+    def peek(self, close, volume):
+        """진행 중인 캔들을 포함한 현재 지표값 (상태 변경 없음, 부족분은 NaN)"""
+        step = self._step(close)
+        count = step['count']
+        nan = float('nan')
+
+        if count < RSI_WINDOW:
+            rsi = nan
+        elif step['avg_loss'] == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + step['avg_gain'] / step['avg_loss'])
+
+        macd = step['macd'] if step['macd'] is not None else nan
+        macd_signal = step['macd_signal'] if count >= MACD_SLOW + MACD_SIGNAL - 1 else nan
+
+        bb_mid, bb_std = self.closes_long.stats_with(close)
+        ma_short, _ = self.closes_short.stats_with(close)
+        volume_ma, _ = self.volumes.stats_with(volume)
+
+        return {
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_diff': macd - macd_signal,
+            'bb_high': nan if bb_mid is None else bb_mid + BB_DEV * bb_std,
+            'bb_low': nan if bb_mid is None else bb_mid - BB_DEV * bb_std,
+            'ma_short': nan if ma_short is None else ma_short,
+            'ma_long': nan if bb_mid is None else bb_mid,
+            'volume_ma': nan if volume_ma is None else volume_ma,
+            'close': close,
+            'volume': volume
+        }
+
+# ============================================
+# 지표 엔진
+# ============================================
+
+class IndicatorEngine:
+    """(코인, 봉) 단위 지표 상태 보관 및 증분 갱신"""
+
+    def __init__(self):
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def update(self, coin, interval, df):
+        """캔들 DataFrame 의 신규 확정 캔들만 반영하고 마지막 캔들 기준 지표 반환
+
+        상주 실행 중 조회 창(최근 N봉)이 밀려 첫 캔들이 바뀌면 창 전체로 다시 계산한다.
+        더 긴 과거로 이어 가면 RSI/MACD 가 같은 창을 처음부터 계산한 값(단발 실행,
+        compute_indicators)과 달라지기 때문 (일봉은 하루 한 번 재계산, 그 사이는 증분)
+        """
+        key = (coin, interval)
+        with self.lock:
+            state = self.states.get(key)
+
+        index = df.index
+        start = None
+        if (state is not None and state.origin == index[0]
+                and state.last_time is not None and state.last_time in index):
+            start = index.get_loc(state.last_time) + 1
+        if start is None or start > len(df) - 1:
+            # 처음 보는 코인, 창 시작이 바뀌었거나 저장된 상태와 이어지지 않으면 전체 재계산
+            state = IndicatorState(index[0])
+            start = 0
+
+        closes = df['close'].to_numpy(dtype=float)
+        volumes = df['volume'].to_numpy(dtype=float)
+        for row in range(start, len(df) - 1):
+            state.commit(index[row], closes[row], volumes[row])
+
+        with self.lock:
+            self.states[key] = state
+
+        return state.peek(closes[-1], volumes[-1])
+
+    def reset(self):
+        with self.lock:
+            self.states.clear()
+
+INDICATOR_ENGINE = IndicatorEngine()
+
+# ============================================
+# 배열 버전 (백테스트)
+# ============================================
+
+def _ewm(values, alpha):
+    # _ema 와 같은 점화식 (첫 값에서 시작)
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _rolling_sum(values, window):
+    """values[i - window + 1 .. i] 합 (부족하면 NaN)"""
+    sums = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumsum = np.concatenate([[0.0], np.cumsum(values)])
+        sums[window - 1:] = cumsum[window:] - cumsum[:-window]
+    return sums
+
+def closed_states(closes, volumes):
+    """확정 캔들 배열 → 캔들마다 commit 후 상태 (IndicatorState 와 같은 점화식)"""
+    closes = np.asarray(closes, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    diff = np.diff(closes, prepend=closes[:1])
+
+    macd = np.full(len(closes), np.nan)
+    macd_signal = np.full(len(closes), np.nan)
+    ema_fast = _ewm(closes, 2 / (MACD_FAST + 1))
+    ema_slow = _ewm(closes, 2 / (MACD_SLOW + 1))
+    if len(closes) >= MACD_SLOW:
+        macd[MACD_SLOW - 1:] = (ema_fast - ema_slow)[MACD_SLOW - 1:]
+        macd_signal[MACD_SLOW - 1:] = _ewm(macd[MACD_SLOW - 1:], 2 / (MACD_SIGNAL + 1))
+
+    long_window = max(BB_WINDOW, MA_LONG)
+    return {
+        'close': closes,
+        'avg_gain': _ewm(np.maximum(diff, 0.0), 1 / RSI_WINDOW),
+        'avg_loss': _ewm(np.maximum(-diff, 0.0), 1 / RSI_WINDOW),
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'macd_signal': macd_signal,
+        # 다음 봉 미리보기용 직전 (창 크기 - 1)개 합
+        'close_sum_long': _rolling_sum(closes, long_window - 1),
+        'close_sq_sum_long': _rolling_sum(closes * closes, long_window - 1),
+        'close_sum_short': _rolling_sum(closes, MA_SHORT - 1),
+        'volume_sum': _rolling_sum(volumes, MA_LONG - 1)
+    }
+
+def peek_arrays(states, previous, close, volume):
+    """IndicatorState.peek 배열 버전
+
+    previous[i] = i번째 미리보기 직전까지 확정된 마지막 캔들 위치 (-1 이면 확정 캔들 없음)
+    close / volume = 진행 중인 캔들 값
+    """
+    previous = np.asarray(previous)
+    has_previous = previous >= 0
+    index = np.where(has_previous, previous, 0)
+
+    def state(name, empty):
+        return np.where(has_previous, states[name][index], empty)
+
+    count = previous + 2
+    diff = np.where(has_previous, close - states['close'][index], 0.0)
+
+    alpha = 1 / RSI_WINDOW
+    avg_gain = (1 - alpha) * state('avg_gain', 0.0) + alpha * np.maximum(diff, 0.0)
+    avg_loss = (1 - alpha) * state('avg_loss', 0.0) + alpha * np.maximum(-diff, 0.0)
+
+    fast_alpha = 2 / (MACD_FAST + 1)
+    slow_alpha = 2 / (MACD_SLOW + 1)
+    signal_alpha = 2 / (MACD_SIGNAL + 1)
+    ema_fast = np.where(has_previous, (1 - fast_alpha) * state('ema_fast', 0.0) + fast_alpha * close, close)
+    ema_slow = np.where(has_previous, (1 - slow_alpha) * state('ema_slow', 0.0) + slow_alpha * close, close)
+    macd = np.where(count >= MACD_SLOW, ema_fast - ema_slow, np.nan)
+    previous_signal = state('macd_signal', np.nan)
+    macd_signal = np.where(np.isnan(previous_signal), macd,
+                           (1 - signal_alpha) * previous_signal + signal_alpha * macd)
+    macd_signal = np.where(count >= MACD_SLOW + MACD_SIGNAL - 1, macd_signal, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    rsi = np.where(count < RSI_WINDOW, np.nan, rsi)
+
+    long_window = max(BB_WINDOW, MA_LONG)
+    bb_mid = (state('close_sum_long', np.nan) + close) / long_window
+    variance = np.maximum((state('close_sq_sum_long', np.nan) + close * close) / long_window - bb_mid * bb_mid, 0.0)
+    bb_std = np.sqrt(variance)
+
+    return {
+        'rsi': rsi,
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'macd_diff': macd - macd_signal,
+        'bb_high': bb_mid + BB_DEV * bb_std,
+        'bb_low': bb_mid - BB_DEV * bb_std,
+        'ma_short': (state('close_sum_short', np.nan) + close) / MA_SHORT,
+        'ma_long': bb_mid,
+        'volume_ma': (state('volume_sum', np.nan) + volume) / MA_LONG,
+        'close': close,
+        'volume': volume
+    }
+
+def compute_indicators(closes, volumes):
+    """상태 없이 전체 재계산 (마지막 캔들 = 진행 중) - 처음 보는 코인의 IndicatorEngine.update 와 같은 값"""
+    closes = np.asarray(closes, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    values = peek_arrays(closed_states(closes[:-1], volumes[:-1]), [len(closes) - 2], closes[-1:], volumes[-1:])
+    return {name: float(value[0]) for name, value in values.items()}
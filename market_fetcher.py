@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 시세 데이터 공용 수집 모듈
+- 급등 신호 / 실시간 모니터링 스크립트 공용
+- 호가창 일괄 조회 및 벡터화 집계
+- 공용 연결 풀 / 요청 한도(upbit_client) 기반 asyncio 동시 수집
+- 스캔 단위 캔들 캐시 (중복 요청 제거)
+- 로컬 캔들 저장소 경유 증분 조회
+- 피처 계산용 캔들은 링 버퍼 OHLCV 뷰로 제공 (get_candles)
+- 호가 샘플러(orderbook_sampler) 기록이 있으면 호가 변화 피처를 요약에 병합
+"""
+
+import numpy as np
+import asyncio
+import threading
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor
+from candle_store import CandleStore, ohlcv_array
+from orderbook_sampler import orderbook_dynamics
+from scan_metrics import METRICS
+from upbit_client import (
+    get_tickers as upbit_get_tickers, get_ohlcv as upbit_get_ohlcv,
+    get_orderbook as upbit_get_orderbook, get_ticker as upbit_get_ticker,
+    UpbitRequestError, REQUEST_STATS
+)
+
+# ============================================
+# 환경변수 설정
+# ============================================
+# 업비트 호가 API는 한 번에 여러 마켓을 받지만 URL 길이 제한이 있어 청크로 나눈다
+ORDERBOOK_CHUNK_SIZE = int(os.environ.get('ORDERBOOK_CHUNK_SIZE', '100'))
+TICKER_CHUNK_SIZE = int(os.environ.get('TICKER_CHUNK_SIZE', '150'))
+
+MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', '16'))
+
+CANDLE_STORE_ENABLED = os.environ.get('CANDLE_STORE_ENABLED', '1') == '1'
+
+# 마켓 목록 재조회 주기 (초) - 상주 실행 시 매 스캔마다 다시 받지 않는다
+TICKER_REFRESH_INTERVAL = int(os.environ.get('TICKER_REFRESH_INTERVAL', '600'))
+
+# 스캔 대상 기준 통화 (예: KRW,BTC,USDT)
+SCAN_FIATS = [fiat.strip() for fiat in os.environ.get('SCAN_FIATS', 'KRW').split(',') if fiat.strip()]
+
+# ============================================
+# 시세 조회 (공용 연결 풀 / 요청 한도 적용)
+# ============================================
+
+_ticker_cache = {}
+
+def get_tickers(fiat="KRW", max_age=TICKER_REFRESH_INTERVAL):
+    """마켓 목록 조회 (max_age 초 동안 재사용)"""
+    cached = _ticker_cache.get(fiat)
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return list(cached[1])
+
+    tickers = upbit_get_tickers(fiat=fiat)
+    if tickers:
+        _ticker_cache[fiat] = (time.monotonic(), tickers)
+    return tickers
+
+def get_markets(fiats=None):
+    """스캔 대상 마켓 목록 (SCAN_FIATS 기준 통화 순서대로 연결)"""
+    markets = []
+    for fiat in fiats or SCAN_FIATS:
+        markets.extend(get_tickers(fiat=fiat) or [])
+    return markets
+
+def format_price(coin, price):
+    """마켓 기준 통화 가격 표시 (KRW: 원 단위 정수, 그 외: 유효숫자 8자리 + 통화)"""
+    quote = coin.split('-', 1)[0]
+    if quote == 'KRW':
+        return f"{price:,.0f}원"
+    return f"{price:.8g} {quote}"
+
+def fetch_ohlcv(coin, interval="day", count=200, to=None):
+    """캔들 조회 (업비트 직접 요청, 재시도 후에도 실패하면 누락 코인으로 기록)"""
+    try:
+        return upbit_get_ohlcv(coin, interval=interval, count=count, to=to)
+    except UpbitRequestError as e:
+        REQUEST_STATS.drop([coin])
+        return None
+
+CANDLE_STORE = CandleStore(fetch_ohlcv) if CANDLE_STORE_ENABLED else None
+
+def load_ohlcv(coin, interval="day", count=200):
+    """캔들 조회 (로컬 저장소가 있으면 신규분만 요청)"""
+    if CANDLE_STORE is not None:
+        return CANDLE_STORE.get(coin, interval=interval, count=count)
+    return fetch_ohlcv(coin, interval=interval, count=count)
+
+def load_candles(coin, interval="day", count=200):
+    """캔들 OHLCV 배열 조회 (로컬 저장소가 있으면 링 버퍼 뷰)"""
+    if CANDLE_STORE is not None:
+        return CANDLE_STORE.get_array(coin, interval=interval, count=count)
+    return ohlcv_array(fetch_ohlcv(coin, interval=interval, count=count))
+
+def get_ohlcv(coin, interval="day", count=200):
+    """캔들 조회 (스캔 캐시가 열려 있으면 캐시 경유)"""
+    cache = _scan_cache
+    if cache is not None:
+        return cache.get(coin, interval, count)
+    return load_ohlcv(coin, interval=interval, count=count)
+
+def get_candles(coin, interval="day", count=200):
+    """캔들 OHLCV 배열 조회 - 피처 계산용 (스캔 캐시가 열려 있으면 캐시 경유)"""
+    cache = _scan_cache
+    if cache is not None:
+        return cache.get(coin, interval, count, as_array=True)
+    return load_candles(coin, interval=interval, count=count)
+
+# ============================================
+# 스캔 단위 캔들 캐시
+# ============================================
+
+class CandleCache:
+    """(코인, 봉) 단위 캔들 캐시 - 작은 count 요청은 큰 프레임을 잘라서 응답"""
+
+    def __init__(self, fetch=load_ohlcv, fetch_array=load_candles, min_counts=None):
+        self.fetch = fetch
+        self.fetch_array = fetch_array
+        self.min_counts = dict(min_counts or {})
+        self.frames = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def get(self, coin, interval="day", count=200, as_array=False):
+        """캔들 조회 (동일 키 동시 요청은 하나로 병합, as_array 면 OHLCV 배열)"""
+        key = (coin, interval, as_array)
+
+        while True:
+            with self.lock:
+                cached = self.frames.get(key)
+                if cached is not None and cached[0] >= count:
+                    self.stats['hits'] += 1
+                    return _tail(cached[1], count)
+
+                pending = self.pending.get(key)
+                if pending is None:
+                    fetch_count = max(count, self.min_counts.get(interval, 0))
+                    done = threading.Event()
+                    self.pending[key] = (fetch_count, done)
+                    self.stats['misses'] += 1
+                    break
+
+                self.stats['coalesced'] += 1
+            # 같은 키를 받는 중이면 끝날 때까지 기다린 뒤 다시 확인
+            pending[1].wait()
+
+        df = None
+        try:
+            fetch = self.fetch_array if as_array else self.fetch
+            df = fetch(coin, interval=interval, count=fetch_count)
+        finally:
+            with self.lock:
+                # 실패(None)도 기록해 같은 스캔에서 재요청하지 않는다
+                self.frames[key] = (fetch_count, df)
+                del self.pending[key]
+            done.set()
+
+        return _tail(df, count)
+
+    def summary(self):
+        """캐시 적중 통계 문자열"""
+        return (f"적중 {self.stats['hits']} / 요청 {self.stats['misses']} / "
+                f"병합 {self.stats['coalesced']}")
+
+def _tail(data, count):
+    if data is None:
+        return None
+    if isinstance(data, np.ndarray):
+        return data[-count:]
+    return data.iloc[-count:]
+
+_scan_cache = None
+
+def begin_candle_cache(min_counts=None):
+    """스캔 시작 - 캔들 캐시 생성 (min_counts: 봉별 최소 조회 개수)"""
+    global _scan_cache
+    _scan_cache = CandleCache(min_counts=min_counts)
+    return _scan_cache
+
+def end_candle_cache():
+    """스캔 종료 - 캐시/요청 통계 출력 후 해제 (요청 통계는 다음 스캔을 위해 초기화)"""
+    global _scan_cache
+    cache, _scan_cache = _scan_cache, None
+    if cache is not None:
+        print(f"📦 캔들 캐시: {cache.summary()}")
+    print(f"🌐 업비트 요청: {REQUEST_STATS.summary()}")
+    if REQUEST_STATS.dropped:
+        print(f"⚠️ 누락 코인: {', '.join(sorted(REQUEST_STATS.dropped)[:10])}")
+    REQUEST_STATS.reset()
+    return cache
+
+# ============================================
+# 호가창 일괄 수집
+# ============================================
+
+def fetch_orderbooks(tickers, chunk_size=ORDERBOOK_CHUNK_SIZE):
+    """전체 마켓 호가창 일괄 조회 (코인별 orderbook_units 반환)"""
+    orderbooks = {}
+    tickers = list(tickers)
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        try:
+            result = upbit_get_orderbook(chunk)
+        except Exception as e:
+            REQUEST_STATS.drop(chunk)
+            print(f"⚠️ 호가창 조회 실패 ({chunk[0]} 외 {len(chunk) - 1}개): {e}")
+            continue
+
+        if not isinstance(result, list):
+            continue
+
+        for ob in result:
+            if isinstance(ob, dict) and 'market' in ob and 'orderbook_units' in ob:
+                orderbooks[ob['market']] = ob['orderbook_units']
+
+    return orderbooks
+
+def summarize_orderbooks(orderbooks, top_n=3):
+    """호가창 매수/매도 잔량 집계 (전체 코인 한 번에 계산)"""
+    coins = list(orderbooks.keys())
+    if not coins:
+        return {}
+
+    depth = max([len(units) for units in orderbooks.values()] + [1])
+    bids = np.zeros((len(coins), depth))
+    asks = np.zeros((len(coins), depth))
+
+    for row, coin in enumerate(coins):
+        units = orderbooks[coin]
+        bids[row, :len(units)] = [u.get('bid_size', 0) for u in units]
+        asks[row, :len(units)] = [u.get('ask_size', 0) for u in units]
+
+    total_bid = bids.sum(axis=1)
+    total_ask = asks.sum(axis=1)
+    top_bid = bids[:, 0]
+    top_ask = asks[:, 0]
+    topn_bid = bids[:, :top_n].sum(axis=1)
+    topn_ask = asks[:, :top_n].sum(axis=1)
+
+    total = total_bid + total_ask
+    bid_ask_ratio = np.divide(total_bid, total_ask, out=np.zeros_like(total_bid), where=total_ask > 0)
+    topn_ratio = np.divide(topn_bid, topn_ask, out=np.zeros_like(topn_bid), where=topn_ask > 0)
+    imbalance = np.divide(total_bid - total_ask, total, out=np.zeros_like(total), where=total > 0)
+
+    return {
+        coin: {
+            'total_bid': float(total_bid[row]),
+            'total_ask': float(total_ask[row]),
+            'top_bid': float(top_bid[row]),
+            'top_ask': float(top_ask[row]),
+            'top3_bid': float(topn_bid[row]),
+            'top3_ask': float(topn_ask[row]),
+            'bid_ask_ratio': float(bid_ask_ratio[row]),
+            'top3_ratio': float(topn_ratio[row]),
+            'imbalance': float(imbalance[row])
+        }
+        for row, coin in enumerate(coins)
+    }
+
+def collect_orderbook_summaries(tickers):
+    """전체 마켓 호가창 조회 + 집계 (+ 샘플러 기록 기반 호가 변화 피처)"""
+    summaries = summarize_orderbooks(fetch_orderbooks(tickers))
+    dynamics = orderbook_dynamics(summaries)
+    for coin, features in dynamics.items():
+        summaries[coin].update(features)
+    return summaries
+
+# ============================================
+# 현재가 일괄 조회 (사전 선별용)
+# ============================================
+
+def fetch_ticker_snapshots(tickers, chunk_size=TICKER_CHUNK_SIZE):
+    """전체 마켓 현재가/24시간 거래 정보 일괄 조회 ({마켓: ticker})"""
+    snapshots = {}
+    tickers = list(tickers)
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        try:
+            result = upbit_get_ticker(chunk)
+        except Exception as e:
+            print(f"⚠️ 현재가 조회 실패 ({chunk[0]} 외 {len(chunk) - 1}개): {e}")
+            continue
+
+        for item in result if isinstance(result, list) else []:
+            if isinstance(item, dict) and 'market' in item:
+                snapshots[item['market']] = item
+
+    return snapshots
+
+# ============================================
+# 동시 수집
+# ============================================
+
+def fetch_concurrently(tickers, fetch, max_in_flight=MAX_IN_FLIGHT):
+    """코인별 조회 동시 실행 ({코인: 결과}, 티커 순서 유지, 실패 코인 제외)"""
+    tickers = list(tickers)
+    results = asyncio.run(_run_concurrently(tickers, fetch, max_in_flight))
+    return {coin: result for coin, result in zip(tickers, results) if result is not None}
+
+def collect_concurrently(tickers, analyze, max_in_flight=MAX_IN_FLIGHT):
+    """코인별 분석 동시 실행 (결과 리스트, 티커 순서 유지, 실패 코인 제외)"""
+    return list(fetch_concurrently(tickers, analyze, max_in_flight).values())
+
+async def _run_concurrently(tickers, fetch, max_in_flight):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        async def run(coin):
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(executor, _timed, fetch, coin)
+                except Exception as e:
+                    return None
+
+        return await asyncio.gather(*[run(coin) for coin in tickers])
+
+def _timed(fetch, coin):
+    """코인별 처리 시간 계측 (가장 느린 코인 집계용)"""
+    started = time.perf_counter()
+    try:
+        return fetch(coin)
+    finally:
+        METRICS.observe_coin(coin, time.perf_counter() - started)
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+호가창 고빈도 샘플러 (메모리 맵 저장소)
+- 마켓별 상위 N호가(매수/매도 가격·잔량)를 설정 주기로 기록
+- 필드별 float32 메모리 맵 파일 (마켓 × 시간 × 호가 단계), 시간 축은 고정 길이 링 버퍼
+- 스캐너는 최근 구간을 읽기 전용으로 열어 호가 불균형 변화 / 호가벽 유지·철수 피처를 벡터화 계산
+  → 스캔 1회의 단일 스냅샷으로는 보이지 않는 호가벽 등장/철수를 점수 규칙에 반영
+- 샘플러가 돌고 있지 않거나 데이터가 오래되면 피처는 None (해당 규칙 점수 없음)
+"""
+
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+ORDERBOOK_SAMPLER_DIR = os.environ.get('ORDERBOOK_SAMPLER_DIR', 'market_data/orderbook')
+# 샘플링 주기(초)
+ORDERBOOK_SAMPLE_INTERVAL = float(os.environ.get('ORDERBOOK_SAMPLE_INTERVAL', '5'))
+# 기록할 호가 단계 수 (상위 N호가)
+ORDERBOOK_SAMPLE_LEVELS = int(os.environ.get('ORDERBOOK_SAMPLE_LEVELS', '15'))
+# 시간 축 링 버퍼 길이 (기본 720 × 5초 = 1시간)
+ORDERBOOK_SAMPLE_SLOTS = int(os.environ.get('ORDERBOOK_SAMPLE_SLOTS', '720'))
+# 마켓 축 크기 (0 이면 저장소 생성 시 대상 마켓 수 + 25% 여유, 부족해지면 늘려서 다시 생성)
+ORDERBOOK_MARKET_CAPACITY = int(os.environ.get('ORDERBOOK_MARKET_CAPACITY', '0'))
+# 피처 계산 구간(초)
+ORDERBOOK_WINDOW_SEC = float(os.environ.get('ORDERBOOK_WINDOW_SEC', '300'))
+# 마지막 샘플이 이보다 오래되면 피처 계산 안 함(초)
+ORDERBOOK_STALE_SEC = float(os.environ.get('ORDERBOOK_STALE_SEC', '60'))
+# 호가벽 기준: 단계 잔량 ≥ 같은 스냅샷 단계 잔량 중앙값 × N
+ORDERBOOK_WALL_RATIO = float(os.environ.get('ORDERBOOK_WALL_RATIO', '3.0'))
+# 같은 가격에 벽 잔량의 이 비율 이상이 남아 있으면 유지로 판정
+ORDERBOOK_WALL_KEEP = float(os.environ.get('ORDERBOOK_WALL_KEEP', '0.5'))
+
+# 메모리 맵 파일 (각 마켓 × 시간 × 호가 단계, float32)
+FIELDS = ('bid_price', 'bid_size', 'ask_price', 'ask_size')
+META_FILE = 'meta.json'
+TIMES_FILE = 'times.npy'
+
+# 스캐너 호가 요약에 추가되는 피처
+DYNAMICS_FIELDS = ('imbalance_delta', 'bid_wall_persistence', 'ask_wall_persistence',
+                   'bid_wall_pulled', 'ask_wall_pulled')
+
+# ============================================
+# 저장소
+# ============================================
+
+def market_capacity(count):
+    """마켓 축 크기 (대상 마켓 수 + 25% 여유, 신규 상장 대비)"""
+    return max(count + count // 4, 16)
+
+class OrderbookStore:
+    """호가 샘플 메모리 맵 저장소
+
+    - 필드별 .npy 메모리 맵 (capacity × slots × levels, float32, 빈 칸 NaN)
+    - times.npy: 슬롯별 샘플 시각 (float64 epoch 초, 기록 중이거나 빈 슬롯은 NaN)
+    - meta.json: 마켓 → 행 번호, 크기 설정 (새 마켓이 생길 때만 다시 씀)
+
+    쓰기는 샘플러 프로세스 하나만 한다. 슬롯을 덮어쓰기 전에 시각을 NaN 으로 지우고
+    데이터를 모두 쓴 뒤 시각을 기록하므로, 읽는 쪽은 시각이 있는 슬롯만 사용한다.
+    저장소를 새로 만들 때는 임시 파일을 다 쓴 뒤 교체(배열 → 메타 순)하므로
+    이미 열어 둔 메모리 맵은 기존 파일을 그대로 읽는다.
+    """
+
+    def __init__(self, root, meta, arrays, times):
+        self.root = root
+        self.rows = meta['markets']
+        self.levels = meta['levels']
+        self.slots = meta['slots']
+        self.capacity = meta['capacity']
+        self.arrays = arrays
+        self.times = times
+        # 용량 초과로 제외한 마켓 (경고는 마켓당 한 번)
+        self.dropped = set()
+
+    @classmethod
+    def create(cls, root, levels, slots, capacity, source=None):
+        """새 저장소 (기존 파일 교체, source 저장소가 있으면 같은 크기 설정일 때 기록 복사)"""
+        os.makedirs(root, exist_ok=True)
+        keep = (source is not None and (source.levels, source.slots) == (levels, slots)
+                and len(source.rows) <= capacity)
+        rows = dict(source.rows) if keep else {}
+
+        def build(name, dtype, shape, previous):
+            temp_path = os.path.join(root, name + '.tmp')
+            array = np.lib.format.open_memmap(temp_path, mode='w+', dtype=dtype, shape=shape)
+            array[:] = np.nan
+            if keep:
+                array[:len(previous)] = previous[:shape[0]]
+            array.flush()
+            return temp_path
+
+        temp_paths = {field: build(f'{field}.npy', np.float32, (capacity, slots, levels),
+                                   source.arrays[field] if keep else None)
+                      for field in FIELDS}
+        temp_paths['times'] = build(TIMES_FILE, np.float64, (slots,), source.times if keep else None)
+        for field in FIELDS:
+            os.replace(temp_paths[field], os.path.join(root, f'{field}.npy'))
+        os.replace(temp_paths['times'], os.path.join(root, TIMES_FILE))
+
+        store = cls(root, {'levels': levels, 'slots': slots, 'capacity': capacity, 'markets': rows}, {}, None)
+        store.flush_meta()
+        return cls.open(root, writable=True)
+
+    @classmethod
+    def open(cls, root=ORDERBOOK_SAMPLER_DIR, writable=False):
+        """기존 저장소 열기 (없으면 None)"""
+        meta_path = os.path.join(root, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        mode = 'r+' if writable else 'r'
+        arrays = {field: np.load(os.path.join(root, f'{field}.npy'), mmap_mode=mode) for field in FIELDS}
+        times = np.load(os.path.join(root, TIMES_FILE), mmap_mode=mode)
+        return cls(root, meta, arrays, times)
+
+    @classmethod
+    def open_or_create(cls, markets, root=ORDERBOOK_SAMPLER_DIR, levels=ORDERBOOK_SAMPLE_LEVELS,
+                       slots=ORDERBOOK_SAMPLE_SLOTS, capacity=ORDERBOOK_MARKET_CAPACITY):
+        """쓰기용 열기 (크기 설정이 바뀌었거나 대상 마켓을 다 담지 못하면 새로 생성)"""
+        store = cls.open(root, writable=True)
+        needed = len(set(markets) | (store.rows.keys() if store is not None else set()))
+        if store is not None and (store.levels, store.slots) == (levels, slots):
+            if (store.capacity == capacity if capacity else store.capacity >= needed):
+                return store
+        capacity = capacity or market_capacity(needed)
+        if store is not None:
+            print(f"⚠️ 호가 저장소 크기 설정 변경 → 새로 생성: {root} (마켓 {capacity}개)")
+        return cls.create(root, levels, slots, capacity, source=store)
+
+    def grow(self, markets):
+        """마켓 축을 대상 마켓 수에 맞게 늘린 저장소 (기존 기록 유지)"""
+        capacity = market_capacity(len(set(markets) | self.rows.keys()))
+        print(f"📒 호가 저장소 마켓 용량 확장: {self.capacity} → {capacity}개")
+        return OrderbookStore.create(self.root, self.levels, self.slots, capacity, source=self)
+
+    def flush(self):
+        """메모리 맵 + 메타 기록"""
+        for array in self.arrays.values():
+            array.flush()
+        self.times.flush()
+        self.flush_meta()
+
+    def flush_meta(self):
+        """메타 기록 (임시 파일 교체로 원자적 갱신)"""
+        meta = {'levels': self.levels, 'slots': self.slots, 'capacity': self.capacity, 'markets': self.rows}
+        temp_path = os.path.join(self.root, META_FILE + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self.root, META_FILE))
+
+    # ---------- 쓰기 ----------
+
+    def next_slot(self):
+        """다음에 쓸 슬롯 (가장 최근 샘플 다음, 재시작 시에도 이어서 기록)"""
+        if np.isnan(self.times).all():
+            return 0
+        return (int(np.nanargmax(self.times)) + 1) % self.slots
+
+    def assign_rows(self, markets):
+        """새 마켓에 행 배정 (용량 초과 마켓은 제외) → 배정 여부"""
+        added = False
+        for market in markets:
+            if market in self.rows:
+                continue
+            if len(self.rows) >= self.capacity:
+                if market not in self.dropped:
+                    print(f"⚠️ 호가 저장소 마켓 용량 초과 ({self.capacity}개): {market} 제외")
+                    self.dropped.add(market)
+                continue
+            self.rows[market] = len(self.rows)
+            added = True
+        return added
+
+    def write(self, orderbooks, timestamp=None):
+        """호가 샘플 1회 기록 {마켓: orderbook_units} → 기록한 슬롯"""
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.assign_rows(orderbooks):
+            self.flush()
+
+        markets = [market for market in orderbooks if market in self.rows]
+        rows = np.array([self.rows[market] for market in markets], dtype=np.intp)
+        sample = np.full((len(FIELDS), len(markets), self.levels), np.nan, dtype=np.float32)
+        for index, market in enumerate(markets):
+            units = orderbooks[market][:self.levels]
+            for field_index, field in enumerate(FIELDS):
+                sample[field_index, index, :len(units)] = [unit.get(field, np.nan) for unit in units]
+
+        slot = self.next_slot()
+        self.times[slot] = np.nan
+        for field_index, field in enumerate(FIELDS):
+            column = self.arrays[field][:, slot, :]
+            column[:] = np.nan
+            column[rows] = sample[field_index]
+        for array in self.arrays.values():
+            array.flush()
+        self.times[slot] = timestamp
+        self.times.flush()
+        return slot
+
+    # ---------- 읽기 ----------
+
+    def latest_time(self):
+        return None if np.isnan(self.times).all() else float(np.nanmax(self.times))
+
+    def window(self, markets, seconds=ORDERBOOK_WINDOW_SEC, now=None):
+        """최근 seconds 구간 샘플 → (샘플 시각, {필드: 마켓 × 시간 × 단계 배열}) (시간은 오래된 순)
+
+        저장소에 없는 마켓의 행은 NaN
+        """
+        now = time.time() if now is None else now
+        times = np.array(self.times)
+        in_window = np.flatnonzero(~np.isnan(times) & (times >= now - seconds) & (times <= now))
+        slots = in_window[np.argsort(times[in_window], kind='stable')]
+
+        known = np.array([market in self.rows for market in markets], dtype=bool)
+        rows = np.array([self.rows.get(market, 0) for market in markets], dtype=np.intp)
+        arrays = {}
+        for field in FIELDS:
+            # 필요한 (행, 슬롯)만 복사 (이후 샘플러가 다음 슬롯을 써도 영향 없음)
+            values = self.arrays[field][np.ix_(rows, slots)]
+            values[~known] = np.nan
+            arrays[field] = values
+        return times[slots], arrays
+
+# ============================================
+# 피처 (벡터화)
+# ============================================
+
+def _wall(price, size, wall_ratio):
+    """스냅샷별 최대 잔량 단계 → (벽 가격, 벽 잔량, 벽 여부) (입력: 마켓 × 단계)"""
+    filled = np.where(np.isnan(size), -np.inf, size)
+    level = filled.argmax(axis=1)
+    index = np.arange(size.shape[0])
+    wall_size = size[index, level]
+    wall_price = price[index, level]
+    with np.errstate(invalid='ignore'):
+        median = np.nanmedian(np.where(np.isnan(size).all(axis=1, keepdims=True), 0, size), axis=1)
+        is_wall = (wall_size > 0) & (wall_size >= wall_ratio * median)
+    return wall_price, wall_size, is_wall
+
+def _wall_present(price, size, wall_price, wall_size, keep):
+    """벽 가격에 벽 잔량의 keep 비율 이상이 남아 있는지 (price/size: 마켓 × 시간 × 단계 → 마켓 × 시간)"""
+    with np.errstate(invalid='ignore'):
+        same = (price == wall_price[:, None, None]) & (size >= keep * wall_size[:, None, None])
+    return same.any(axis=2)
+
+def compute_orderbook_dynamics(arrays, wall_ratio=ORDERBOOK_WALL_RATIO, keep=ORDERBOOK_WALL_KEEP):
+    """구간 샘플 → 마켓별 피처 배열 {피처: (마켓,)} (유효 샘플 2개 미만 마켓은 NaN)
+
+    - imbalance_delta: 마지막 - 첫 샘플 호가 불균형 ((매수 - 매도) / 전체 잔량, -1~1)
+    - bid/ask_wall_persistence: 마지막 샘플의 호가벽이 같은 가격에 남아 있던 샘플 비율 (벽이 없으면 0)
+    - bid/ask_wall_pulled: 첫 샘플의 호가벽이 체결되지 않고 사라짐 (1/0)
+      (매도벽: 최우선 매도호가가 벽 가격보다 아래이고 벽 가격이 보이는 단계 안에 있는데 벽이 없음)
+    """
+    bid_size, ask_size = arrays['bid_size'], arrays['ask_size']
+    bid_price, ask_price = arrays['bid_price'], arrays['ask_price']
+    markets, samples = bid_size.shape[:2]
+    result = {field: np.full(markets, np.nan) for field in DYNAMICS_FIELDS}
+    if samples == 0:
+        return result
+
+    valid = ~np.isnan(bid_size[:, :, 0]) & ~np.isnan(ask_size[:, :, 0])
+    count = valid.sum(axis=1)
+    first = valid.argmax(axis=1)
+    last = samples - 1 - valid[:, ::-1].argmax(axis=1)
+    index = np.arange(markets)
+    enough = count >= 2
+
+    bid_total = np.nansum(bid_size, axis=2, dtype=np.float64)
+    ask_total = np.nansum(ask_size, axis=2, dtype=np.float64)
+    total = bid_total + ask_total
+    imbalance = np.divide(bid_total - ask_total, total, out=np.zeros_like(total), where=total > 0)
+    result['imbalance_delta'] = np.where(enough, imbalance[index, last] - imbalance[index, first], np.nan)
+
+    for side, price, size in (('bid', bid_price, bid_size), ('ask', ask_price, ask_size)):
+        # 유지: 마지막 샘플의 벽이 구간 내 몇 %의 샘플에서 같은 가격에 있었는지
+        wall_price, wall_size, is_wall = _wall(price[index, last], size[index, last], wall_ratio)
+        present = _wall_present(price, size, wall_price, wall_size, keep) & valid
+        persistence = np.where(is_wall, present.sum(axis=1) / np.maximum(count, 1), 0.0)
+        result[f'{side}_wall_persistence'] = np.where(enough, persistence, np.nan)
+
+        # 철수: 첫 샘플의 벽이 마지막 샘플에서 사라짐 (가격이 벽을 지나간 경우 = 체결 소화는 제외)
+        wall_price, wall_size, is_wall = _wall(price[index, first], size[index, first], wall_ratio)
+        last_price, last_size = price[index, last], size[index, last]
+        still = _wall_present(last_price[:, None, :], last_size[:, None, :], wall_price, wall_size, keep)[:, 0]
+        with np.errstate(invalid='ignore'):
+            if side == 'ask':
+                deepest = np.where(np.isnan(last_price), -np.inf, last_price).max(axis=1)
+                in_view = (last_price[:, 0] < wall_price) & (wall_price <= deepest)
+            else:
+                deepest = np.where(np.isnan(last_price), np.inf, last_price).min(axis=1)
+                in_view = (last_price[:, 0] > wall_price) & (wall_price >= deepest)
+        pulled = is_wall & ~still & in_view
+        result[f'{side}_wall_pulled'] = np.where(enough, pulled.astype(np.float64), np.nan)
+
+    return result
+
+def orderbook_dynamics(markets, root=ORDERBOOK_SAMPLER_DIR, window_sec=ORDERBOOK_WINDOW_SEC,
+                       stale_sec=ORDERBOOK_STALE_SEC, now=None):
+    """마켓별 호가 변화 피처 {마켓: {피처: 값}} (저장소가 없거나 오래됐으면 빈 dict)"""
+    markets = list(markets)
+    now = time.time() if now is None else now
+    try:
+        store = OrderbookStore.open(root)
+        if store is None or not markets:
+            return {}
+        latest = store.latest_time()
+        if latest is None or now - latest > stale_sec:
+            return {}
+        _, arrays = store.window(markets, window_sec, now)
+    except Exception as e:
+        print(f"⚠️ 호가 저장소 읽기 실패: {e}")
+        return {}
+
+    features = compute_orderbook_dynamics(arrays)
+    dynamics = {}
+    for row, market in enumerate(markets):
+        values = {field: features[field][row] for field in DYNAMICS_FIELDS}
+        if np.isnan(values['imbalance_delta']):
+            continue
+        dynamics[market] = {
+            'imbalance_delta': float(values['imbalance_delta']),
+            'bid_wall_persistence': float(values['bid_wall_persistence']),
+            'ask_wall_persistence': float(values['ask_wall_persistence']),
+            'bid_wall_pulled': bool(values['bid_wall_pulled']),
+            'ask_wall_pulled': bool(values['ask_wall_pulled'])
+        }
+    return dynamics
+
+# ============================================
+# 샘플러
+# ============================================
+
+def run_sampler(interval=ORDERBOOK_SAMPLE_INTERVAL, root=ORDERBOOK_SAMPLER_DIR, markets=None, count=None):
+    """호가 샘플링 반복 (count 지정 시 해당 횟수만, 아니면 SIGINT/SIGTERM 까지)"""
+    from market_fetcher import fetch_orderbooks, get_markets
+    from scan_daemon import run_daemon
+
+    store = OrderbookStore.open_or_create(markets or get_markets(), root)
+    print(f"📒 호가 샘플러: {root} (마켓 {store.capacity} × 슬롯 {store.slots} × {store.levels}호가, "
+          f"{interval:g}초 주기)")
+    samples = 0
+
+    def sample_once():
+        nonlocal samples, store
+        started = time.perf_counter()
+        # 마켓 목록은 get_tickers 캐시(TICKER_REFRESH_INTERVAL) 재사용
+        orderbooks = fetch_orderbooks(markets or get_markets())
+        if not orderbooks:
+            print("⚠️ 호가 샘플 없음 (조회 실패)")
+            return
+        if not ORDERBOOK_MARKET_CAPACITY and len(orderbooks.keys() | store.rows.keys()) > store.capacity:
+            # 신규 상장으로 여유분을 넘으면 마켓 축을 늘려 다시 생성
+            store = store.grow(orderbooks)
+        slot = store.write(orderbooks)
+        samples += 1
+        if samples == 1 or samples % 60 == 0:
+            print(f"📒 샘플 {samples}회: 마켓 {len(orderbooks)}개 → 슬롯 {slot} "
+                  f"({time.perf_counter() - started:.2f}초)")
+
+    if count is not None:
+        for index in range(count):
+            started = time.monotonic()
+            sample_once()
+            if index + 1 < count:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        return samples
+
+    run_daemon(sample_once, interval)
+    return samples
+
+def print_status(root=ORDERBOOK_SAMPLER_DIR):
+    store = OrderbookStore.open(root)
+    if store is None:
+        print(f"ℹ️ 호가 저장소 없음: {root}")
+        return
+    filled = int((~np.isnan(store.times)).sum())
+    latest = store.latest_time()
+    print(f"📒 {root}: 마켓 {len(store.rows)}/{store.capacity}개, 샘플 {filled}/{store.slots}슬롯, "
+          f"{store.levels}호가")
+    if latest is not None:
+        print(f"   마지막 샘플: {time.time() - latest:.1f}초 전")
+
+# ============================================
+# CLI
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="호가창 고빈도 샘플러 (메모리 맵 저장소)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="호가 샘플링 (SIGINT/SIGTERM 까지)")
+    run_parser.add_argument('--interval', type=float, default=ORDERBOOK_SAMPLE_INTERVAL, help="샘플링 주기(초)")
+    run_parser.add_argument('--markets', nargs='+', help="대상 마켓 (생략 시 SCAN_FIATS 전체)")
+    run_parser.add_argument('--count', type=int, help="N회 샘플 후 종료")
+    run_parser.add_argument('--dir', default=ORDERBOOK_SAMPLER_DIR)
+
+    status_parser = commands.add_parser('status', help="저장소 상태")
+    status_parser.add_argument('--dir', default=ORDERBOOK_SAMPLER_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == 'status':
+        print_status(args.dir)
+        return
+
+    try:
+        samples = run_sampler(args.interval, args.dir, args.markets, args.count)
+        print(f"✅ 호가 샘플 {samples}회 기록")
+    except KeyboardInterrupt:
+        print("\n🛑 샘플러 종료")
+
+if __name__ == "__main__":
+    main()
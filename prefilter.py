@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+2단계 스캔 사전 선별
+- 현재가 일괄 조회(1~2회 요청)로 전체 마켓 활동도 계산
+- 활동도 기준 이상 후보 + 나머지 중 순환 표본만 상세 분석 (캔들/호가/지표)
+- 표본 결과로 후보 밖에서 놓친 신호 수를 추정해 재현율 보고
+  (PREFILTER_AUDIT=1 이면 전체를 분석해 정확한 재현율 계산 - 기준값 조정용)
+"""
+
+import numpy as np
+import itertools
+import time
+import os
+from market_fetcher import fetch_ticker_snapshots
+
+# ============================================
+# 환경변수 설정
+# ============================================
+PREFILTER_ENABLED = os.environ.get('PREFILTER_ENABLED', '1') == '1'
+# 활동도(0~1, 거래대금/변화율/당일 거래 속도 백분위 평균) 후보 기준
+PREFILTER_THRESHOLD = float(os.environ.get('PREFILTER_THRESHOLD', '0.5'))
+# 후보가 아닌 마켓 중 매 스캔 돌아가며 분석할 표본 수
+PREFILTER_SAMPLE = int(os.environ.get('PREFILTER_SAMPLE', '20'))
+# 마지막 체결이 이보다 오래된(초) 마켓은 후보에서 제외
+PREFILTER_STALE_SEC = int(os.environ.get('PREFILTER_STALE_SEC', '900'))
+PREFILTER_AUDIT = os.environ.get('PREFILTER_AUDIT', '0') == '1'
+
+DAY_MS = 24 * 3600 * 1000
+
+# 표본 순환 위치 (프로세스마다 시작점이 달라지도록 시각 기반)
+_rotation = itertools.count(int(time.time() // 60))
+
+# ============================================
+# 활동도 계산
+# ============================================
+
+def _percentile_rank(values):
+    """0~1 백분위 순위 (값이 클수록 1)"""
+    if len(values) < 2:
+        return np.ones(len(values))
+    return values.argsort().argsort() / (len(values) - 1)
+
+def activity_scores(markets, snapshots, now_ms=None):
+    """마켓별 활동도 (0~1, 기준 통화별 백분위), 현재가 정보가 없는 마켓은 NaN"""
+    now_ms = now_ms if now_ms is not None else time.time() * 1000
+    columns = {
+        name: np.array([float(snapshots.get(m, {}).get(name) or 0) for m in markets])
+        for name in ('acc_trade_price_24h', 'acc_trade_price', 'signed_change_rate', 'trade_timestamp')
+    }
+    turnover = columns['acc_trade_price_24h']
+
+    # 당일(UTC 0시 이후) 거래대금이 최근 24시간 평균 속도보다 빠른 정도
+    elapsed = max((now_ms % DAY_MS) / DAY_MS, 1 / 24)
+    expected = turnover * elapsed
+    pace = np.divide(columns['acc_trade_price'], expected, out=np.zeros_like(expected), where=expected > 0)
+
+    # 거래대금 단위가 기준 통화(KRW/BTC/USDT)마다 달라 같은 기준 통화 마켓끼리 순위 비교
+    quotes = np.array([m.split('-', 1)[0] for m in markets])
+    scores = np.zeros(len(markets))
+    for quote in np.unique(quotes):
+        group = quotes == quote
+        scores[group] = (
+            _percentile_rank(turnover[group])
+            + _percentile_rank(np.abs(columns['signed_change_rate'][group]))
+            + _percentile_rank(pace[group])
+        ) / 3
+
+    stale = now_ms - columns['trade_timestamp'] > PREFILTER_STALE_SEC * 1000
+    scores[stale] = 0.0
+    scores[[m not in snapshots for m in markets]] = np.nan
+    return dict(zip(markets, scores.tolist()))
+
+# ============================================
+# 선별 결과
+# ============================================
+
+class Screening:
+    """사전 선별 결과 (분석 대상 = 후보 + 표본, 원래 마켓 순서 유지)"""
+
+    def __init__(self, universe, candidates, sample, audit=False):
+        self.universe = list(universe)
+        self.candidates = set(candidates)
+        self.sample = set(sample)
+        self.audit = audit
+        self.enabled = len(self.candidates) < len(self.universe)
+
+    @property
+    def tickers(self):
+        if self.audit or not self.enabled:
+            return list(self.universe)
+        return [m for m in self.universe if m in self.candidates or m in self.sample]
+
+    def summary(self):
+        if not self.enabled:
+            return f"전체 {len(self.universe)}개 분석 (선별 없음)"
+        text = (f"전체 {len(self.universe)} → 후보 {len(self.candidates)} + "
+                f"표본 {len(self.sample)}")
+        return text + " (감사 모드: 전체 분석)" if self.audit else text
+
+    def recall(self, market_snapshot, cutoff):
+        """기준 점수 이상 코인 중 후보에 포함된 비율 (정확값 또는 표본 기반 추정, 판단 불가 시 None)"""
+        hits = {item['coin'] for item in market_snapshot if item.get('score', 0) >= cutoff}
+        found = len(hits & self.candidates)
+
+        if self.audit:
+            total = len(hits)
+        else:
+            # 표본 적중률을 후보 밖 전체 마켓으로 확대
+            outside = len(self.universe) - len(self.candidates)
+            missed = len(hits & self.sample) * outside / len(self.sample) if self.sample else 0
+            total = found + missed
+
+        return (found / total if total else None), len(hits)
+
+    def report(self, market_snapshot, cutoff, label):
+        """재현율 출력"""
+        if not self.enabled:
+            return None
+        recall, hits = self.recall(market_snapshot, cutoff)
+        kind = "재현율" if self.audit else "추정 재현율"
+        value = "N/A" if recall is None else f"{recall * 100:.0f}%"
+        print(f"🎯 사전 선별 {kind} ({label} {cutoff}점 이상 {hits}개): {value}")
+        return recall
+
+def screen_markets(markets, snapshots, threshold=PREFILTER_THRESHOLD,
+                   sample_size=PREFILTER_SAMPLE, audit=PREFILTER_AUDIT, now_ms=None):
+    """활동도 기준 후보 선정 + 나머지 중 순환 표본 추출"""
+    markets = list(markets)
+    if not snapshots:
+        # 현재가 조회 실패 시 전체 분석
+        return Screening(markets, markets, [])
+
+    scores = activity_scores(markets, snapshots, now_ms)
+    # 현재가 정보가 없는 마켓은 판단할 수 없으므로 후보로 둔다
+    candidates = [m for m in markets if not scores[m] < threshold]
+    rest = [m for m in markets if scores[m] < threshold]
+
+    sample = []
+    if rest and sample_size > 0:
+        offset = next(_rotation) * sample_size % len(rest)
+        sample = (rest[offset:] + rest[:offset])[:sample_size]
+
+    return Screening(markets, candidates, sample, audit)
+
+def select_markets(markets):
+    """사전 선별 실행 (비활성화 시 전체)"""
+    markets = list(markets)
+    if not PREFILTER_ENABLED:
+        return Screening(markets, markets, [])
+
+    screening = screen_markets(markets, fetch_ticker_snapshots(markets))
+    print(f"🔎 사전 선별: {screening.summary()}")
+    return screening
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+분석 결과 게시 공용 모듈
+- Git 커밋 및 푸시 (급등 신호 / 실시간 모니터링 / 통합 스캔 공용)
+- Telegram 메시지 전송
+"""
+
+import subprocess
+from scan_metrics import METRICS
+
+def send_telegram(message, bot_token, chat_id):
+    """Telegram 메시지 전송 (토큰이 없으면 생략)"""
+    if not bot_token or not chat_id:
+        return
+
+    try:
+        import requests
+
+        with METRICS.stage('notify'):
+            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+            data = {"chat_id": chat_id, "text": message}
+            requests.post(url, data=data, timeout=10)
+    except Exception as e:
+        print(f"알림 전송 실패: {e}")
+
+def commit_and_push(paths, commit_msg):
+    """지정 경로 Git 커밋 및 푸시 (변경사항이 없으면 False)"""
+    with METRICS.stage('git'):
+        return _commit_and_push(paths, commit_msg)
+
+def _commit_and_push(paths, commit_msg):
+    try:
+        subprocess.run(['git', 'config', '--global', 'user.email', 'github-actions[bot]@users.noreply.github.com'], check=True)
+        subprocess.run(['git', 'config', '--global', 'user.name', 'GitHub Actions Bot'], check=True)
+
+        subprocess.run(['git', 'add', *paths], check=True)
+
+        result = subprocess.run(['git', 'commit', '-m', commit_msg], capture_output=True, text=True)
+
+        if result.returncode == 0:
+            subprocess.run(['git', 'push'], check=True)
+            print("✅ Git 커밋 및 푸시 완료")
+            return True
+        else:
+            print("ℹ️ 변경사항 없음")
+            return False
+
+    except Exception as e:
+        print(f"⚠️ Git 작업 실패: {e}")
+        return False
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+샤드 분산 스캔 (코디네이터 / 워커)
+- 코디네이터: 사전 선별된 마켓을 샤드로 나눠 로컬 작업 큐(work_queue)에 넣고 로컬 워커 프로세스 실행
+- 워커: 샤드를 임대해 호가창 + 캔들 수집 / 피처 / 점수 평가 후 결과(JSON 형태 스냅샷)를 큐에 저장
+- 코디네이터도 대기하는 동안 직접 샤드를 처리하고, 완료된 샤드를 마켓 순서대로 병합해 스냅샷 반환
+  → 기존 저장 / Excel / 리포트 / 커밋 흐름을 그대로 사용
+- 다른 호스트는 같은 큐 파일(공유 파일시스템)을 지정해 'work' 로 참여
+"""
+
+from market_fetcher import begin_candle_cache, end_candle_cache, collect_orderbook_summaries
+from snapshot_records import SurgeRecord, MonitorRecord, snapshot_to_dicts
+from work_queue import WorkQueue, WORK_QUEUE_PATH
+from scan_metrics import METRICS
+import subprocess
+import threading
+import importlib
+import argparse
+import socket
+import time
+import sys
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+# 1 이면 스캐너가 수집/분석 단계를 샤드 분산으로 실행
+SCAN_SHARDING = os.environ.get('SCAN_SHARDING', '0') == '1'
+# 코디네이터가 띄우는 로컬 워커 프로세스 수 (0 이면 코디네이터 + 외부 워커만)
+SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', '2'))
+# 샤드당 마켓 수
+SHARD_SIZE = int(os.environ.get('SHARD_SIZE', '40'))
+# 전체 샤드 완료 대기 한도(초) - 넘으면 완료된 샤드만 병합
+SHARD_TIMEOUT = float(os.environ.get('SHARD_TIMEOUT', '900'))
+SHARD_POLL_SEC = float(os.environ.get('SHARD_POLL_SEC', '0.5'))
+
+# 스냅샷 이름 → (스캐너 모듈, 스냅샷 생성 함수, 레코드 클래스)
+SNAPSHOTS = {
+    'buy': ('analyze_buy_signals', 'build_buy_snapshot', SurgeRecord),
+    'realtime': ('analyze_realtime_monitor', 'build_realtime_snapshot', MonitorRecord)
+}
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# ============================================
+# 워커
+# ============================================
+
+def analyze_shard(names, markets, min_counts=None):
+    """샤드 1개 분석 → {스냅샷 이름: JSON 형태 레코드 리스트}"""
+    orderbook_summaries = collect_orderbook_summaries(markets)
+    begin_candle_cache(min_counts)
+    try:
+        result = {}
+        for name in names:
+            module, function, _ = SNAPSHOTS[name]
+            build = getattr(importlib.import_module(module), function)
+            result[name] = snapshot_to_dicts(build(markets, orderbook_summaries))
+        return result
+    finally:
+        end_candle_cache()
+
+def process_task(queue, task, owner):
+    """임대한 샤드 처리 (처리 중 임대 갱신) → 결과 저장 여부"""
+    stop = threading.Event()
+
+    def keep_lease():
+        while not stop.wait(queue.lease_sec / 3):
+            if not queue.renew(task, owner):
+                return
+
+    renewer = threading.Thread(target=keep_lease, daemon=True)
+    renewer.start()
+    started = time.perf_counter()
+    try:
+        result = analyze_shard(**task.payload)
+    except Exception as e:
+        state = queue.fail(task, owner, e)
+        print(f"⚠️ 샤드 {task.seq} 처리 실패 ({'재시도 대기' if state == 'pending' else '포기'}): {e}")
+        return False
+    finally:
+        stop.set()
+        renewer.join()
+
+    if not queue.complete(task, owner, result):
+        print(f"⚠️ 샤드 {task.seq}: 임대 만료로 결과 폐기 (다른 워커가 처리)")
+        return False
+    print(f"🧩 샤드 {task.seq} 완료: 마켓 {len(task.payload['markets'])}개 "
+          f"({time.perf_counter() - started:.1f}초, {owner})")
+    return True
+
+def run_worker(queue, batch=None, idle_exit=None):
+    """샤드 임대 → 처리 반복 (batch 지정 시 해당 배치만, idle_exit 초 동안 작업이 없으면 종료)"""
+    owner = worker_name()
+    processed = 0
+    idle_since = time.monotonic()
+
+    while True:
+        task = queue.lease(owner, batch)
+        if task is not None:
+            processed += process_task(queue, task, owner)
+            idle_since = time.monotonic()
+            continue
+        if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+            return processed
+        time.sleep(SHARD_POLL_SEC)
+
+# ============================================
+# 코디네이터
+# ============================================
+
+def spawn_workers(queue, batch, count):
+    """로컬 워커 프로세스 실행 (배치가 비면 종료)"""
+    command = [sys.executable, os.path.abspath(__file__), 'work',
+               '--queue', os.path.abspath(queue.path), '--batch', batch, '--idle-exit', '0']
+    return [subprocess.Popen(command) for _ in range(count)]
+
+def run_sharded(names, tickers, min_counts=None, workers=None, shard_size=None):
+    """마켓을 샤드로 나눠 분산 분석 → {스냅샷 이름: 레코드 리스트 (tickers 순서)}
+
+    완료되지 못한 샤드의 마켓은 결과에서 빠진다 (경고 출력)
+    """
+    workers = SHARD_WORKERS if workers is None else workers
+    shard_size = shard_size or SHARD_SIZE
+    tickers = list(tickers)
+    shards = [tickers[start:start + shard_size] for start in range(0, len(tickers), shard_size)]
+    snapshots = {name: [] for name in names}
+    if not shards:
+        return snapshots
+
+    queue = WorkQueue()
+    batch = f"{worker_name()}:{int(time.time() * 1000)}"
+    queue.put(batch, [{'names': names, 'markets': shard, 'min_counts': min_counts} for shard in shards])
+    processes = spawn_workers(queue, batch, min(workers, len(shards)))
+    print(f"🗂️ 샤드 분산: 마켓 {len(tickers)}개 → 샤드 {len(shards)}개 "
+          f"(로컬 워커 {len(processes)}개 + 코디네이터, 큐 {queue.path})")
+
+    owner = worker_name()
+    deadline = time.monotonic() + SHARD_TIMEOUT
+    try:
+        with METRICS.stage('shards'):
+            while time.monotonic() < deadline:
+                # 코디네이터도 남은 샤드를 처리 (만료된 임대 회수 포함)
+                task = queue.lease(owner, batch)
+                if task is not None:
+                    process_task(queue, task, owner)
+                    continue
+                counts = queue.counts(batch)
+                if not counts.get('pending') and not counts.get('leased'):
+                    break
+                time.sleep(SHARD_POLL_SEC)
+            else:
+                print(f"⚠️ 샤드 대기 시간 초과 ({SHARD_TIMEOUT:.0f}초), 완료된 샤드만 병합")
+
+        results = queue.results(batch)
+        unfinished = queue.unfinished(batch)
+    finally:
+        for process in processes:
+            try:
+                process.wait(timeout=SHARD_POLL_SEC * 4)
+            except subprocess.TimeoutExpired:
+                process.terminate()
+        queue.delete(batch)
+
+    # 샤드는 tickers 의 연속 구간이므로 seq 순으로 이으면 원래 마켓 순서
+    for _, result in results:
+        for name in names:
+            record_class = SNAPSHOTS[name][2]
+            snapshots[name].extend(record_class.from_dict(item) for item in result[name])
+
+    if unfinished:
+        missing = sum(len(payload['markets']) for _, payload, _, _ in unfinished)
+        errors = '; '.join(sorted({error for _, _, _, error in unfinished if error}))[:200]
+        print(f"⚠️ 미완료 샤드 {len(unfinished)}개 (마켓 {missing}개 제외){': ' + errors if errors else ''}")
+    return snapshots
+
+# ============================================
+# CLI
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="샤드 분산 스캔 워커 / 큐 상태")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    work_parser = commands.add_parser('work', help="큐의 샤드를 임대해 처리 (다른 호스트에서 참여)")
+    work_parser.add_argument('--queue', default=WORK_QUEUE_PATH, help="큐 파일 (SQLite)")
+    work_parser.add_argument('--batch', help="이 배치만 처리")
+    work_parser.add_argument('--idle-exit', type=float, help="작업이 없는 상태로 N초가 지나면 종료")
+
+    status_parser = commands.add_parser('status', help="배치별 샤드 상태")
+    status_parser.add_argument('--queue', default=WORK_QUEUE_PATH)
+
+    args = parser.parse_args(argv)
+    queue = WorkQueue(args.queue)
+
+    if args.command == 'status':
+        batches = queue.batches()
+        if not batches:
+            print("ℹ️ 대기 중인 배치 없음")
+        for batch, counts in batches.items():
+            print(f"{batch}  " + ' / '.join(f"{state} {count}" for state, count in sorted(counts.items())))
+        return
+
+    try:
+        processed = run_worker(queue, args.batch, args.idle_exit)
+        if args.batch is None:
+            print(f"✅ 워커 종료: 샤드 {processed}개 처리")
+    except KeyboardInterrupt:
+        print("\n🛑 워커 종료")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+상주 실행(데몬) 루프
+- SCAN_INTERVAL 주기로 스캔 반복 (프로세스 내 상태 유지)
+- Git 커밋/알림은 별도 주기(COMMIT_INTERVAL)로 실행
+- SIGINT/SIGTERM 수신 시 진행 중인 스캔을 마치고 정상 종료
+"""
+
+import signal
+import threading
+import time
+import os
+
+COMMIT_INTERVAL = int(os.environ.get('COMMIT_INTERVAL', '3600'))
+
+def run_daemon(scan_once, scan_interval, persist=None, persist_interval=COMMIT_INTERVAL):
+    """스캔 반복 실행 (persist 는 persist_interval 마다, 종료 시 한 번 더)"""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set():
+            # 두 번째 신호는 즉시 종료
+            raise KeyboardInterrupt
+        print(f"\n🛑 종료 신호 수신 ({signal.Signals(signum).name}) - 현재 스캔 후 종료")
+        stop.set()
+
+    previous_handlers = {
+        signum: signal.signal(signum, request_stop)
+        for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+
+    print(f"🔁 데몬 모드 시작: 스캔 {scan_interval}초 / 커밋 {persist_interval}초 주기")
+    last_persist = time.monotonic()
+    scans = 0
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                scan_once()
+                scans += 1
+            except Exception as e:
+                print(f"❌ 스캔 오류: {e}")
+
+            if persist and time.monotonic() - last_persist >= persist_interval:
+                _safe_persist(persist)
+                last_persist = time.monotonic()
+
+            stop.wait(max(0.0, scan_interval - (time.monotonic() - started)))
+    finally:
+        if persist:
+            _safe_persist(persist)
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        print(f"🛑 데몬 종료: 총 {scans}회 스캔")
+
+def _safe_persist(persist):
+    try:
+        persist()
+    except Exception as e:
+        print(f"⚠️ 저장/커밋 오류: {e}")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스캔 계측 (단계별 / 업비트 엔드포인트별 소요 시간)
+- 단계(collect, json, excel, report, git, notify ...) 및 요청 지연 히스토그램
+- 엔드포인트별 요청 수 / 오류 수, 코인별 처리 시간 상위 N개
+- 스캔마다 히스토리 옆에 scan_metrics.json + scan_metrics.prom (Prometheus textfile) 기록
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import bisect
+import heapq
+import time
+import json
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+SCAN_METRICS_ENABLED = os.environ.get('SCAN_METRICS_ENABLED', '1') == '1'
+SCAN_METRICS_SLOWEST = int(os.environ.get('SCAN_METRICS_SLOWEST', '10'))
+
+METRICS_FILE = 'scan_metrics'
+METRIC_PREFIX = 'crypto_scan'
+
+# 히스토그램 구간 상한 (초)
+REQUEST_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COIN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# ============================================
+# 히스토그램
+# ============================================
+
+class Histogram:
+    """고정 구간 지연 히스토그램"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        # 구간 상한 이하(le) 기준
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        """(상한, 누적 개수) 목록 (마지막은 +Inf)"""
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'max': round(self.max, 6),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in self.cumulative()}
+        }
+
+# ============================================
+# 스캔 계측
+# ============================================
+
+class ScanMetrics:
+    """스캔 1회 단위 계측 (스레드 공용, begin_scan 시 초기화)"""
+
+    def __init__(self, enabled=SCAN_METRICS_ENABLED, slowest=SCAN_METRICS_SLOWEST):
+        self.enabled = enabled
+        self.slowest = slowest
+        self.lock = threading.Lock()
+        # 모듈 로딩 시간은 프로세스 시작 시 1회 (begin_scan 에서 초기화하지 않음)
+        self.imports = {}
+        self.begin_scan(None)
+
+    def begin_scan(self, scanner):
+        with self.lock:
+            self.scanner = scanner
+            self.started = datetime.now().astimezone()
+            self.started_clock = time.perf_counter()
+            self.stages = {}
+            self.endpoints = {}
+            self.coin_latency = Histogram(COIN_BUCKETS)
+            self.coin_seconds = {}
+
+    # ---------- 기록 ----------
+
+    @contextmanager
+    def stage(self, name):
+        """단계 소요 시간 측정 (with 블록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - started)
+
+    def observe_stage(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = Histogram(STAGE_BUCKETS)
+            self.stages[name].observe(seconds)
+
+    def observe_request(self, endpoint, seconds, status):
+        """업비트 요청 1회 (status: HTTP 코드 또는 'error')"""
+        if not self.enabled:
+            return
+        with self.lock:
+            entry = self.endpoints.get(endpoint)
+            if entry is None:
+                entry = self.endpoints[endpoint] = {
+                    'latency': Histogram(REQUEST_BUCKETS), 'requests': 0, 'errors': {}
+                }
+            entry['latency'].observe(seconds)
+            entry['requests'] += 1
+            if status == 'error' or status >= 400:
+                entry['errors'][str(status)] = entry['errors'].get(str(status), 0) + 1
+
+    def observe_import(self, module, seconds):
+        """모듈 import 소요 시간 (cli.py 에서 지연 로딩 시)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.imports[module] = seconds
+
+    def observe_coin(self, coin, seconds):
+        """코인별 수집/분석 1회 (같은 코인은 스캔 내 누적)"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.coin_latency.observe(seconds)
+            self.coin_seconds[coin] = self.coin_seconds.get(coin, 0.0) + seconds
+
+    # ---------- 출력 ----------
+
+    def snapshot(self):
+        with self.lock:
+            slowest = heapq.nlargest(self.slowest, self.coin_seconds.items(), key=lambda item: item[1])
+            return {
+                'scanner': self.scanner,
+                'scan_started': self.started.isoformat(timespec='seconds'),
+                'elapsed': round(time.perf_counter() - self.started_clock, 6),
+                'stages': {name: hist.to_dict() for name, hist in self.stages.items()},
+                'endpoints': {
+                    endpoint: {
+                        'requests': entry['requests'],
+                        'errors': dict(entry['errors']),
+                        'latency': entry['latency'].to_dict()
+                    }
+                    for endpoint, entry in sorted(self.endpoints.items())
+                },
+                'coins': self.coin_latency.to_dict(),
+                'slowest_coins': [[coin, round(seconds, 6)] for coin, seconds in slowest],
+                'imports': {module: round(seconds, 6) for module, seconds in self.imports.items()}
+            }
+
+    def write(self, directory):
+        """scan_metrics.json / scan_metrics.prom 기록 (임시 파일 작성 후 교체)"""
+        if not self.enabled:
+            return None
+        try:
+            data = self.snapshot()
+            os.makedirs(directory, exist_ok=True)
+            json_path = os.path.join(directory, f'{METRICS_FILE}.json')
+            _write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=2))
+            _write_atomic(os.path.join(directory, f'{METRICS_FILE}.prom'), to_prometheus(data))
+            stages = ' / '.join(f"{name} {hist['sum']:.1f}초" for name, hist in data['stages'].items())
+            print(f"⏱️ 단계별 소요: {stages}")
+            return json_path
+        except Exception as e:
+            print(f"⚠️ 계측 기록 실패: {e}")
+            return None
+
+METRICS = ScanMetrics()
+
+def _write_atomic(path, text):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+# ============================================
+# Prometheus textfile 형식
+# ============================================
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+def _histogram_lines(name, hist, **labels):
+    lines = []
+    for bound, count in hist['buckets'].items():
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {hist["sum"]}')
+    lines.append(f'{name}_count{_labels(**labels)} {hist["count"]}')
+    return lines
+
+def to_prometheus(data):
+    """계측 스냅샷 → Prometheus textfile collector 형식"""
+    scanner = data['scanner'] or 'scan'
+    lines = []
+
+    def header(name, kind, text):
+        lines.append(f'# HELP {name} {text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    name = f'{METRIC_PREFIX}_started_timestamp_seconds'
+    header(name, 'gauge', 'Scan start time (unix seconds).')
+    lines.append(f'{name}{_labels(scanner=scanner)} {datetime.fromisoformat(data["scan_started"]).timestamp()}')
+
+    name = f'{METRIC_PREFIX}_elapsed_seconds'
+    header(name, 'gauge', 'Seconds from scan start to metrics write.')
+    lines.append(f'{name}{_labels(scanner=scanner)} {data["elapsed"]}')
+
+    name = f'{METRIC_PREFIX}_stage_seconds'
+    header(name, 'histogram', 'Scan stage duration.')
+    for stage, hist in data['stages'].items():
+        lines.extend(_histogram_lines(name, hist, scanner=scanner, stage=stage))
+
+    name = f'{METRIC_PREFIX}_upbit_request_seconds'
+    header(name, 'histogram', 'Upbit request latency per endpoint (each attempt).')
+    for endpoint, entry in data['endpoints'].items():
+        lines.extend(_histogram_lines(name, entry['latency'], scanner=scanner, endpoint=endpoint))
+
+    name = f'{METRIC_PREFIX}_upbit_requests_total'
+    header(name, 'counter', 'Upbit requests per endpoint (each attempt).')
+    for endpoint, entry in data['endpoints'].items():
+        lines.append(f'{name}{_labels(scanner=scanner, endpoint=endpoint)} {entry["requests"]}')
+
+    name = f'{METRIC_PREFIX}_upbit_errors_total'
+    header(name, 'counter', 'Upbit request errors per endpoint and status.')
+    for endpoint, entry in data['endpoints'].items():
+        for status, count in entry['errors'].items():
+            lines.append(f'{name}{_labels(scanner=scanner, endpoint=endpoint, status=status)} {count}')
+
+    name = f'{METRIC_PREFIX}_coin_seconds'
+    header(name, 'histogram', 'Per-coin fetch/analyze duration.')
+    lines.extend(_histogram_lines(name, data['coins'], scanner=scanner))
+
+    name = f'{METRIC_PREFIX}_slowest_coin_seconds'
+    header(name, 'gauge', 'Total per-coin time of the slowest coins in the scan.')
+    for coin, seconds in data['slowest_coins']:
+        lines.append(f'{name}{_labels(scanner=scanner, coin=coin)} {seconds}')
+
+    name = f'{METRIC_PREFIX}_import_seconds'
+    header(name, 'gauge', 'Module import time at process start.')
+    for module, seconds in data.get('imports', {}).items():
+        lines.append(f'{name}{_labels(scanner=scanner, module=module)} {seconds}')
+
+    return '\n'.join(lines) + '\n'
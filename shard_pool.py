@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+공유 메모리 배열 + 프로세스 풀 샤드 실행
+- numpy 배열을 multiprocessing.shared_memory 블록에 올리고 워커는 복사 없이 연결
+- 행(코인) 범위를 워커 수만큼 연속 구간으로 나눠 실행, 결과는 원래 행 순서로 병합
+- 풀은 워커 수별로 한 번 만들어 재사용 (상주 실행 시 스캔마다 프로세스 생성 비용 없음)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import atexit
+import time
+
+# 수집 스레드가 도는 중에 fork 하지 않도록 forkserver (없으면 spawn) 사용
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# ============================================
+# 공유 메모리 배열
+# ============================================
+
+def share_arrays(arrays):
+    """배열을 공유 메모리 블록에 복사 → (블록 목록, 워커 연결 정보)"""
+    blocks, layout = [], {}
+    try:
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            layout[key] = (block.name, array.shape, array.dtype.str)
+    except Exception:
+        release_arrays(blocks)
+        raise
+    return blocks, layout
+
+def attach_arrays(layout):
+    """워커 연결 정보 → (배열 dict, 블록 목록) - 배열을 다 쓴 뒤 블록 close"""
+    arrays, blocks = {}, []
+    for key, (block_name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype, buffer=block.buf)
+    return arrays, blocks
+
+def release_arrays(blocks):
+    """생성한 블록 해제 (close + unlink)"""
+    for block in blocks:
+        try:
+            block.close()
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+# ============================================
+# 샤드 실행
+# ============================================
+
+_executors = {}
+
+def get_executor(workers):
+    """워커 수별 프로세스 풀 (최초 사용 시 생성)"""
+    executor = _executors.get(workers)
+    if executor is None:
+        executor = _executors[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)
+        )
+    return executor
+
+def _ready():
+    return True
+
+def start_pool(workers):
+    """풀 워커를 미리 띄움 → 새로 띄운 경우 소요 시간(초), 이미 떠 있으면 0"""
+    if workers <= 1 or workers in _executors:
+        return 0.0
+    started = time.perf_counter()
+    executor = get_executor(workers)
+    for future in [executor.submit(_ready) for _ in range(workers)]:
+        future.result()
+    return time.perf_counter() - started
+
+@atexit.register
+def shutdown_executors():
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+
+def shard_ranges(count, shards):
+    """[0, count) 를 shards 개 이하의 연속 구간으로 분할"""
+    bounds = np.linspace(0, count, min(shards, count) + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def _run_shard(function, layout, start, stop):
+    arrays, blocks = attach_arrays(layout)
+    try:
+        return function(arrays, start, stop)
+    finally:
+        # 워커에 배열 참조가 남지 않게 정리 후 close
+        del arrays
+        for block in blocks:
+            block.close()
+
+def map_shards(function, arrays, count, workers):
+    """function(배열 dict, start, stop) → 행별 결과 목록 을 구간별 병렬 실행 → 전체 행 결과 (행 순서)
+
+    function 은 모듈 최상위 함수여야 하고 결과에 공유 배열 뷰를 담으면 안 됨,
+    workers <= 1 이면 현재 프로세스에서 실행
+    """
+    if workers <= 1 or count <= 1:
+        return list(function(arrays, 0, count))
+
+    blocks, layout = share_arrays(arrays)
+    try:
+        executor = get_executor(workers)
+        futures = [executor.submit(_run_shard, function, layout, start, stop)
+                   for start, stop in shard_ranges(count, workers)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    finally:
+        release_arrays(blocks)
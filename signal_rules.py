@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+선언형 신호 점수 규칙 엔진
+- scoring_rules.json 의 임계값/점수/라벨/경보 레벨을 읽어 컴파일
+- 스냅샷 전체를 컬럼 단위로 한 번에 평가하고 결과를 스냅샷에 기록
+- 필드별 배열을 바로 평가하는 경로 제공 (백테스트)
+- 레코드는 dict 또는 snapshot_records 레코드 (같은 키 접근)
+"""
+
+from snapshot_records import Record
+import numpy as np
+import operator
+import json
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+SCORING_RULES_FILE = os.environ.get(
+    'SCORING_RULES_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_rules.json')
+)
+
+OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# ============================================
+# 규칙 컴파일
+# ============================================
+
+class CompiledRuleSet:
+    """컴파일된 점수 규칙 묶음"""
+
+    def __init__(self, spec):
+        # 리포트 / 알림에 올리는 기준 점수 (스캐너, 스트림, 스윕 공용)
+        self.cutoff = spec['cutoff']
+        self.levels = spec['levels']
+        self.level_rank = {level: rank for rank, level in enumerate(self.levels)}
+        self.rules = []
+        self.fields = {}
+
+        for rule in spec['rules']:
+            tiers = []
+            for tier in rule['tiers']:
+                conditions = tier.get('when') or [[rule['field'], tier['op'], tier['value']]]
+                for field, op, value in conditions:
+                    if op not in OPERATORS:
+                        raise ValueError(f"지원하지 않는 연산자: {op}")
+                    # 비교값이 문자열이면 object 컬럼, 아니면 float 컬럼
+                    self.fields[field] = isinstance(value, str)
+                tiers.append({
+                    'conditions': [(field, OPERATORS[op], value) for field, op, value in conditions],
+                    'points': tier['points'],
+                    'label': tier['label'],
+                    'rank': self.level_rank[tier.get('level', self.levels[0])]
+                })
+            self.rules.append(tiers)
+
+        # 규칙별 최고 단계 점수 합 = 가능한 최고 점수 (점수 표시 / 백테스트 / 스윕 공용)
+        self.max_score = sum(max(tier['points'] for tier in tiers) for tiers in self.rules)
+
+    def evaluate(self, records):
+        """레코드 전체 평가 (점수 배열, 신호 라벨 리스트, 레벨 리스트)"""
+        count = len(records)
+        columns = {field: _column(records, field, is_text) for field, is_text in self.fields.items()}
+        scores, ranks, signals = self.evaluate_columns(columns, count, with_signals=True)
+        levels = [self.levels[rank] for rank in ranks]
+        return scores, signals, levels
+
+    def evaluate_columns(self, columns, count, with_signals=False):
+        """필드별 배열 평가 (점수 배열, 레벨 순위 배열, 신호 라벨 리스트 또는 None) - 없는 필드는 결측 취급"""
+        columns = {field: _as_column(columns.get(field), count, is_text)
+                   for field, is_text in self.fields.items()}
+
+        scores = np.zeros(count, dtype=np.int64)
+        ranks = np.zeros(count, dtype=np.int64)
+        signals = [[] for _ in range(count)] if with_signals else None
+
+        for tiers in self.rules:
+            # 같은 규칙 안의 단계는 if/elif 처럼 먼저 맞는 하나만 적용
+            unmatched = np.ones(count, dtype=bool)
+            for tier in tiers:
+                mask = unmatched.copy()
+                for field, compare, value in tier['conditions']:
+                    mask &= _compare(columns[field], compare, value)
+                unmatched &= ~mask
+
+                scores += np.where(mask, tier['points'], 0)
+                ranks = np.maximum(ranks, np.where(mask, tier['rank'], 0))
+                if with_signals:
+                    for row in np.flatnonzero(mask):
+                        signals[row].append(tier['label'])
+
+        return scores, ranks, signals
+
+def _lookup(record, field):
+    value = record
+    for key in field.split('.'):
+        if not isinstance(value, (dict, Record)):
+            return None
+        value = value.get(key)
+    return value
+
+def _column(records, field, is_text):
+    values = [_lookup(record, field) for record in records]
+    if is_text:
+        return np.array(values, dtype=object)
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+def _as_column(values, count, is_text):
+    if values is None:
+        return np.full(count, None if is_text else np.nan, dtype=object if is_text else np.float64)
+    return np.asarray(values, dtype=object if is_text else np.float64)
+
+def _compare(column, compare, value):
+    with np.errstate(invalid='ignore'):
+        return np.asarray(compare(column, value), dtype=bool)
+
+# ============================================
+# 규칙 로드 및 스냅샷 평가
+# ============================================
+
+_rule_sets = {}
+
+def load_rule_sets(path=SCORING_RULES_FILE):
+    """규칙 파일 로드 후 컴파일 (기존 컴파일 결과 교체)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+    _rule_sets.clear()
+    _rule_sets.update({name: CompiledRuleSet(spec) for name, spec in specs.items()})
+    return _rule_sets
+
+def get_rule_set(name):
+    """컴파일된 규칙 묶음 (최초 사용 시 로드)"""
+    if not _rule_sets:
+        load_rule_sets()
+    return _rule_sets[name]
+
+def score_records(records, name):
+    """레코드 리스트 평가 - [(점수, 신호 라벨, 레벨), ...]"""
+    if not records:
+        return []
+    scores, signals, levels = get_rule_set(name).evaluate(records)
+    return list(zip(scores.tolist(), signals, levels))
+
+def score_columns(columns, name, count):
+    """필드별 배열 평가 (백테스트 등 대량 평가용, 신호 라벨 생략) - (점수 배열, 레벨 순위 배열)"""
+    scores, ranks, _ = get_rule_set(name).evaluate_columns(columns, count)
+    return scores, ranks
+
+def score_snapshot(market_snapshot, name, level_key):
+    """스냅샷 전체 평가 후 각 코인에 score/signals/레벨 기록 (이미 평가된 스냅샷은 건너뜀)"""
+    pending = [item for item in market_snapshot if 'score' not in item]
+    for item, (score, signals, level) in zip(pending, score_records(pending, name)):
+        item['score'] = score
+        item['signals'] = signals
+        item[level_key] = level
+    return market_snapshot
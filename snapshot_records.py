@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스캔 스냅샷 레코드 (__slots__ 고정 필드)
+- 코인별 스냅샷과 중첩 피처(단기/일봉/호가창/지표)를 dict 대신 슬롯 객체로 보관
+- 점수 평가 / Excel / 리포트는 기존 dict 와 같은 item['coin'], item.get('short_term') 접근 사용
+- JSON 형태 변환은 히스토리 저장(to_dict) / 로드(from_dict) 경계에서만 수행
+"""
+
+import sys
+
+# ============================================
+# 기반 클래스
+# ============================================
+
+class Record:
+    """고정 필드 레코드 (필드 = __slots__ 순서 = JSON 키 순서, 값이 없으면 None)"""
+
+    __slots__ = ()
+    # 필드 → 중첩 레코드 클래스
+    NESTED = {}
+
+    def __init__(self, **values):
+        unknown = values.keys() - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"{type(self).__name__}: 알 수 없는 필드 {sorted(unknown)}")
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    # ---------- dict 호환 접근 ----------
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        """값이 채워진 필드만 포함 (점수 평가 전 'score' in item → False)"""
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({values})'
+
+    # ---------- JSON 경계 ----------
+
+    def to_dict(self):
+        """기존 히스토리 JSON 형태 dict"""
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            result[name] = value.to_dict() if isinstance(value, Record) else value
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        """JSON dict → 레코드 (없는 필드는 무시, 문자열은 intern 으로 스캔 간 공유)"""
+        if data is None:
+            return None
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = data.get(name)
+            nested = cls.NESTED.get(name)
+            if nested is not None:
+                value = nested.from_dict(value)
+            elif isinstance(value, str):
+                value = sys.intern(value)
+            elif isinstance(value, list):
+                value = [sys.intern(item) if isinstance(item, str) else item for item in value]
+            setattr(record, name, value)
+        return record
+
+# ============================================
+# 급등 신호 (analyze_buy_signals)
+# ============================================
+
+class SurgeOrderbook(Record):
+    """호가창 매수/매도 압력 (+ 호가 샘플러 구간 변화, orderbook_sampler.DYNAMICS_FIELDS)"""
+    __slots__ = ('bid_ask_ratio', 'top3_ratio', 'imbalance', 'total_bid', 'total_ask',
+                 'imbalance_delta', 'bid_wall_persistence', 'ask_wall_persistence',
+                 'bid_wall_pulled', 'ask_wall_pulled')
+
+class SurgeRecord(Record):
+    """5분봉 급등 피처 + 점수 (surge_features.compute_surge_features 필드)"""
+    __slots__ = ('timestamp', 'coin', 'price', 'volume', 'volume_ratio', 'volume_acceleration',
+                 'candle_change', 'price_change_5m', 'price_change_15m', 'consecutive_green',
+                 'consecutive_volume', 'buying_pressure', 'breaking_high', 'orderbook',
+                 'score', 'signals', 'alert_level')
+    NESTED = {'orderbook': SurgeOrderbook}
+
+# ============================================
+# 실시간 모니터링 (analyze_realtime_monitor)
+# ============================================
+
+class ShortTermFeatures(Record):
+    """5분봉/15분봉 단기 피처 (surge_features.compute_short_term_features)"""
+    __slots__ = ('volume_5m_ratio', 'volume_15m_ratio', 'volume_surge_ratio', 'price_change_5m',
+                 'price_change_15m', 'consecutive_increase', 'bullish_ratio', 'current_price')
+
+class DailyVolumeFeatures(Record):
+    """일봉 거래량 / 축적 피처 (surge_features.compute_daily_volume_features)"""
+    __slots__ = ('volume_ratio', 'accumulation_index', 'price_change_7d', 'divergence',
+                 'current_volume', 'current_price')
+
+class IndicatorSummary(Record):
+    """기술적 지표 판정 (summarize_indicators)"""
+    __slots__ = ('rsi', 'rsi_signal', 'macd_signal', 'bb_signal', 'ma_signal',
+                 'volume_percent', 'volume_signal', 'current_price')
+
+class MonitorOrderbook(Record):
+    """호가창 물량 (+ 호가 샘플러 구간 변화, orderbook_sampler.DYNAMICS_FIELDS)"""
+    __slots__ = ('total_bid', 'total_ask', 'bid_ask_ratio', 'top_bid', 'top_ask',
+                 'imbalance_delta', 'bid_wall_persistence', 'ask_wall_persistence',
+                 'bid_wall_pulled', 'ask_wall_pulled')
+
+class MonitorRecord(Record):
+    """코인 종합 분석 + 신호 강도"""
+    __slots__ = ('timestamp', 'coin', 'price', 'short_term', 'volume_data', 'orderbook',
+                 'indicators', 'score', 'signals', 'signal_type')
+    NESTED = {
+        'short_term': ShortTermFeatures,
+        'volume_data': DailyVolumeFeatures,
+        'orderbook': MonitorOrderbook,
+        'indicators': IndicatorSummary
+    }
+
+# ============================================
+# 히스토리 변환
+# ============================================
+
+def snapshot_to_dicts(market_snapshot):
+    """스냅샷 → JSON 직렬화용 dict 리스트"""
+    return [item.to_dict() if isinstance(item, Record) else item for item in market_snapshot]
+
+def scan_from_dict(scan, record_class):
+    """히스토리 스캔 1회 {'scan_time', 'data'} → data 를 레코드로 변환"""
+    return {**scan, 'data': [record_class.from_dict(item) for item in scan.get('data', [])]}
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+웹소켓 실시간 체결 수집 및 급등 감지
+- 업비트 웹소켓 trade 피드 구독 (KRW 전체 마켓)
+- 체결 데이터로 5분봉/15분봉을 로컬에서 생성
+- 캔들이 갱신될 때마다 detect_price_surge 와 같은 피처/점수 규칙으로 평가
+- 녹화된 체결 데이터를 재생하는 로컬 웹소켓 서버 제공 (테스트/재현용)
+"""
+
+import websockets
+import numpy as np
+import pytz
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import uuid
+import time
+import os
+
+from surge_features import compute_surge_features, compute_short_term_features, feature_rows
+from signal_rules import score_records, get_rule_set
+from candle_ring import CandleRing
+
+KST = pytz.timezone('Asia/Seoul')
+
+# ============================================
+# 환경변수 설정
+# ============================================
+UPBIT_WEBSOCKET_URL = os.environ.get('UPBIT_WEBSOCKET_URL', 'wss://api.upbit.com/websocket/v1')
+STREAM_CANDLE_CAPACITY = int(os.environ.get('STREAM_CANDLE_CAPACITY', '100'))
+# 알림 기준 점수 (기본: scoring_rules.json 의 fast_signal cutoff)
+STREAM_ALERT_SCORE = int(os.environ.get('STREAM_ALERT_SCORE', get_rule_set('fast_signal').cutoff))
+# 코인별 최소 평가 간격 (체결 시각 기준 초)
+STREAM_EVAL_INTERVAL = float(os.environ.get('STREAM_EVAL_INTERVAL', '1.0'))
+
+STREAM_INTERVALS = (5, 15)
+KST_OFFSET_MS = 9 * 3600 * 1000
+
+# ============================================
+# 체결 → 분봉 생성
+# ============================================
+
+class TradeCandleBuilder:
+    """체결 데이터로 N분봉 생성 (코인별 capacity 크기 링 버퍼, 시각은 REST 캔들과 같은 KST)"""
+
+    def __init__(self, minutes, capacity=STREAM_CANDLE_CAPACITY):
+        self.minutes = minutes
+        self.step_ms = minutes * 60 * 1000
+        self.capacity = capacity
+        self.rings = {}
+
+    def seed(self, coin, df):
+        """REST 캔들로 초기 구간 채우기"""
+        self.rings[coin] = CandleRing.from_frame(df, self.capacity)
+
+    def add_trade(self, coin, timestamp_ms, price, volume):
+        """체결 1건 반영 (반영된 캔들 시작 시각 반환, 너무 늦은 체결은 None)"""
+        start = timestamp_ms - timestamp_ms % self.step_ms
+        time = np.datetime64(start + KST_OFFSET_MS, 'ms')
+        ring = self.rings.get(coin)
+        if ring is None:
+            ring = self.rings[coin] = CandleRing(self.capacity)
+
+        if ring.size and time <= ring.last_time():
+            # 진행 중인 캔들 갱신 (순서가 뒤바뀐 체결은 해당 캔들이 남아 있을 때만 반영)
+            offset = 0 if time == ring.last_time() else ring.find(time)
+            if offset is None:
+                return None
+            open_, high, low, _, total_volume, value = ring.row(offset)
+            ring.set_row(offset, (open_, max(high, price), min(low, price), price,
+                                  total_volume + volume, value + price * volume))
+        else:
+            ring.append(time, (price, price, price, price, volume, price * volume))
+        return start
+
+    def ohlcv(self, coin):
+        """(봉 수 × OHLCV) 배열 뷰, 오래된 순"""
+        ring = self.rings.get(coin)
+        if ring is None:
+            return np.empty((0, 5))
+        return ring.ohlcv()
+
+# ============================================
+# 실시간 급등 감지
+# ============================================
+
+class StreamSurgeDetector:
+    """체결 스트림 기반 급등 감지 (5분봉 fast_signal 규칙)"""
+
+    def __init__(self, on_alert=None, alert_score=STREAM_ALERT_SCORE, eval_interval=STREAM_EVAL_INTERVAL):
+        self.builders = {minutes: TradeCandleBuilder(minutes) for minutes in STREAM_INTERVALS}
+        self.on_alert = on_alert
+        self.alert_score = alert_score
+        self.eval_interval = eval_interval
+        self.last_eval = {}
+        self.last_alert = {}
+        self.stats = {'trades': 0, 'evaluations': 0, 'alerts': 0}
+
+    def seed(self, coin, frames):
+        """REST 캔들로 초기화 ({분: DataFrame})"""
+        for minutes, df in frames.items():
+            if df is not None and minutes in self.builders:
+                self.builders[minutes].seed(coin, df)
+
+    def on_trade(self, trade):
+        """체결 메시지 1건 처리 (알림이 발생하면 알림 dict 반환)"""
+        coin = trade['code']
+        timestamp_ms = int(trade['trade_timestamp'])
+        price = float(trade['trade_price'])
+        volume = float(trade['trade_volume'])
+        self.stats['trades'] += 1
+
+        candle_start = None
+        for minutes, builder in self.builders.items():
+            start = builder.add_trade(coin, timestamp_ms, price, volume)
+            if minutes == STREAM_INTERVALS[0]:
+                candle_start = start
+        if candle_start is None:
+            return None
+
+        now = timestamp_ms / 1000
+        if now - self.last_eval.get(coin, float('-inf')) < self.eval_interval:
+            return None
+        self.last_eval[coin] = now
+
+        return self.evaluate(coin, timestamp_ms, candle_start)
+
+    def evaluate(self, coin, timestamp_ms, candle_start):
+        """5분봉 급등 피처 계산 및 점수 평가"""
+        candles = self.builders[STREAM_INTERVALS[0]].ohlcv(coin)
+        if len(candles) < 20:
+            return None
+        self.stats['evaluations'] += 1
+
+        features = feature_rows([coin], compute_surge_features(candles[None, -50:]))[coin]
+        record = {
+            'timestamp': datetime.fromtimestamp(timestamp_ms / 1000, KST).isoformat(),
+            'coin': coin,
+            **features,
+            'orderbook': None
+        }
+        score, signals, alert_level = score_records([record], 'fast_signal')[0]
+        if score < self.alert_score:
+            return None
+
+        # 같은 5분봉에서는 점수가 오를 때만 다시 알림
+        previous = self.last_alert.get(coin)
+        if previous and previous[0] == candle_start and previous[1] >= score:
+            return None
+        self.last_alert[coin] = (candle_start, score)
+
+        alert = {**record, 'score': score, 'signals': signals, 'alert_level': alert_level,
+                 'short_term': self.short_term_features(coin)}
+        self.stats['alerts'] += 1
+        if self.on_alert:
+            self.on_alert(alert)
+        return alert
+
+    def short_term_features(self, coin):
+        """5분봉/15분봉 단기 피처 (analyze_realtime_monitor 와 같은 계산, 봉 부족 시 None)"""
+        ohlcv_5m = self.builders[5].ohlcv(coin)
+        ohlcv_15m = self.builders[15].ohlcv(coin)
+        if len(ohlcv_5m) < 13 or len(ohlcv_15m) < 4:
+            return None
+        features = compute_short_term_features(ohlcv_5m[None, -100:], ohlcv_15m[None, -100:])
+        return feature_rows([coin], features)[coin]
+
+# ============================================
+# 웹소켓 수신
+# ============================================
+
+def _subscribe_message(codes):
+    return json.dumps([
+        {'ticket': str(uuid.uuid4())},
+        {'type': 'trade', 'codes': list(codes), 'isOnlyRealtime': True},
+        {'format': 'DEFAULT'}
+    ])
+
+async def stream_trades(codes, handle_trade, url=UPBIT_WEBSOCKET_URL, reconnect=True):
+    """trade 피드 구독 후 체결마다 handle_trade 호출 (끊기면 재접속)"""
+    backoff = 1
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=60, max_size=None) as websocket:
+                await websocket.send(_subscribe_message(codes))
+                backoff = 1
+                async for raw in websocket:
+                    message = json.loads(raw)
+                    if message.get('type') == 'trade':
+                        handle_trade(message)
+        except (websockets.ConnectionClosed, OSError) as e:
+            if not reconnect:
+                raise
+            print(f"⚠️ 웹소켓 연결 끊김: {e} - {backoff}초 후 재접속")
+        else:
+            if not reconnect:
+                return
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60)
+
+async def record_trades(path, codes, duration, url=UPBIT_WEBSOCKET_URL):
+    """실제 체결 피드를 JSONL 로 녹화 (재생 서버 입력용)"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        def write(trade):
+            nonlocal count
+            f.write(json.dumps(trade, ensure_ascii=False) + '\n')
+            count += 1
+        try:
+            await asyncio.wait_for(stream_trades(codes, write, url), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+    print(f"✅ 체결 녹화: {count}건 → {path}")
+    return count
+
+# ============================================
+# 로컬 재생 서버 (업비트 웹소켓 대역)
+# ============================================
+
+def load_recorded_trades(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+async def serve_replay(trades, host='127.0.0.1', port=8765, speed=0.0, ready=None):
+    """녹화된 체결을 구독 코드에 맞춰 순서대로 보내는 웹소켓 서버 (speed=0 이면 지연 없이)"""
+
+    async def handler(websocket, path=None):
+        request = json.loads(await websocket.recv())
+        codes = set()
+        for part in request:
+            codes.update(part.get('codes', []))
+
+        previous_ms = None
+        for trade in trades:
+            if trade['code'] not in codes:
+                continue
+            if speed > 0 and previous_ms is not None:
+                await asyncio.sleep(max(0, trade['trade_timestamp'] - previous_ms) / 1000 / speed)
+            previous_ms = trade['trade_timestamp']
+            # 업비트와 같이 바이너리 프레임으로 전송
+            await websocket.send(json.dumps(trade, ensure_ascii=False).encode('utf-8'))
+        await websocket.close()
+
+    async with websockets.serve(handler, host, port):
+        if ready is not None:
+            ready.set()
+        await asyncio.Future()
+
+async def replay_session(trades, detector, codes=None, port=8765, speed=0.0):
+    """재생 서버를 띄우고 같은 이벤트 루프에서 감지기를 연결 (끝까지 재생 후 종료)"""
+    codes = codes or sorted({trade['code'] for trade in trades})
+    ready = asyncio.Event()
+    server = asyncio.create_task(serve_replay(trades, port=port, speed=speed, ready=ready))
+    await ready.wait()
+    try:
+        await stream_trades(codes, detector.on_trade, url=f'ws://127.0.0.1:{port}', reconnect=False)
+    finally:
+        server.cancel()
+    return detector.stats
+
+# ============================================
+# 메인
+# ============================================
+
+def print_alert(alert):
+    coin_name = alert['coin'].replace('KRW-', '')
+    print(f"🚨 {alert['timestamp'][11:19]} {coin_name} {alert['score']}/{get_rule_set('fast_signal').max_score} {alert['alert_level']} "
+          f"| 거래량 {alert['volume_ratio']:.2f}배, 5분 {alert['price_change_5m']:+.2f}% "
+          f"| {', '.join(alert['signals'])}")
+
+def seed_detector(detector, tickers):
+    """REST 캔들로 감지기 초기화 (스트림 시작 직후부터 20봉 확보)"""
+    from market_fetcher import fetch_concurrently, get_ohlcv
+
+    def fetch(coin):
+        return {minutes: get_ohlcv(coin, interval=f"minute{minutes}", count=STREAM_CANDLE_CAPACITY)
+                for minutes in STREAM_INTERVALS}
+
+    frames = fetch_concurrently(tickers, fetch)
+    for coin, coin_frames in frames.items():
+        detector.seed(coin, coin_frames)
+    print(f"✅ 초기 캔들 로드: {len(frames)}개 코인")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="웹소켓 실시간 급등 감지")
+    parser.add_argument('--url', default=UPBIT_WEBSOCKET_URL, help="웹소켓 주소 (로컬 재생 서버 등)")
+    parser.add_argument('--no-seed', action='store_true', help="REST 초기 캔들 로드 생략")
+    parser.add_argument('--replay', metavar='FILE', help="녹화 파일을 로컬 재생 서버로 재생하며 감지")
+    parser.add_argument('--serve-replay', metavar='FILE', help="녹화 파일 재생 서버만 실행")
+    parser.add_argument('--record', metavar='FILE', help="실제 체결 피드 녹화")
+    parser.add_argument('--duration', type=float, default=600, help="녹화 시간(초)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=0.0, help="재생 배속 (0: 지연 없음)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.serve_replay:
+            print(f"▶️ 재생 서버: ws://127.0.0.1:{args.port}")
+            asyncio.run(serve_replay(load_recorded_trades(args.serve_replay), port=args.port, speed=args.speed))
+            return
+
+        if args.replay:
+            detector = StreamSurgeDetector(on_alert=print_alert)
+            started = time.time()
+            stats = asyncio.run(replay_session(load_recorded_trades(args.replay), detector,
+                                               port=args.port, speed=args.speed))
+            print(f"✅ 재생 완료: 체결 {stats['trades']}건, 평가 {stats['evaluations']}회, "
+                  f"알림 {stats['alerts']}건 ({time.time() - started:.2f}초)")
+            return
+
+        from market_fetcher import get_tickers
+        tickers = get_tickers(fiat="KRW")
+
+        if args.record:
+            asyncio.run(record_trades(args.record, tickers, args.duration, url=args.url))
+            return
+
+        detector = StreamSurgeDetector(on_alert=print_alert)
+        if not args.no_seed:
+            seed_detector(detector, tickers)
+        print(f"📡 실시간 체결 구독: {len(tickers)}개 마켓")
+        asyncio.run(stream_trades(tickers, detector.on_trade, url=args.url))
+    except KeyboardInterrupt:
+        print("\n🛑 프로그램 종료")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+급등 감지 피처 일괄 계산 엔진
+- 전체 코인 캔들을 (코인 × 시간 × OHLCV) 배열로 쌓아 한 번에 계산
+- detect_price_surge / analyze_short_term_volume / analyze_volume / 백테스트 공용
+"""
+
+import numpy as np
+
+# 배열 마지막 축 순서
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# ============================================
+# 배열 구성
+# ============================================
+
+def stack_candles(frames, length):
+    """코인별 캔들(OHLCV 배열 또는 DataFrame)을 (코인 × 시간 × OHLCV) 배열로 변환 (오른쪽 정렬, 부족분 NaN)"""
+    coins = list(frames.keys())
+    stacked = np.full((len(coins), length, len(OHLCV_COLUMNS)), np.nan)
+
+    for row, coin in enumerate(coins):
+        frame = frames[coin]
+        if not isinstance(frame, np.ndarray):
+            frame = frame[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+        values = frame[-length:]
+        stacked[row, length - len(values):] = values
+
+    return coins, stacked
+
+# ============================================
+# 공용 연산
+# ============================================
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+def _pct_change(current, base):
+    return (current - base) / base * 100
+
+def _run_length(condition):
+    """최근 봉부터 조건이 연속으로 참인 개수 (condition[:, 0]이 가장 최근)"""
+    return np.cumprod(condition, axis=1).sum(axis=1)
+
+def _volume_run(volume, max_run):
+    """거래량 연속 증가 횟수"""
+    recent = volume[:, -max_run:][:, ::-1]
+    previous = volume[:, -max_run - 1:-1][:, ::-1]
+    return _run_length(recent > previous)
+
+def _green_run(ohlcv, max_run):
+    """연속 양봉 개수"""
+    recent = ohlcv[:, -max_run:][:, ::-1]
+    return _run_length(recent[:, :, CLOSE] > recent[:, :, OPEN])
+
+def _green_ratio(ohlcv, window):
+    """최근 window개 봉 중 양봉 비율"""
+    recent = ohlcv[:, -window:]
+    return (recent[:, :, CLOSE] > recent[:, :, OPEN]).sum(axis=1) / window
+
+# ============================================
+# 피처 계산
+# ============================================
+
+def compute_surge_features(ohlcv):
+    """5분봉 초단타 급등 피처 (analyze_buy_signals)"""
+    close = ohlcv[:, :, CLOSE]
+    volume = ohlcv[:, :, VOLUME]
+
+    current_volume = volume[:, -1]
+    current_price = close[:, -1]
+
+    avg_volume = np.nanmean(volume[:, -11:-1], axis=1)
+    recent_3_volume = np.nansum(volume[:, -3:], axis=1)
+    prev_10_volume = np.nansum(volume[:, -13:-3], axis=1)
+
+    current_open = ohlcv[:, -1, OPEN]
+    high_20 = np.nanmax(ohlcv[:, -21:-1, HIGH], axis=1)
+
+    return {
+        'price': current_price,
+        'volume': current_volume,
+        'volume_ratio': _ratio(current_volume, avg_volume),
+        'volume_acceleration': _ratio(recent_3_volume, prev_10_volume),
+        'candle_change': _pct_change(current_price, current_open),
+        'price_change_5m': _pct_change(current_price, close[:, -2]),
+        'price_change_15m': _pct_change(current_price, close[:, -4]),
+        'consecutive_green': _green_run(ohlcv, 5),
+        'consecutive_volume': _volume_run(volume, 4),
+        'buying_pressure': _green_ratio(ohlcv, 5),
+        'breaking_high': current_price > high_20
+    }
+
+def compute_short_term_features(ohlcv_5m, ohlcv_15m):
+    """5분봉/15분봉 단기 급등 피처 (analyze_realtime_monitor)"""
+    close_5m = ohlcv_5m[:, :, CLOSE]
+    volume_5m = ohlcv_5m[:, :, VOLUME]
+    close_15m = ohlcv_15m[:, :, CLOSE]
+    volume_15m = ohlcv_15m[:, :, VOLUME]
+
+    volume_5m_ma_10 = volume_5m[:, -10:].mean(axis=1)
+    volume_15m_ma_10 = volume_15m[:, -10:].mean(axis=1)
+    recent_3_volume = volume_5m[:, -3:].mean(axis=1)
+    prev_10_volume = np.nanmean(volume_5m[:, -13:-3], axis=1)
+
+    return {
+        'volume_5m_ratio': _ratio(volume_5m[:, -1], volume_5m_ma_10),
+        'volume_15m_ratio': _ratio(volume_15m[:, -1], volume_15m_ma_10),
+        'volume_surge_ratio': _ratio(recent_3_volume, prev_10_volume),
+        'price_change_5m': _pct_change(close_5m[:, -1], close_5m[:, -4]),
+        'price_change_15m': _pct_change(close_15m[:, -1], close_15m[:, -4]),
+        'consecutive_increase': _volume_run(volume_5m, 4),
+        'bullish_ratio': _green_ratio(ohlcv_5m, 10),
+        'current_price': close_5m[:, -1]
+    }
+
+def compute_daily_volume_features(ohlcv):
+    """일봉 거래량 / 축적 피처 (analyze_realtime_monitor, 마지막 봉 = 진행 중인 일봉, 최소 20봉)"""
+    close = ohlcv[:, :, CLOSE]
+    volume = ohlcv[:, :, VOLUME]
+
+    current_volume = volume[:, -1]
+    current_price = close[:, -1]
+
+    volume_ma_20 = volume[:, -20:].mean(axis=1)
+    volume_ma_7 = volume[:, -7:].mean(axis=1)
+    volume_ma_14 = volume[:, -14:].mean(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change_1d = np.abs(_pct_change(current_price, close[:, -2]))
+        volume_change_1d = _pct_change(current_volume, volume[:, -2])
+        return {
+            'volume_ratio': current_volume / volume_ma_20,
+            'accumulation_index': _pct_change(volume_ma_7, volume_ma_14),
+            'price_change_7d': np.abs(_pct_change(current_price, close[:, -8])),
+            'divergence': np.where(price_change_1d > 0, volume_change_1d / price_change_1d, 0.0),
+            'current_volume': current_volume,
+            'current_price': current_price
+        }
+
+def feature_rows(coins, features, record_class=dict):
+    """코인별 피처 dict(또는 record_class 레코드)로 분리 (JSON 직렬화 가능한 파이썬 스칼라)"""
+    columns = {name: values.tolist() for name, values in features.items()}
+    return {
+        coin: record_class(**{name: values[row] for name, values in columns.items()})
+        for row, coin in enumerate(coins)
+    }
@@ -0,0 +1,80 @@
+"""HistoryLog 끊긴 쓰기 복구 / 세그먼트 단위 보관"""
+
+from datetime import datetime, timedelta
+import os
+
+import pytest
+
+from history_log import HistoryLog
+
+START = datetime(2024, 3, 1, 22, 0)
+
+def make_scan(number):
+    # 2시간 간격 → 여러 날짜 번들로 나뉨
+    return {'scan_time': (START + timedelta(hours=2 * number)).isoformat(), 'data': [{'seq': number}]}
+
+def seqs(scans):
+    return [scan['data'][0]['seq'] for scan in scans]
+
+def active_segment(log):
+    return os.path.join(log.directory, log._load_manifest()['segments'][-1]['file'])
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_torn_write_is_ignored_and_truncated(tmp_path, compress):
+    log = HistoryLog(str(tmp_path / 'history'), retention=100, segment_scans=10,
+                     compress=compress, archive=False)
+    for number in range(3):
+        log.append(make_scan(number))
+
+    # 확정되지 않은 쓰기 (manifest 갱신 전에 중단)
+    with open(active_segment(log), 'ab') as f:
+        f.write(b'{"scan_time": "2024-03-0')
+    assert seqs(log.read_latest()) == [0, 1, 2]
+
+    log.append(make_scan(3))
+    assert seqs(log.read_latest()) == [0, 1, 2, 3]
+    assert seqs(log.read_latest(2)) == [2, 3]
+    assert os.path.getsize(active_segment(log)) == log._load_manifest()['segments'][-1]['bytes']
+
+def test_retention_archives_dropped_segments(tmp_path):
+    log = HistoryLog(str(tmp_path / 'history'), retention=5, segment_scans=2, compress=True, archive=True)
+    total = 15
+    for number in range(total):
+        log.append(make_scan(number))
+
+    kept = seqs(log.read_latest())
+    # 세그먼트 단위로 내보내므로 retention 이상, retention + 세그먼트 크기 미만 유지
+    assert 5 <= len(kept) < 5 + 2
+    assert kept == list(range(total - len(kept), total))
+    assert seqs(log.read_latest(5)) == list(range(total - 5, total))
+
+    archived = [seq for day in log.archive.days() for seq in seqs(log.read_archived(day))]
+    assert sorted(archived) == archived
+    assert len(set(archived)) == len(archived)
+    assert archived + kept == list(range(total))
+
+    # 보관된 세그먼트 파일은 삭제
+    files = {name for name in os.listdir(log.directory) if name.startswith('segment_')}
+    assert files == {segment['file'] for segment in log._load_manifest()['segments']}
+
+def test_archive_before_manifest_crash_does_not_duplicate(tmp_path, monkeypatch):
+    log = HistoryLog(str(tmp_path / 'history'), retention=3, segment_scans=2, compress=True, archive=True)
+    for number in range(4):
+        log.append(make_scan(number))
+
+    # 오래된 세그먼트를 보관한 직후 manifest 저장 전에 중단
+    def crash(manifest):
+        raise OSError('crash')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(log, '_save_manifest', crash)
+        with pytest.raises(OSError):
+            log.append(make_scan(4))
+    assert seqs(log.read_latest()) == [0, 1, 2, 3]
+
+    # 재시도하면 같은 세그먼트를 다시 보관하지만 중복 없이 이어짐
+    log.append(make_scan(4))
+    log.append(make_scan(5))
+    kept = seqs(log.read_latest())
+    archived = [seq for day in log.archive.days() for seq in seqs(log.read_archived(day))]
+    assert archived + kept == list(range(6))
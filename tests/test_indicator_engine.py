@@ -0,0 +1,67 @@
+"""IndicatorEngine / compute_indicators 와 ta 라이브러리 계산값 비교"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+from indicator_engine import IndicatorEngine, compute_indicators
+
+WINDOW = 100
+
+def make_candles(count, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, count)))
+    volume = rng.lognormal(10, 0.5, count)
+    index = pd.date_range('2024-01-01 09:00', periods=count, freq='D')
+    return pd.DataFrame({'close': close, 'volume': volume}, index=index)
+
+def ta_values(df):
+    """기존 calculate_indicators 와 같은 ta 호출 (마지막 캔들 기준)"""
+    close = df['close']
+    macd = ta.trend.MACD(close)
+    bollinger = ta.volatility.BollingerBands(close)
+    return {
+        'rsi': ta.momentum.RSIIndicator(close, window=14).rsi().iloc[-1],
+        'macd': macd.macd().iloc[-1],
+        'macd_signal': macd.macd_signal().iloc[-1],
+        'bb_high': bollinger.bollinger_hband().iloc[-1],
+        'bb_low': bollinger.bollinger_lband().iloc[-1],
+        'ma_short': close.rolling(5).mean().iloc[-1],
+        'ma_long': close.rolling(20).mean().iloc[-1],
+        'volume_ma': df['volume'].rolling(20).mean().iloc[-1]
+    }
+
+def assert_matches(values, expected):
+    for name, value in expected.items():
+        assert values[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+def test_cold_start_matches_ta():
+    df = make_candles(WINDOW)
+    assert_matches(IndicatorEngine().update('KRW-TEST', 'day', df), ta_values(df))
+
+def test_sliding_window_matches_ta():
+    """상주 실행: 최근 100봉 창이 하루씩 밀려도 같은 창의 ta 값과 일치"""
+    candles = make_candles(WINDOW + 60)
+    engine = IndicatorEngine()
+    for end in range(WINDOW, len(candles) + 1):
+        df = candles.iloc[end - WINDOW:end]
+        assert_matches(engine.update('KRW-TEST', 'day', df), ta_values(df))
+
+def test_in_progress_candle_updates_match_ta():
+    """같은 창에서 진행 중인 캔들만 바뀌는 반복 스캔 (증분 경로)"""
+    candles = make_candles(WINDOW + 5)
+    engine = IndicatorEngine()
+    for end in range(WINDOW, len(candles) + 1):
+        for factor in (0.97, 1.0, 1.04):
+            df = candles.iloc[end - WINDOW:end].copy()
+            df.iloc[-1, df.columns.get_loc('close')] *= factor
+            assert_matches(engine.update('KRW-TEST', 'day', df), ta_values(df))
+
+def test_compute_indicators_matches_engine():
+    candles = make_candles(WINDOW + 30)
+    engine = IndicatorEngine()
+    for end in range(WINDOW, len(candles) + 1):
+        df = candles.iloc[end - WINDOW:end]
+        stateless = compute_indicators(df['close'].to_numpy(), df['volume'].to_numpy())
+        assert_matches(engine.update('KRW-TEST', 'day', df), stateless)
@@ -0,0 +1,105 @@
+"""WorkQueue 임대 / 만료 회수 / 실패 처리 / 동시 임대"""
+
+import threading
+import time
+
+from work_queue import WorkQueue
+
+LEASE_SEC = 0.2
+
+def make_queue(tmp_path, **kwargs):
+    return WorkQueue(str(tmp_path / 'queue.sqlite3'), lease_sec=LEASE_SEC, **kwargs)
+
+def test_expired_lease_is_reclaimed_by_another_owner(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put('batch', [{'markets': ['KRW-A']}])
+
+    first = queue.lease('worker-a')
+    assert first is not None and first.attempts == 1
+    assert queue.lease('worker-b') is None
+
+    time.sleep(LEASE_SEC * 1.5)
+    assert queue.counts('batch') == {'pending': 1}
+    second = queue.lease('worker-b')
+    assert second is not None
+    assert (second.id, second.attempts, second.payload) == (first.id, 2, {'markets': ['KRW-A']})
+
+    # 임대를 잃은 이전 워커의 결과는 버려지고 현재 임대자 결과만 저장
+    assert not queue.renew(first, 'worker-a')
+    assert not queue.complete(first, 'worker-a', {'from': 'a'})
+    assert queue.complete(second, 'worker-b', {'from': 'b'})
+    assert queue.results('batch') == [(0, {'from': 'b'})]
+    assert queue.unfinished('batch') == []
+
+def test_renew_keeps_lease(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put('batch', [{}])
+    task = queue.lease('worker-a')
+
+    for _ in range(3):
+        time.sleep(LEASE_SEC / 2)
+        assert queue.renew(task, 'worker-a')
+    assert queue.lease('worker-b') is None
+
+def test_task_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.put('batch', [{'seq': 0}])
+
+    for owner in ('worker-a', 'worker-b'):
+        assert queue.lease(owner) is not None
+        time.sleep(LEASE_SEC * 1.5)
+
+    assert queue.lease('worker-c') is None
+    [(seq, payload, state, error)] = queue.unfinished('batch')
+    assert (seq, payload, state) == (0, {'seq': 0}, 'failed')
+    assert error
+    assert queue.counts('batch') == {'failed': 1}
+
+def test_fail_requeues_until_attempts_run_out(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.put('batch', [{}])
+
+    task = queue.lease('worker-a')
+    assert queue.fail(task, 'worker-a', RuntimeError('boom')) == 'pending'
+    task = queue.lease('worker-b')
+    assert task.attempts == 2
+    assert queue.fail(task, 'worker-b', RuntimeError('boom')) == 'failed'
+
+    assert queue.lease('worker-c') is None
+    assert queue.unfinished('batch') == [(0, {}, 'failed', 'boom')]
+
+def test_concurrent_lease_hands_out_each_task_once(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite3'), lease_sec=60)
+    tasks = 60
+    queue.put('batch', [{'seq': seq} for seq in range(tasks)])
+
+    leased = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(owner):
+        start.wait()
+        try:
+            while True:
+                task = queue.lease(owner, 'batch')
+                if task is None:
+                    return
+                completed = queue.complete(task, owner, {'owner': owner})
+                with lock:
+                    leased.append((task.id, completed))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(f'worker-{index}',)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    ids = [task_id for task_id, _ in leased]
+    assert len(ids) == tasks
+    assert len(set(ids)) == tasks
+    assert all(completed for _, completed in leased)
+    assert [seq for seq, _ in queue.results('batch')] == list(range(tasks))
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+점수 규칙 임계값 스윕 (병렬)
+- 백테스트 히스토리로 봉별 피처를 한 번만 계산, 후보 임계값 기준 구간 번호로 바꿔
+  (고정 규칙 점수, 필드별 구간) 이 같은 봉끼리 셀로 묶은 뒤 공유 메모리에 올림
+- 규칙 단계별 임계값 조합 × 점수 컷오프 전체를 프로세스 풀에서 병렬 평가
+- 보유 기간 수익률 / 적중률 기준 순위표 출력 (현재 scoring_rules.json 값과 비교)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import numpy as np
+import argparse
+import time
+import json
+import os
+from backtest import (
+    BACKTEST_DATA_DIR, CLOSE, MIN_INTRADAY_CANDLES, load_history, evaluation_start, stored_markets,
+    coin_columns, forward_returns
+)
+from signal_rules import SCORING_RULES_FILE, CompiledRuleSet
+from shard_pool import share_arrays, attach_arrays, release_arrays
+
+# ============================================
+# 환경변수 설정
+# ============================================
+SWEEP_WORKERS = int(os.environ.get('SWEEP_WORKERS', '0')) or os.cpu_count() or 1
+
+# 규칙 필드별 단계 임계값 후보 (단계 순서대로, null 이면 현재 값 고정)
+DEFAULT_GRID = {
+    'fast_signal': {
+        # 거래량 배수 (VOLUME_SPIKE_THRESHOLD 계열)
+        'volume_ratio': [[2.5, 3.0, 4.0], [1.8, 2.0, 2.5], [1.2, 1.5]],
+        # 5분 가격변화 (PRICE_CHANGE_THRESHOLD 계열)
+        'price_change_5m': [[4, 5, 6], [2.5, 3], [1.5, 2]],
+        # 연속 양봉 (CONSECUTIVE_THRESHOLD 계열)
+        'consecutive_green': [[4, 5], [2, 3]],
+        'volume_acceleration': [[1.5, 2.0, 3.0]]
+    },
+    'signal_strength': {
+        # 5분봉 거래량 (VOLUME_THRESHOLD_STRONG / VOLUME_THRESHOLD_WATCH)
+        'short_term.volume_5m_ratio': [[1.8, 2.0, 2.5, 3.0], [1.2, 1.3, 1.5]],
+        'short_term.price_change_5m': [[4, 5, 6], [2, 3]],
+        'short_term.consecutive_increase': [[2, 3, 4]],
+        'short_term.volume_15m_ratio': [[1.5, 2.0, 2.5, 3.0]],
+        'volume_data.volume_ratio': [[1.5, 2.0, 2.5, 3.0]]
+    }
+}
+
+# ============================================
+# 스윕 구성
+# ============================================
+
+BUCKET_SIDES = {'>=': 'right', '>': 'left', '<=': 'left', '<': 'right'}
+
+def _ordered(op, values):
+    """단계는 if/elif 순서로 적용되므로 위 단계가 더 엄격해야 함"""
+    for upper, lower in zip(values, values[1:]):
+        if op in ('>=', '>') and not upper > lower:
+            return False
+        if op in ('<=', '<') and not upper < lower:
+            return False
+    return True
+
+def _points_table(rule, option):
+    """임계값 구간 번호 → 점수 (구간 b: 후보 임계값 중 조건을 만족하는 경계 수, 마지막은 결측)"""
+    thresholds = rule['thresholds']
+    positions = [int(np.searchsorted(thresholds, value)) for value in option]
+    table = np.zeros(len(thresholds) + 2, dtype=np.intp)
+    for bucket in range(len(thresholds) + 1):
+        for position, points in zip(positions, rule['points']):
+            if (bucket > position) if rule['op'] in ('>=', '>') else (bucket <= position):
+                table[bucket] = points
+                break
+    return table
+
+def bucketize(rule, values):
+    """필드 값 → 후보 임계값 기준 구간 번호 (임계값 조합이 바뀌어도 재계산 불필요)"""
+    values = np.asarray(values, dtype=np.float64)
+    buckets = np.searchsorted(rule['thresholds'], values, side=BUCKET_SIDES[rule['op']])
+    buckets[np.isnan(values)] = len(rule['thresholds']) + 1
+    return buckets.astype(np.int16)
+
+def build_sweep(name, grid, rules_path=SCORING_RULES_FILE):
+    """(스윕 규칙 목록, 고정 규칙 묶음, 최고 점수)
+    스윕 규칙 = {'field', 'op', 'points', 'current', 'options'(단계 임계값 조합), 'thresholds', 'tables'}"""
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)[name]
+
+    swept, swept_index = [], set()
+    for field, candidates in grid.items():
+        index = next((i for i, rule in enumerate(spec['rules']) if rule.get('field') == field), None)
+        if index is None:
+            raise ValueError(f"{name} 에 '{field}' 규칙 없음")
+        tiers = spec['rules'][index]['tiers']
+        ops = {tier.get('op') for tier in tiers}
+        if len(ops) != 1 or not ops <= set(BUCKET_SIDES):
+            raise ValueError(f"단계가 같은 크기 비교 연산자가 아닌 규칙은 스윕 불가: {field}")
+        if len(candidates) != len(tiers):
+            raise ValueError(f"'{field}' 단계 수 불일치: 후보 {len(candidates)}개 / 규칙 {len(tiers)}개")
+
+        op = ops.pop()
+        current = tuple(tier['value'] for tier in tiers)
+        values = [values or [tier['value']] for values, tier in zip(candidates, tiers)]
+        options = [option for option in product(*values) if _ordered(op, option)]
+        if current not in options:
+            options.append(current)
+        rule = {
+            'field': field,
+            'op': op,
+            'points': [tier['points'] for tier in tiers],
+            'current': current,
+            'options': options,
+            'thresholds': np.unique(np.asarray([value for option in options for value in option], dtype=np.float64))
+        }
+        rule['tables'] = [_points_table(rule, option) for option in options]
+        swept.append(rule)
+        swept_index.add(index)
+
+    top = CompiledRuleSet(spec).max_score
+    fixed = CompiledRuleSet(dict(spec, rules=[rule for i, rule in enumerate(spec['rules']) if i not in swept_index]))
+    return swept, fixed, top
+
+_TASK = {}
+
+def _init_task(task):
+    _TASK.update(task)
+
+def _coin_parts(coin):
+    """코인 1개의 평가 대상 봉 (수익률이 있는 봉) → {'fixed', 'returns', 'bucket:필드'}, 없으면 None"""
+    name, swept, fixed, root = _TASK['name'], _TASK['swept'], _TASK['fixed'], _TASK['root']
+    minute5, day = load_history(coin, 'minute5', root), load_history(coin, 'day', root)
+    if minute5 is None or day is None or len(minute5[0]) < MIN_INTRADAY_CANDLES:
+        return None
+    (times_5m, ohlcv_5m), (times_day, ohlcv_day) = minute5, day
+
+    columns, valid = coin_columns(times_5m, ohlcv_5m, times_day, ohlcv_day)[name]
+    returns = forward_returns(times_5m, ohlcv_5m[:, CLOSE], [_TASK['horizon']])[:, 0]
+    rows = valid & (times_5m >= _TASK['start']) & np.isfinite(returns)
+    if not rows.any():
+        return None
+    fixed_scores, _, _ = fixed.evaluate_columns(columns, len(times_5m))
+
+    parts = {'fixed': fixed_scores[rows].astype(np.int16), 'returns': returns[rows]}
+    for rule in swept:
+        parts[f"bucket:{rule['field']}"] = bucketize(rule, columns[rule['field']])[rows]
+    return parts
+
+def prepare_cells(task, markets, hit_threshold=0.0, workers=SWEEP_WORKERS):
+    """평가 대상 봉을 (고정 규칙 점수, 필드별 구간) 이 같은 셀로 묶어 집계 (코인별 피처 계산은 병렬)
+    → 셀 배열 {'fixed', 'bucket:필드', 'count', 'returns', 'hits'}, 봉 수"""
+    if workers <= 1:
+        _init_task(task)
+        results = [_coin_parts(coin) for coin in markets]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_task, initargs=(task,)) as executor:
+            results = list(executor.map(_coin_parts, markets, chunksize=4))
+
+    results = [parts for parts in results if parts is not None]
+    if not results:
+        return None, 0
+    keys = [key for key in results[0] if key != 'returns']
+    returns = np.concatenate([parts['returns'] for parts in results])
+    # 같은 셀의 봉은 임계값 조합과 관계없이 항상 같은 점수
+    cells, inverse = np.unique(np.stack([np.concatenate([parts[key] for parts in results]) for key in keys], axis=1),
+                               axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    arrays = {key: cells[:, column].astype(np.intp) for column, key in enumerate(keys)}
+    arrays['count'] = np.bincount(inverse, minlength=len(cells)).astype(np.float64)
+    arrays['returns'] = np.bincount(inverse, weights=returns, minlength=len(cells))
+    arrays['hits'] = np.bincount(inverse, weights=returns > hit_threshold, minlength=len(cells))
+    return arrays, len(returns)
+
+# ============================================
+# 병렬 평가 (공유 메모리)
+# ============================================
+
+_SHARED = {}
+_BLOCKS = []
+
+def _attach(layout, tables, size):
+    """워커 초기화: 공유 메모리를 복사 없이 배열로 연결"""
+    arrays, blocks = attach_arrays(layout)
+    _SHARED.update(arrays)
+    _BLOCKS.extend(blocks)
+    _SHARED['tables'] = tables
+    _SHARED['size'] = size
+
+def evaluate_chunk(combos):
+    """조합(규칙별 옵션 번호) 목록 평가 → (조합 × 점수 × [봉 수, 수익률 합, 적중 수])
+    조합은 앞 규칙부터 정렬돼 있어 바뀐 규칙 이후의 부분 합만 다시 계산"""
+    tables, size = _SHARED['tables'], _SHARED['size']
+    results = np.zeros((len(combos), size, 3))
+    partial = [_SHARED['fixed']]
+    previous = None
+
+    for row, combo in enumerate(combos):
+        keep = 0
+        if previous is not None:
+            while keep < len(combo) and combo[keep] == previous[keep]:
+                keep += 1
+        del partial[keep + 1:]
+        for index in range(keep, len(tables)):
+            field, options = tables[index]
+            partial.append(partial[-1] + options[combo[index]][_SHARED[f'bucket:{field}']])
+
+        scores = partial[-1]
+        for column, key in enumerate(('count', 'returns', 'hits')):
+            results[row, :, column] = np.bincount(scores, weights=_SHARED[key], minlength=size)[:size]
+        previous = combo
+    return results
+
+def run_sweep(arrays, swept, size, workers=SWEEP_WORKERS):
+    """전체 조합 평가 → (조합 목록, 조합별 점수 통계)"""
+    combos = list(product(*[range(len(rule['options'])) for rule in swept]))
+    tables = [(rule['field'], rule['tables']) for rule in swept]
+
+    if workers <= 1 or len(combos) < 2:
+        _SHARED.update(arrays)
+        _SHARED['tables'], _SHARED['size'] = tables, size
+        return combos, evaluate_chunk(combos)
+
+    # 연속 구간으로 나눠야 워커 안에서 부분 합 재사용 가능 (워커당 4개 내외)
+    chunk_size = max(1, -(-len(combos) // (workers * 4)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    blocks, layout = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(layout, tables, size)) as executor:
+            results = list(executor.map(evaluate_chunk, chunks))
+    finally:
+        release_arrays(blocks)
+    return combos, np.concatenate(results)
+
+# ============================================
+# 순위표
+# ============================================
+
+def rank_results(combos, stats, swept, min_signals=100, sort='mean'):
+    """(조합, 컷오프) 별 신호 수 / 평균 수익률 / 적중률 → 순위순 행 목록"""
+    # 높은 점수부터 누적 → 컷오프 c 이상
+    cumulative = np.cumsum(stats[:, ::-1], axis=1)[:, ::-1]
+    count, total, hits = cumulative[..., 0], cumulative[..., 1], cumulative[..., 2]
+
+    rows = []
+    combo_index, cutoff = np.nonzero(count[:, 1:] >= max(min_signals, 1))
+    cutoff = cutoff + 1
+    selected = count[combo_index, cutoff]
+    mean = total[combo_index, cutoff] / selected
+    hit_rate = hits[combo_index, cutoff] / selected * 100
+
+    key = mean if sort == 'mean' else hit_rate
+    for position in np.lexsort((-selected, -key)):
+        combo = combos[combo_index[position]]
+        rows.append({
+            'cutoff': int(cutoff[position]),
+            'signals': int(selected[position]),
+            'mean_return': float(mean[position]),
+            'hit_rate': float(hit_rate[position]),
+            'params': {rule['field']: list(rule['options'][option]) for rule, option in zip(swept, combo)}
+        })
+    return rows
+
+def _params_text(params):
+    return '  '.join('/'.join(f'{value:g}' for value in values) for values in params.values())
+
+def print_ranking(rows, current, cutoff, swept, top=20):
+    header = '  '.join(rule['field'] for rule in swept)
+    print(f"{'순위':>4} {'컷오프':>6} {'신호 수':>10} {'평균':>8} {'적중률':>7}   {header}")
+    for rank, row in enumerate(rows[:top], 1):
+        print(f"{rank:>4} {'≥ ' + str(row['cutoff']):>6} {row['signals']:>10,} "
+              f"{row['mean_return']:>+7.2f}% {row['hit_rate']:>6.1f}%   {_params_text(row['params'])}")
+
+    if current is None:
+        print(f"현재 규칙 (컷오프 ≥ {cutoff}): 최소 신호 수 미달")
+        return
+    rank, row = current
+    print(f"{'현재':>4} {'≥ ' + str(row['cutoff']):>6} {row['signals']:>10,} "
+          f"{row['mean_return']:>+7.2f}% {row['hit_rate']:>6.1f}%   {_params_text(row['params'])}"
+          f"  ({rank:,}위 / {len(rows):,}개)")
+
+# ============================================
+# 실행
+# ============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="점수 규칙 임계값 스윕 (병렬)")
+    parser.add_argument('rule_set', choices=sorted(DEFAULT_GRID), help="규칙 묶음 (fast_signal: 급등 신호, signal_strength: 실시간 모니터링)")
+    parser.add_argument('--grid', help="임계값 후보 JSON ({필드: [[단계1 후보...], [단계2 후보...]]}, 기본: 내장 그리드)")
+    parser.add_argument('--data-dir', default=BACKTEST_DATA_DIR, help="백테스트 히스토리 폴더")
+    parser.add_argument('--markets', nargs='+', help="대상 마켓 (기본: 저장된 전체)")
+    parser.add_argument('--days', type=int, help="최근 N일만 평가 (기본: 전체)")
+    parser.add_argument('--horizon', type=int, default=60, help="보유 기간 (분)")
+    parser.add_argument('--hit-threshold', type=float, default=0.0, help="적중 기준 수익률 (%%)")
+    parser.add_argument('--min-signals', type=int, default=100, help="순위에 넣을 최소 신호 수")
+    parser.add_argument('--sort', choices=['mean', 'hit'], default='mean', help="정렬 기준 (평균 수익률 / 적중률)")
+    parser.add_argument('--workers', type=int, default=SWEEP_WORKERS, help="워커 프로세스 수")
+    parser.add_argument('--top', type=int, default=20, help="출력할 상위 행 수")
+    parser.add_argument('--json', help="전체 순위 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    grid = DEFAULT_GRID[args.rule_set]
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            grid = json.load(f)
+    swept, fixed, top_score = build_sweep(args.rule_set, grid)
+
+    markets = args.markets or stored_markets(args.data_dir)
+    if not markets:
+        print(f"❌ 저장된 히스토리 없음: {args.data_dir} (먼저 'python backtest.py download' 실행)")
+        return
+
+    started = time.perf_counter()
+    task = {
+        'name': args.rule_set, 'swept': swept, 'fixed': fixed, 'root': args.data_dir,
+        'start': evaluation_start(markets, args.days, args.data_dir), 'horizon': args.horizon
+    }
+    arrays, bars = prepare_cells(task, markets, args.hit_threshold, args.workers)
+    prepared = time.perf_counter() - started
+    if not bars:
+        print("❌ 평가 가능한 봉 없음")
+        return
+
+    combos, stats = run_sweep(arrays, swept, top_score + 1, args.workers)
+    elapsed = time.perf_counter() - started - prepared
+    print(f"\n🧪 {args.rule_set} 임계값 스윕: 조합 {len(combos):,}개 × 컷오프 {top_score}개, "
+          f"평가 봉 {bars:,}개 → 셀 {len(arrays['count']):,}개 ({len(markets)}개 마켓), {args.horizon}분 보유")
+    print(f"⏱️ 피처 계산 {prepared:.1f}초 / 스윕 {elapsed:.1f}초 "
+          f"(워커 {args.workers}개, 초당 {len(combos) / max(elapsed, 1e-9):,.0f}개 조합)\n")
+
+    rows = rank_results(combos, stats, swept, args.min_signals, args.sort)
+    current_params = {rule['field']: list(rule['current']) for rule in swept}
+    current = next(((rank, row) for rank, row in enumerate(rows, 1)
+                    if row['params'] == current_params and row['cutoff'] == fixed.cutoff), None)
+    print_ranking(rows, current, fixed.cutoff, swept, args.top)
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'rule_set': args.rule_set,
+                'horizon': args.horizon,
+                'hit_threshold': args.hit_threshold,
+                'bars': bars,
+                'combinations': len(combos),
+                'current_rank': current[0] if current else None,
+                'results': rows
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.json}")
+
+if __name__ == "__main__":
+    main()
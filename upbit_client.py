@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 시세 조회 HTTP 클라이언트
+- keep-alive 연결 풀(requests.Session) 공용 사용
+- 요청 그룹별 토큰 버킷, Remaining-Req 헤더로 속도 자동 조절 (AIMD)
+- 429 / 5xx / 연결 오류는 지터 포함 지수 백오프로 재시도
+- 스캔 단위 요청/대기/재시도/누락 통계, 엔드포인트별 지연/오류 계측
+"""
+
+from requests.adapters import HTTPAdapter
+from scan_metrics import METRICS
+from datetime import datetime
+import pandas as pd
+import requests
+import threading
+import random
+import time
+import re
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+UPBIT_API_URL = os.environ.get('UPBIT_API_URL', 'https://api.upbit.com/v1')
+
+# 업비트 시세 조회 API 초당 요청 한도 (IP, 요청 그룹 기준)
+UPBIT_REQUESTS_PER_SEC = float(os.environ.get('UPBIT_REQUESTS_PER_SEC', '10'))
+UPBIT_MIN_REQUESTS_PER_SEC = float(os.environ.get('UPBIT_MIN_REQUESTS_PER_SEC', '2'))
+UPBIT_MAX_RETRIES = int(os.environ.get('UPBIT_MAX_RETRIES', '4'))
+UPBIT_POOL_SIZE = int(os.environ.get('UPBIT_POOL_SIZE', '16'))
+UPBIT_TIMEOUT = float(os.environ.get('UPBIT_TIMEOUT', '10'))
+
+MAX_CANDLE_COUNT = 200
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 8.0
+
+class UpbitRequestError(Exception):
+    """재시도 후에도 실패한 업비트 요청"""
+
+# ============================================
+# 요청 통계
+# ============================================
+
+class RequestStats:
+    """요청/대기/재시도/누락 집계 (스캔 종료 시 출력 후 reset)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.throttled = 0
+            self.retried = 0
+            self.failed = 0
+            self.dropped = set()
+
+    def add(self, name, amount=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def drop(self, coins):
+        """재시도 후에도 데이터를 받지 못한 코인 기록"""
+        with self.lock:
+            self.dropped.update(coins)
+
+    def summary(self):
+        return (f"요청 {self.requests} / 대기 {self.throttled} / "
+                f"재시도 {self.retried} / 누락 {len(self.dropped)}개 코인")
+
+REQUEST_STATS = RequestStats()
+
+# ============================================
+# 요청 한도 관리
+# ============================================
+
+class TokenBucket:
+    """초당 요청 한도 토큰 버킷 (스레드 공용)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if now <= self.updated:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """토큰 1개 획득 (부족하면 대기)"""
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveLimiter(TokenBucket):
+    """Remaining-Req 헤더 기반 가변 속도 토큰 버킷
+
+    남은 요청 수가 넉넉하면 속도를 조금씩 올리고(최대 max_rate),
+    바닥나거나 429 를 받으면 속도를 절반으로 줄이고 잠시 멈춘다.
+    """
+
+    def __init__(self, rate=UPBIT_REQUESTS_PER_SEC, min_rate=UPBIT_MIN_REQUESTS_PER_SEC, max_rate=None):
+        super().__init__(rate)
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.paused_until = 0.0
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        super().acquire()
+
+    def _pause(self, seconds):
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        # 멈춘 동안 토큰이 쌓여 재개 직후 한꺼번에 몰리지 않게 한다
+        self.tokens = 0
+        self.updated = self.paused_until
+
+    def observe(self, remaining_sec):
+        """응답 헤더의 초당 남은 요청 수 반영"""
+        if remaining_sec is None:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            if remaining_sec <= 0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._pause(1.0)
+                REQUEST_STATS.add('throttled')
+            elif remaining_sec <= 2:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.5)
+
+    def penalize(self, retry_after=None):
+        """429 수신 - 속도 절반 + Retry-After(없으면 1초) 동안 정지"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._pause(retry_after if retry_after is not None else 1.0)
+        REQUEST_STATS.add('throttled')
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(group):
+    """요청 그룹(candles, orderbook, market ...)별 공용 제한기"""
+    with _limiters_lock:
+        limiter = _limiters.get(group)
+        if limiter is None:
+            limiter = _limiters[group] = AdaptiveLimiter()
+        return limiter
+
+# ============================================
+# HTTP 세션
+# ============================================
+
+def _create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=UPBIT_POOL_SIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+SESSION = _create_session()
+
+_REMAINING_SEC = re.compile(r'sec=(\d+)')
+
+def _remaining_sec(response):
+    match = _REMAINING_SEC.search(response.headers.get('Remaining-Req', ''))
+    return int(match.group(1)) if match else None
+
+def _retry_after(response):
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+def _backoff(attempt):
+    # full jitter: 0 ~ base * 2^attempt
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def request_json(path, params=None, max_retries=UPBIT_MAX_RETRIES):
+    """시세 API GET (한도 대기 + 재시도, 최종 실패 시 UpbitRequestError)"""
+    limiter = get_limiter(path.split('/')[0])
+    url = f"{UPBIT_API_URL}/{path}"
+    last_error = None
+
+    for attempt in range(max_retries + 1):
+        if attempt > 0:
+            REQUEST_STATS.add('retried')
+            time.sleep(_backoff(attempt))
+
+        limiter.acquire()
+        REQUEST_STATS.add('requests')
+        started = time.perf_counter()
+        try:
+            response = SESSION.get(url, params=params, timeout=UPBIT_TIMEOUT)
+        except requests.RequestException as e:
+            METRICS.observe_request(path, time.perf_counter() - started, 'error')
+            last_error = e
+            continue
+        METRICS.observe_request(path, time.perf_counter() - started, response.status_code)
+
+        if response.status_code == 429:
+            limiter.penalize(_retry_after(response))
+            last_error = UpbitRequestError(f"429 Too Many Requests ({path})")
+            continue
+        if response.status_code >= 500:
+            last_error = UpbitRequestError(f"{response.status_code} 서버 오류 ({path})")
+            continue
+        if response.status_code >= 400:
+            # 잘못된 요청(존재하지 않는 마켓 등), 418(차단)은 재시도하지 않는다
+            REQUEST_STATS.add('failed')
+            raise UpbitRequestError(f"{response.status_code} {response.text[:200]} ({path})")
+
+        limiter.observe(_remaining_sec(response))
+        return response.json()
+
+    REQUEST_STATS.add('failed')
+    raise UpbitRequestError(f"재시도 {max_retries}회 초과: {last_error}")
+
+# ============================================
+# 시세 조회 (pyupbit 호환 반환 형식)
+# ============================================
+
+def _candle_path(interval):
+    if interval in ('day', 'days'):
+        return 'candles/days'
+    if interval.startswith('minute'):
+        return f"candles/minutes/{int(interval[len('minute'):] or 1)}"
+    if interval in ('week', 'weeks'):
+        return 'candles/weeks'
+    if interval in ('month', 'months'):
+        return 'candles/months'
+    raise ValueError(f"지원하지 않는 봉: {interval}")
+
+def get_tickers(fiat=""):
+    """마켓 목록 (fiat 로 시작하는 마켓 코드)"""
+    markets = request_json('market/all', {'isDetails': 'false'})
+    return [m['market'] for m in markets if m['market'].startswith(fiat)]
+
+def get_ohlcv(ticker, interval="day", count=200, to=None):
+    """캔들 DataFrame (인덱스 KST, open/high/low/close/volume/value, 오래된 순, 없으면 None)
+
+    to 는 UTC 기준 (pyupbit.get_ohlcv 와 동일)
+    """
+    path = _candle_path(interval)
+    if isinstance(to, str):
+        to = pd.to_datetime(to).to_pydatetime()
+    elif isinstance(to, pd.Timestamp):
+        to = to.to_pydatetime()
+
+    rows = []
+    remaining = max(count, 1)
+    while remaining > 0:
+        params = {'market': ticker, 'count': min(MAX_CANDLE_COUNT, remaining)}
+        if to is not None:
+            params['to'] = to.strftime('%Y-%m-%d %H:%M:%S')
+        contents = request_json(path, params)
+        if not contents:
+            break
+        rows.extend(contents)
+        remaining -= len(contents)
+        if len(contents) < params['count']:
+            break
+        to = datetime.strptime(contents[-1]['candle_date_time_utc'], '%Y-%m-%dT%H:%M:%S')
+
+    if not rows:
+        return None
+
+    index = pd.to_datetime([row['candle_date_time_kst'] for row in rows], format='%Y-%m-%dT%H:%M:%S')
+    df = pd.DataFrame({
+        'open': [row['opening_price'] for row in rows],
+        'high': [row['high_price'] for row in rows],
+        'low': [row['low_price'] for row in rows],
+        'close': [row['trade_price'] for row in rows],
+        'volume': [row['candle_acc_trade_volume'] for row in rows],
+        'value': [row['candle_acc_trade_price'] for row in rows]
+    }, index=index)
+    df = df[~df.index.duplicated(keep='first')]
+    return df.sort_index()
+
+def get_orderbook(markets):
+    """호가창 목록 (마켓 여러 개 한 번에, 항상 list)"""
+    if isinstance(markets, str):
+        markets = [markets]
+    return request_json('orderbook', {'markets': ','.join(markets)})
+
+def get_ticker(markets):
+    """현재가/24시간 누적 거래대금/변화율/최근 체결 시각 (마켓 여러 개 한 번에, list)"""
+    if isinstance(markets, str):
+        markets = [markets]
+    return request_json('ticker', {'markets': ','.join(markets)})
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 작업 큐 (SQLite, 외부 브로커 없음)
+- 배치(스캔 1회) 단위로 작업을 넣고 워커가 임대(lease)해서 처리
+- 임대 시간 안에 갱신하지 않은 작업은 다른 워커가 다시 가져감 (최대 시도 횟수 초과 시 실패 처리)
+- 결과는 작업 행에 JSON 으로 저장, 코디네이터가 순서대로 모아 병합
+- 여러 호스트가 공유 파일시스템의 같은 DB 파일을 쓸 수 있음 (파일 잠금을 지원하는 경우)
+"""
+
+from contextlib import contextmanager
+import sqlite3
+import time
+import json
+import os
+
+# ============================================
+# 환경변수 설정
+# ============================================
+WORK_QUEUE_PATH = os.environ.get('WORK_QUEUE_PATH', 'market_data/work_queue.sqlite3')
+# 임대 시간(초) - 처리 중에는 1/3 주기로 갱신
+WORK_LEASE_SEC = float(os.environ.get('WORK_LEASE_SEC', '120'))
+WORK_MAX_ATTEMPTS = int(os.environ.get('WORK_MAX_ATTEMPTS', '3'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_batch_state ON tasks (batch, state);
+"""
+
+# ============================================
+# 작업 큐
+# ============================================
+
+class Task:
+    """임대한 작업 1개"""
+
+    __slots__ = ('id', 'batch', 'seq', 'payload', 'attempts')
+
+    def __init__(self, id, batch, seq, payload, attempts):
+        self.id = id
+        self.batch = batch
+        self.seq = seq
+        self.payload = payload
+        self.attempts = attempts
+
+class WorkQueue:
+    """SQLite 작업 큐 (상태: pending → leased → done / failed)
+
+    연결은 호출마다 새로 열어 스레드(임대 갱신) / 프로세스 간에 공유하지 않는다.
+    """
+
+    def __init__(self, path=WORK_QUEUE_PATH, lease_sec=WORK_LEASE_SEC, max_attempts=WORK_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_sec = lease_sec
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (임대 경쟁 시 한 워커만 성공)"""
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+
+    # ---------- 코디네이터 ----------
+
+    def put(self, batch, payloads):
+        """배치 작업 추가 (seq = 입력 순서)"""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                'INSERT INTO tasks (batch, seq, payload, created) VALUES (?, ?, ?, ?)',
+                [(batch, seq, json.dumps(payload, ensure_ascii=False), now)
+                 for seq, payload in enumerate(payloads)]
+            )
+        return len(payloads)
+
+    def counts(self, batch):
+        """상태별 작업 수 (임대 만료 작업은 pending 으로 집계)"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT CASE WHEN state = 'leased' AND lease_until < ? THEN 'pending' ELSE state END, COUNT(*) "
+                "FROM tasks WHERE batch = ? GROUP BY 1", (time.time(), batch)
+            ).fetchall()
+        return dict(rows)
+
+    def results(self, batch):
+        """완료 작업 결과 [(seq, 결과), ...] (seq 순)"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT seq, result FROM tasks WHERE batch = ? AND state = 'done' ORDER BY seq", (batch,)
+            ).fetchall()
+        return [(seq, json.loads(result)) for seq, result in rows]
+
+    def unfinished(self, batch):
+        """완료되지 않은 작업 [(seq, payload, 상태, 오류), ...]"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT seq, payload, state, error FROM tasks WHERE batch = ? AND state != 'done' ORDER BY seq",
+                (batch,)
+            ).fetchall()
+        return [(seq, json.loads(payload), state, error) for seq, payload, state, error in rows]
+
+    def delete(self, batch):
+        with self._transaction() as db:
+            db.execute('DELETE FROM tasks WHERE batch = ?', (batch,))
+
+    def batches(self):
+        """배치별 상태 요약 {배치: {상태: 개수}}"""
+        with self._connect() as db:
+            rows = db.execute('SELECT batch, state, COUNT(*) FROM tasks GROUP BY batch, state').fetchall()
+        summary = {}
+        for batch, state, count in rows:
+            summary.setdefault(batch, {})[state] = count
+        return summary
+
+    # ---------- 워커 ----------
+
+    def lease(self, owner, batch=None):
+        """대기 중이거나 임대가 만료된 작업 1개 임대 (없으면 None)"""
+        with self._transaction() as db:
+            while True:
+                now = time.time()
+                row = db.execute(
+                    "SELECT id, batch, seq, payload, attempts FROM tasks "
+                    "WHERE (state = 'pending' OR (state = 'leased' AND lease_until < ?)) "
+                    "AND (? IS NULL OR batch = ?) ORDER BY id LIMIT 1",
+                    (now, batch, batch)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                task_id, task_batch, seq, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    # 임대 만료를 반복한 작업 (워커 비정상 종료 등)
+                    db.execute("UPDATE tasks SET state = 'failed', owner = NULL, "
+                               "error = COALESCE(error, '임대 만료 반복') WHERE id = ?", (task_id,))
+                    continue
+
+                db.execute(
+                    "UPDATE tasks SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                    "WHERE id = ?", (owner, now + self.lease_sec, task_id)
+                )
+                return Task(task_id, task_batch, seq, json.loads(payload), attempts + 1)
+
+    def renew(self, task, owner):
+        """임대 연장 (다른 워커가 가져갔으면 False)"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + self.lease_sec, task.id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task, owner, result):
+        """결과 저장 (임대를 잃었으면 저장하지 않고 False)"""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET state = 'done', result = ?, lease_until = NULL "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (json.dumps(result, ensure_ascii=False), task.id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, task, owner, error):
+        """처리 실패 - 시도 횟수가 남았으면 다시 대기열로"""
+        state = 'failed' if task.attempts >= self.max_attempts else 'pending'
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE tasks SET state = ?, owner = NULL, lease_until = NULL, error = ? "
+                "WHERE id = ? AND owner = ? AND state = 'leased'",
+                (state, str(error), task.id, owner)
+            )
+        return state